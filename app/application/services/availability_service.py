@@ -0,0 +1,282 @@
+# app/application/services/availability_service.py
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from beanie import PydanticObjectId
+
+from app.domain.entities.officeConfig_entity import OfficeSettings
+from app.infrastructure.repositories.especialista_repo import get_especialista_by_id
+from app.infrastructure.repositories.officeConfig_repo import get_office_settings
+from app.infrastructure.repositories.user_repo import get_users_by_ids
+from app.infrastructure.schemas.cita import Cita
+from app.infrastructure.schemas.especialista import Especialista
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
+
+# Disponibilidad.dia usa 0=Domingo..6=Sábado; datetime.weekday() usa 0=Lunes..6=Domingo
+DAY_MAP = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 0: 6}
+
+Interval = Tuple[datetime, datetime]
+
+WEEK_MINUTES = 7 * 24 * 60
+MAX_SEARCH_WEEKS = 8
+
+
+def _as_aware_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def _parse_hhmm(value: str) -> Optional[time]:
+    try:
+        h, m = map(int, str(value).split(":")[:2])
+        return time(hour=h, minute=m)
+    except Exception:
+        return None
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Ordena y fusiona intervalos [ini, fin) solapados o contiguos."""
+    merged: List[Interval] = []
+    for ini, fin in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and ini <= merged[-1][1]:
+            if fin > merged[-1][1]:
+                merged[-1] = (merged[-1][0], fin)
+        else:
+            merged.append((ini, fin))
+    return merged
+
+def working_blocks(disponibilidades: Sequence, desde_utc: datetime, hasta_utc: datetime, tz: ZoneInfo) -> List[Interval]:
+    """Bloques de atención (UTC) de cada día local que toca [desde_utc, hasta_utc), ordenados."""
+    por_dia: dict[int, List[Tuple[time, time]]] = {}
+    for disp in disponibilidades or []:
+        weekday = DAY_MAP.get(getattr(disp, "dia", None))
+        desde = _parse_hhmm(getattr(disp, "desde", ""))
+        hasta = _parse_hhmm(getattr(disp, "hasta", ""))
+        if weekday is None or desde is None or hasta is None or hasta <= desde:
+            continue
+        por_dia.setdefault(weekday, []).append((desde, hasta))
+
+    blocks: List[Interval] = []
+    day: date = desde_utc.astimezone(tz).date()
+    last_day: date = hasta_utc.astimezone(tz).date()
+    while day <= last_day:
+        for desde, hasta in por_dia.get(day.weekday(), []):
+            ini = datetime.combine(day, desde, tzinfo=tz).astimezone(timezone.utc)
+            fin = datetime.combine(day, hasta, tzinfo=tz).astimezone(timezone.utc)
+            blocks.append((ini, fin))
+        day += timedelta(days=1)
+
+    return merge_intervals(blocks)
+
+def compute_free_slots(
+    disponibilidades: Sequence,
+    busy: Iterable[Interval],
+    desde_utc: datetime,
+    hasta_utc: datetime,
+    step: timedelta,
+    tz: ZoneInfo,
+    now_utc: Optional[datetime] = None,
+) -> List[Interval]:
+    """
+    Slots libres de duración `step` dentro de [desde_utc, hasta_utc), alineados al inicio de
+    cada bloque de disponibilidad. `busy` son intervalos UTC ocupados (citas no canceladas
+    e inactividades). Barrido lineal sobre slots y ocupaciones ordenados: O(slots + ocupaciones).
+    """
+    now_utc = now_utc or datetime.now(timezone.utc)
+    ocupados = merge_intervals(busy)
+    free: List[Interval] = []
+    j = 0
+
+    for block_ini, block_fin in working_blocks(disponibilidades, desde_utc, hasta_utc, tz):
+        t = block_ini
+        while t + step <= block_fin:
+            slot_fin = t + step
+            if t >= hasta_utc:
+                break
+            if t >= desde_utc and t > now_utc:
+                while j < len(ocupados) and ocupados[j][1] <= t:
+                    j += 1
+                if j >= len(ocupados) or ocupados[j][0] >= slot_fin:
+                    free.append((t, slot_fin))
+            t = slot_fin
+
+    return free
+
+async def get_free_slots(
+    especialista_id: str,
+    tenant_id: str,
+    desde_utc: datetime,
+    hasta_utc: datetime,
+    office_settings: Optional[OfficeSettings] = None,
+    especialista=None,
+) -> List[Interval]:
+    office_settings = office_settings or await get_office_settings(tenant_id)
+    especialista = especialista or await get_especialista_by_id(especialista_id, tenant_id)
+    if not especialista:
+        return []
+
+    busy_por_especialista = await _load_busy([especialista], tenant_id, desde_utc, hasta_utc)
+
+    return compute_free_slots(
+        especialista.disponibilidades,
+        busy_por_especialista[str(especialista.id)],
+        desde_utc,
+        hasta_utc,
+        office_settings.duracion_cita,
+        office_settings.office_timezone,
+    )
+
+async def _load_busy(especialistas: Sequence, tenant_id: str, desde_utc: datetime, hasta_utc: datetime) -> Dict[str, List[Interval]]:
+    """Intervalos ocupados (citas no canceladas + inactividades) por especialista, con una sola consulta de citas."""
+    busy: Dict[str, List[Interval]] = {str(e.id): [] for e in especialistas}
+    if not busy:
+        return busy
+
+    citas = await Cita.get_motor_collection().find(
+        {
+            "tenant_id": PydanticObjectId(tenant_id),
+            "especialista_id": {"$in": [e.id for e in especialistas]},
+            "fecha_inicio": {"$lt": hasta_utc},
+            "fecha_fin": {"$gt": desde_utc},
+            "estado_id": {"$ne": ESTADOS_CITA.cancelada.value},
+        },
+        {"especialista_id": 1, "fecha_inicio": 1, "fecha_fin": 1},
+    ).to_list(length=None)
+
+    for c in citas:
+        busy[str(c["especialista_id"])].append((_as_aware_utc(c["fecha_inicio"]), _as_aware_utc(c["fecha_fin"])))
+
+    for e in especialistas:
+        for ia in getattr(e, "inactividades", []) or []:
+            ia_ini = _as_aware_utc(getattr(ia, "desde", None))
+            ia_fin = _as_aware_utc(getattr(ia, "hasta", None))
+            if ia_ini and ia_fin:
+                busy[str(e.id)].append((ia_ini, ia_fin))
+
+    return busy
+
+def _minutes_between(origin: datetime, dt: datetime, ceil: bool = False) -> int:
+    minutes = (dt - origin).total_seconds() / 60
+    return math.ceil(minutes) if ceil else math.floor(minutes)
+
+def build_occupancy_bitmap(
+    disponibilidades: Sequence,
+    busy: Iterable[Interval],
+    origin_utc: datetime,
+    horizon_minutes: int,
+    step_minutes: int,
+    tz: ZoneInfo,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bitmap por minuto desde `origin_utc`. Devuelve (libre, inicio_alineado):
+    - libre: horizon + step minutos, True donde el especialista atiende y no está ocupado.
+    - inicio_alineado: horizon minutos, True en los inicios de slot (inicio de bloque + k*step).
+    """
+    length = horizon_minutes + step_minutes
+    libre = np.zeros(length, dtype=bool)
+    alineado = np.zeros(horizon_minutes, dtype=bool)
+
+    fin_utc = origin_utc + timedelta(minutes=length)
+    for block_ini, block_fin in working_blocks(disponibilidades, origin_utc, fin_utc, tz):
+        b0 = _minutes_between(origin_utc, block_ini)
+        b1 = _minutes_between(origin_utc, block_fin)
+        libre[max(b0, 0):max(min(b1, length), 0)] = True
+
+        starts = np.arange(b0, b1 - step_minutes + 1, step_minutes)
+        starts = starts[(starts >= 0) & (starts < horizon_minutes)]
+        alineado[starts] = True
+
+    for ini, fin in busy:
+        o0 = _minutes_between(origin_utc, ini)
+        o1 = _minutes_between(origin_utc, fin, ceil=True)
+        if o1 <= 0 or o0 >= length:
+            continue
+        libre[max(o0, 0):min(o1, length)] = False
+
+    return libre, alineado
+
+def first_free_starts(
+    libres: np.ndarray,
+    alineados: np.ndarray,
+    step_minutes: int,
+    min_offset: int,
+    n: int,
+) -> List[Tuple[int, int]]:
+    """
+    Vectorizado sobre todos los especialistas (filas). Devuelve hasta n pares
+    (fila, minuto) ordenados por minuto con `step_minutes` libres consecutivos.
+    """
+    rows, length = libres.shape
+    horizon = alineados.shape[1]
+
+    acumulado = np.zeros((rows, length + 1), dtype=np.int32)
+    np.cumsum(libres, axis=1, out=acumulado[:, 1:])
+    ventana_libre = (acumulado[:, step_minutes:step_minutes + horizon] - acumulado[:, :horizon]) == step_minutes
+
+    validos = alineados & ventana_libre
+    if min_offset > 0:
+        validos[:, :min(min_offset, horizon)] = False
+
+    fila, minuto = np.nonzero(validos)
+    if fila.size == 0:
+        return []
+    orden = np.lexsort((fila, minuto))[:n]
+    return [(int(fila[i]), int(minuto[i])) for i in orden]
+
+async def find_next_available(
+    especialidad_id: str,
+    tenant_id: str,
+    desde_utc: datetime,
+    n: int = 5,
+    max_weeks: int = MAX_SEARCH_WEEKS,
+) -> List[Tuple[Especialista, str, datetime, datetime]]:
+    """
+    Los n primeros slots libres entre todos los especialistas activos de la especialidad,
+    como (especialista, nombre, inicio_utc, fin_utc). Se busca semana a semana sobre
+    bitmaps de ocupación por minuto y se corta en cuanto se completan n resultados.
+    """
+    office_settings = await get_office_settings(tenant_id)
+    tz = office_settings.office_timezone
+    step = office_settings.duracion_cita
+    step_minutes = max(1, int(step.total_seconds() // 60))
+
+    especialistas = await Especialista.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "especialidades": PydanticObjectId(especialidad_id),
+    }).to_list()
+    usuarios = await get_users_by_ids([str(e.user_id) for e in especialistas], tenant_id)
+    activos = {str(u.id): u for u in usuarios if u.isActive}
+    especialistas = [e for e in especialistas if str(e.user_id) in activos]
+    if not especialistas:
+        return []
+
+    now_utc = datetime.now(timezone.utc)
+    desde_utc = max(_as_aware_utc(desde_utc), now_utc)
+    # Bitmaps alineados al minuto
+    origin = desde_utc.replace(second=0, microsecond=0)
+    hasta_utc = origin + timedelta(minutes=max_weeks * WEEK_MINUTES + step_minutes)
+    busy = await _load_busy(especialistas, tenant_id, origin, hasta_utc)
+
+    found: List[Tuple[Especialista, str, datetime, datetime]] = []
+    for week in range(max_weeks):
+        week_origin = origin + timedelta(minutes=week * WEEK_MINUTES)
+        bitmaps = [
+            build_occupancy_bitmap(e.disponibilidades, busy[str(e.id)], week_origin, WEEK_MINUTES, step_minutes, tz)
+            for e in especialistas
+        ]
+        libres = np.vstack([b[0] for b in bitmaps])
+        alineados = np.vstack([b[1] for b in bitmaps])
+
+        min_offset = _minutes_between(week_origin, desde_utc, ceil=True) if week == 0 else 0
+        for fila, minuto in first_free_starts(libres, alineados, step_minutes, min_offset, n - len(found)):
+            esp = especialistas[fila]
+            user = activos[str(esp.user_id)]
+            ini = week_origin + timedelta(minutes=minuto)
+            found.append((esp, f'{user.name} {user.lastname}', ini, ini + step))
+
+        if len(found) >= n:
+            break
+
+    return found
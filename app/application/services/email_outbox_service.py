@@ -0,0 +1,165 @@
+# app/application/services/email_outbox_service.py
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.core.config import settings
+from app.infrastructure.notifiers.email_notifier import EmailDeliveryError, deliver_email
+from app.infrastructure.repositories.emailOutbox_repo import (
+    claim_next_email,
+    enqueue_emails,
+    fail_exhausted_emails,
+    get_next_email_attempt_at,
+    mark_email_failed,
+    mark_email_retry,
+    mark_emails_sent,
+)
+from app.infrastructure.schemas.emailOutbox import EmailOutbox
+from app.shared.dto.outboxEmail_dto import OutboxEmail, OutboxRecipient
+
+logger = logging.getLogger("app.email_outbox")
+
+MAX_BACKOFF_SECONDS = 15 * 60
+
+
+class EmailOutboxWorker:
+    """
+    Vacía la colección email_outbox con `concurrency` consumidores que comparten el
+    cliente HTTP del notifier. Cada correo se toma con un find_one_and_update, así
+    varios workers (o procesos) pueden drenar la misma cola sin enviar dos veces.
+    Los fallos transitorios se reintentan con backoff exponencial hasta `max_attempts`.
+    """
+
+    def __init__(self, concurrency: int, poll_seconds: int, lock_seconds: int, max_attempts: int, retry_base_seconds: int):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lock_seconds = lock_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.wakeup = asyncio.Event()
+
+    def backoff(self, attempts: int) -> float:
+        base = min(self.retry_base_seconds * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS)
+        # Jitter para que los reintentos de una ráfaga no vuelvan todos juntos
+        return base * random.uniform(0.8, 1.2)
+
+    async def _retry_or_fail(
+        self,
+        email: EmailOutbox,
+        error: str,
+        retryable: bool,
+        recipients: Optional[List[OutboxRecipient]] = None,
+    ) -> None:
+        if retryable and email.attempts < self.max_attempts:
+            next_at = datetime.now(timezone.utc) + timedelta(seconds=self.backoff(email.attempts))
+            await mark_email_retry(email.id, next_at, error, recipients)
+            logger.warning("Correo reprogramado | id=%s intento=%d error=%s", str(email.id), email.attempts, error)
+        else:
+            await mark_email_failed(email.id, error)
+            logger.error("Correo descartado | id=%s intentos=%d error=%s", str(email.id), email.attempts, error)
+
+    async def _deliver_each(self, email: EmailOutbox) -> None:
+        """
+        Envía a cada destinatario por separado: SendGrid rechaza la llamada entera si una
+        sola dirección es inválida, y eso no debe dejar sin correo al resto. Los rechazos
+        definitivos se descartan; los transitorios se reintentan solo para esas direcciones.
+        """
+        pendientes: List[OutboxRecipient] = []
+        rechazados = 0
+        ultimo_error = ''
+        for recipient in email.recipients:
+            try:
+                await deliver_email([recipient], email.subject, email.html)
+            except Exception as e:
+                ultimo_error = str(e)
+                if isinstance(e, EmailDeliveryError) and not e.retryable:
+                    rechazados += 1
+                    logger.error("Destinatario rechazado | id=%s email=%s error=%s", str(email.id), recipient.email, e)
+                else:
+                    pendientes.append(recipient)
+
+        if pendientes:
+            await self._retry_or_fail(email, ultimo_error, True, pendientes)
+        elif rechazados == len(email.recipients):
+            await self._retry_or_fail(email, ultimo_error, False)
+        else:
+            await mark_emails_sent([email.id])
+
+    async def _deliver(self, email: EmailOutbox) -> None:
+        try:
+            await deliver_email(email.recipients, email.subject, email.html)
+        except Exception as e:
+            retryable = e.retryable if isinstance(e, EmailDeliveryError) else True
+            if not retryable and len(email.recipients) > 1:
+                logger.warning("Envío agrupado rechazado; se envía por destinatario | id=%s error=%s", str(email.id), e)
+                await self._deliver_each(email)
+            else:
+                await self._retry_or_fail(email, str(e), retryable)
+            return
+
+        await mark_emails_sent([email.id])
+        logger.debug("Correo enviado | id=%s destinatarios=%d", str(email.id), len(email.recipients))
+
+    async def _consumer(self) -> int:
+        enviados = 0
+        while True:
+            email = await claim_next_email(self.lock_seconds, self.max_attempts)
+            if email is None:
+                return enviados
+            await self._deliver(email)
+            enviados += 1
+
+    async def drain(self) -> int:
+        """Procesa todo lo que esté listo para enviar; devuelve cuántos correos se intentaron."""
+        agotados = await fail_exhausted_emails(self.max_attempts)
+        if agotados:
+            logger.error("Correos descartados por intentos agotados | count=%d", agotados)
+        procesados = await asyncio.gather(*(self._consumer() for _ in range(self.concurrency)))
+        return sum(procesados)
+
+    async def _seconds_until_next(self) -> float:
+        proximo = await get_next_email_attempt_at()
+        if proximo is None:
+            return self.poll_seconds
+        if proximo.tzinfo is None:
+            proximo = proximo.replace(tzinfo=timezone.utc)
+        delta = (proximo - datetime.now(timezone.utc)).total_seconds()
+        return min(self.poll_seconds, max(delta, 0))
+
+    async def run(self) -> None:
+        logger.info(
+            "Email outbox worker iniciado | concurrency=%d poll=%ss max_attempts=%d",
+            self.concurrency, self.poll_seconds, self.max_attempts
+        )
+        while True:
+            sleep_seconds = self.poll_seconds
+            try:
+                self.wakeup.clear()
+                await self.drain()
+                sleep_seconds = await self._seconds_until_next()
+            except Exception:
+                logger.exception("Error no controlado en el worker de correos")
+
+            # Encolar desde este proceso despierta al worker sin esperar el poll
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=sleep_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+email_outbox_worker = EmailOutboxWorker(
+    concurrency=settings.EMAIL_SEND_CONCURRENCY,
+    poll_seconds=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    lock_seconds=settings.EMAIL_OUTBOX_LOCK_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_seconds=settings.EMAIL_RETRY_BASE_SECONDS,
+)
+
+async def encolar_correos(emails: List[OutboxEmail]) -> int:
+    """Persiste los correos en el outbox y despierta al worker local; no espera el envío."""
+    encolados = await enqueue_emails(emails)
+    if encolados:
+        email_outbox_worker.wakeup.set()
+    return encolados
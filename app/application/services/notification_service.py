@@ -1,6 +1,15 @@
 # notification_service.py
-from typing import Literal
-from app.application.websockets.manager import manager
+from typing import Dict, Literal, Optional, Tuple
+from app.application.websockets.broker import ws_broker
+
+# Campos de CitaOut que cambia cada acción; None = cita nueva, va completa.
+# Con coalescencia el frame `batch` solo lleva estos campos por evento.
+CAMPOS_POR_ACCION: Dict[str, Optional[Tuple[str, ...]]] = {
+    "created": None,
+    "confirmed": ("estado",),
+    "attended": ("estado",),
+    "canceled": ("estado", "canceledBy", "cancel_motivo"),
+}
 
 async def notificar_evento_cita(
     tenant_id: str,
@@ -11,10 +20,13 @@ async def notificar_evento_cita(
     message = {
         "entity": "cita",
         "action": action,
+        "id": payload.get("id"),
+        "changed": CAMPOS_POR_ACCION.get(action),
         "data": payload
     }
-    # broadcast a todo el tenant
-    await manager.broadcast(f"tenant:{tenant_id}", message)
-    # y también al canal del especialista (si aplica)
+    # todo el tenant y también el canal del especialista (si aplica)
+    rooms = [f"tenant:{tenant_id}"]
     if especialista_id:
-        await manager.broadcast(f"tenant:{tenant_id}:esp:{especialista_id}", message)
+        rooms.append(f"tenant:{tenant_id}:esp:{especialista_id}")
+    # el broker lo hace llegar a los sockets de cada worker
+    await ws_broker.publish(rooms, message)
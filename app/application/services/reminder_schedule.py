@@ -0,0 +1,103 @@
+# app/application/services/reminder_schedule.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
+
+# ---------- Config de tiempo ----------
+TEST_SPEEDUP = settings.REMINDERS_TEST_SPEEDUP
+# 1 'hora' = 1 'minuto' en tests
+HOUR_SECONDS = 60 if TEST_SPEEDUP == '1' else 60 * 60
+TOLERANCE_SECONDS = settings.REMINDERS_TOLERANCE_SECONDS
+
+# Marcadores de recordatorio: cada 2 h desde 24 hasta 8 (NO incluye 6)
+REMINDER_MARKS_HOURS = [h for h in range(24, 7, -2)]  # [24,22,20,18,16,14,12,10,8]
+AUTO_CANCEL_HOURS = 6
+
+ACTION_RECORDATORIO = 'recordatorio'
+ACTION_AUTO_CANCEL = 'auto_cancel'
+
+# Estado de cada marca en Cita.reminders_status: se reserva antes de enviar
+REMINDER_CLAIMED = 'claimed'
+REMINDER_SENT = 'sent'
+REMINDER_FAILED = 'failed'
+
+# Se activa cuando una cita nueva puede adelantar la próxima acción del scheduler
+schedule_changed = asyncio.Event()
+
+
+def _as_aware_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def compute_next_action(
+    fecha_inicio: datetime,
+    estado_id: int,
+    sent_marks: Iterable[int],
+    now: Optional[datetime] = None
+) -> Tuple[Optional[datetime], Optional[str], Optional[int]]:
+    """
+    Próxima acción programada de una cita: (momento, tipo, marca en horas).
+    Solo las pendientes tienen acciones; una acción cuya ventana de tolerancia ya
+    pasó se descarta, igual que cuando se buscaba por ventanas en cada tick.
+    """
+    if estado_id != ESTADOS_CITA.pendiente.value:
+        return None, None, None
+
+    now = now or datetime.now(timezone.utc)
+    limite = now - timedelta(seconds=TOLERANCE_SECONDS)
+    inicio = _as_aware_utc(fecha_inicio)
+    enviadas = set(sent_marks or [])
+
+    for mark in REMINDER_MARKS_HOURS:
+        if mark in enviadas:
+            continue
+        at = inicio - timedelta(seconds=HOUR_SECONDS * mark)
+        if at >= limite:
+            return at, ACTION_RECORDATORIO, mark
+
+    at = inicio - timedelta(seconds=HOUR_SECONDS * AUTO_CANCEL_HOURS)
+    if at >= limite:
+        return at, ACTION_AUTO_CANCEL, AUTO_CANCEL_HOURS
+
+    return None, None, None
+
+def latest_due_action(
+    fecha_inicio: datetime,
+    estado_id: int,
+    sent_marks: Iterable[int],
+    now: datetime
+) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Para recuperar una caída: la acción más reciente cuyo momento ya pasó. Si pasó la
+    autocancelación, esa; si no, solo la última marca vencida (y solo si no se envió).
+    """
+    if estado_id != ESTADOS_CITA.pendiente.value:
+        return None, None
+
+    inicio = _as_aware_utc(fecha_inicio)
+    if inicio - timedelta(seconds=HOUR_SECONDS * AUTO_CANCEL_HOURS) <= now:
+        return ACTION_AUTO_CANCEL, AUTO_CANCEL_HOURS
+
+    vencidas = [m for m in REMINDER_MARKS_HOURS if inicio - timedelta(seconds=HOUR_SECONDS * m) <= now]
+    if not vencidas:
+        return None, None
+
+    ultima = min(vencidas)
+    if ultima in set(sent_marks or []):
+        return None, None
+    return ACTION_RECORDATORIO, ultima
+
+def next_action_fields(
+    fecha_inicio: datetime,
+    estado_id: int,
+    sent_marks: Iterable[int],
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Campos next_action_* listos para un $set o para construir la Cita."""
+    at, kind, mark = compute_next_action(fecha_inicio, estado_id, sent_marks, now)
+    return {"next_action_at": at, "next_action_kind": kind, "next_action_mark": mark}
+
+def clear_next_action_fields() -> Dict[str, Any]:
+    return {"next_action_at": None, "next_action_kind": None, "next_action_mark": None}
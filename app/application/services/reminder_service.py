@@ -2,15 +2,44 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from beanie.operators import And, GTE, LTE
+from typing import Any, Dict, List, Optional, Set, Tuple
+from beanie import PydanticObjectId
+from pymongo import ASCENDING
 
+from app.application.services.reminder_schedule import (
+    ACTION_AUTO_CANCEL,
+    ACTION_RECORDATORIO,
+    HOUR_SECONDS,
+    REMINDER_MARKS_HOURS,
+    TEST_SPEEDUP,
+    TOLERANCE_SECONDS,
+    latest_due_action,
+    schedule_changed,
+)
+from app.application.services.email_outbox_service import encolar_correos
+from app.application.services.notification_service import notificar_evento_cita
+from app.application.services.scheduler_lease import MongoLease, reminder_lease
 from app.core.config import settings
+from app.domain.entities.scheduler_entity import SchedulerMetricsOut
 from app.infrastructure.schemas.cita import Cita
 from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
-from app.infrastructure.repositories.cita_repo import send_cita_email
-from app.infrastructure.repositories.estadoCita_repo import get_estado_cita_by_id
+from app.infrastructure.repositories.cita_repo import (
+    auto_cancelar_citas,
+    build_cita_mails,
+    citas_to_out_many,
+    claim_cita_reminder,
+    clear_citas_next_action,
+    complete_cita_reminders,
+    fail_cita_reminders,
+    get_stale_reminder_claims,
+    load_cita_mail_context,
+    release_cita_reminder,
+    reschedule_cita_next_action,
+    send_cancelacion_emails,
+)
 from app.infrastructure.repositories.user_repo import get_admin_user
 from app.infrastructure.repositories.officeConfig_repo import is_auto_cancel_enabled
+from app.shared.dto.outboxEmail_dto import OutboxEmail
 
 # ---------- Logger ----------
 logger = logging.getLogger("app.reminders")
@@ -19,139 +48,363 @@ if settings.DEBUG_REMINDERS and logger.level > logging.DEBUG:
     logger.setLevel(logging.DEBUG)
 
 # ---------- Config de tiempo ----------
-TEST_SPEEDUP = settings.REMINDERS_TEST_SPEEDUP
-# 1 'hora' = 1 'minuto' en tests
-HOUR_SECONDS = 60 if TEST_SPEEDUP == '1' else 60 * 60
 SLEEP_SECONDS = settings.REMINDERS_SLEEP_SECONDS
-TOLERANCE_SECONDS = settings.REMINDERS_TOLERANCE_SECONDS
+CATCHUP_BATCH = settings.REMINDERS_CATCHUP_BATCH
+CLAIM_TIMEOUT_SECONDS = settings.REMINDERS_CLAIM_TIMEOUT_SECONDS
 
-# Marcadores de recordatorio: cada 2 h desde 24 hasta 8 (NO incluye 6)
-REMINDER_MARKS_HOURS = [h for h in range(24, 7, -2)]  # [24,22,20,18,16,14,12,10,8]
+# Estado del scheduler en este proceso (ver get_scheduler_metrics)
+_metrics: Dict[str, Any] = {
+    "ticks": 0,
+    "last_tick_at": None,
+    "last_tick_duration_ms": None,
+    "last_tick_actions": 0,
+    "lag_seconds": 0.0,
+    "last_catch_up_at": None,
+    "last_catch_up_actions": 0,
+    "stale_claims_released": 0,
+}
 
 def now_utc():
     return datetime.now(timezone.utc)
 
-def window(center: datetime, tol_seconds: int):
-    return (center - timedelta(seconds=tol_seconds),
-            center + timedelta(seconds=tol_seconds))
+def _as_aware_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+async def _send_reminders(due: List[Cita], fencing_token: Optional[int] = None) -> int:
+    """
+    Envía los recordatorios vencidos de un tick en lote: reserva cada marca, arma un
+    CitaMailContext por tenant ($in por colección) y encola todos los correos en el
+    outbox. Devuelve cuántos recordatorios quedaron encolados. Con `fencing_token`, las
+    escrituras sobre la cita se rechazan si un líder más nuevo ya la tocó.
+    """
+    if not due:
+        return 0
+
+    # Reserva atómica: si otro proceso ya tomó la marca o la cita dejó de estar pendiente, no se envía
+    claims = await asyncio.gather(*(claim_cita_reminder(c, c.next_action_mark, fencing_token) for c in due))
+    claimed: List[Tuple[Cita, int]] = []
+    for cita, reservada in zip(due, claims):
+        if reservada is None:
+            logger.debug(
+                "Recordatorio ya reservado o cita no pendiente; se omite | cita_id=%s mark=%sh",
+                str(cita.id), cita.next_action_mark
+            )
+            continue
+        claimed.append((reservada, cita.next_action_mark))
+
+    por_tenant: Dict[str, List[Cita]] = {}
+    for cita, _ in claimed:
+        por_tenant.setdefault(str(cita.tenant_id), []).append(cita)
+
+    tenant_ids = list(por_tenant)
+    contextos = dict(zip(tenant_ids, await asyncio.gather(
+        *(load_cita_mail_context(por_tenant[tid], tid) for tid in tenant_ids)
+    )))
+
+    # Todos los correos del tick van al outbox en un solo insert; el worker los envía
+    mails: List[OutboxEmail] = []
+    enviados_por_marca: Dict[int, List[PydanticObjectId]] = {}
+    sin_datos_por_marca: Dict[int, List[PydanticObjectId]] = {}
+    fallidos: List[Tuple[Cita, int]] = []
+    for cita, mark in claimed:
+        ctx = contextos[str(cita.tenant_id)]
+        # Con correos desactivados la marca se da por cumplida, como antes
+        cita_mails = build_cita_mails('recordatorio', cita, ctx, dedupe_prefix=f'recordatorio:{cita.id}:{mark}') if ctx else []
+        if ctx is not None and not cita_mails:
+            # Cita sin paciente/especialista para armar el correo: reintentar no lo arregla
+            logger.warning(
+                "Recordatorio sin datos para el correo; se marca fallido | cita_id=%s mark=%sh",
+                str(cita.id), mark
+            )
+            sin_datos_por_marca.setdefault(mark, []).append(cita.id)
+            continue
+        mails.extend(cita_mails)
+        enviados_por_marca.setdefault(mark, []).append(cita.id)
 
-async def _send_reminder(cita: Cita, mark_hour: int):
     try:
-        await send_cita_email('recordatorio', cita)
-        # idempotencia
-        if mark_hour not in (cita.reminders_sent_marks or []):
-            cita.reminders_sent_marks.append(mark_hour)
-        cita.last_reminder_sent_at = now_utc()
-        await cita.save()
-        logger.info(
-            "Recordatorio enviado | cita_id=%s paciente_id=%s mark=%sh fecha_inicio=%s",
-            str(cita.id), str(cita.paciente_id), mark_hour, cita.fecha_inicio.isoformat()
-        )
+        await encolar_correos(mails)
     except Exception:
-        logger.exception(
-            "Error enviando recordatorio | cita_id=%s mark=%sh",
-            str(cita.id), mark_hour
-        )
+        logger.exception("Error encolando recordatorios | correos=%d", len(mails))
+        por_encolar = {cid for ids in enviados_por_marca.values() for cid in ids}
+        fallidos = [(cita, mark) for cita, mark in claimed if cita.id in por_encolar]
+        enviados_por_marca = {}
 
-async def _auto_cancel(cita: Cita):
-    # Flag de oficina
-    enabled = await is_auto_cancel_enabled(str(cita.tenant_id))
-    if not enabled:
-        logger.debug(
-            "Autocancel deshabilitada para tenant | tenant_id=%s cita_id=%s",
-            str(cita.tenant_id), str(cita.id)
-        )
-        return
+    encolados = {cid for ids in enviados_por_marca.values() for cid in ids}
+    for cita, mark in claimed:
+        if cita.id in encolados:
+            logger.info(
+                "Recordatorio encolado | cita_id=%s paciente_id=%s mark=%sh fecha_inicio=%s",
+                str(cita.id), str(cita.paciente_id), mark, cita.fecha_inicio.isoformat()
+            )
+    for cita, mark in fallidos:
+        logger.warning("Recordatorio fallido; se reintentará | cita_id=%s mark=%sh", str(cita.id), mark)
 
-    estado_cancelada = await get_estado_cita_by_id(
-        ESTADOS_CITA.cancelada.value, str(cita.tenant_id)
+    await asyncio.gather(
+        *(complete_cita_reminders(ids, mark, fencing_token) for mark, ids in enviados_por_marca.items()),
+        *(fail_cita_reminders(ids, mark, fencing_token) for mark, ids in sin_datos_por_marca.items()),
+        *(release_cita_reminder(cita, mark, fencing_token) for cita, mark in fallidos),
     )
-    if not estado_cancelada:
+
+    return sum(len(ids) for ids in enviados_por_marca.values())
+
+async def _release_stale_claims(now: datetime, fencing_token: Optional[int] = None) -> int:
+    """
+    Libera las marcas que quedaron reservadas más de REMINDERS_CLAIM_TIMEOUT_SECONDS (el
+    proceso cayó entre la reserva y completar/liberar) para que vuelvan a programarse.
+    El dedupe_key del outbox evita duplicar el correo si ya se había encolado.
+    """
+    stale = await get_stale_reminder_claims(now - timedelta(seconds=CLAIM_TIMEOUT_SECONDS), CATCHUP_BATCH)
+    for cita in stale:
         logger.warning(
-            "No se encontró estado 'cancelada' para tenant | tenant_id=%s cita_id=%s",
-            str(cita.tenant_id), str(cita.id)
+            "Reserva de recordatorio vencida; se libera | cita_id=%s mark=%sh claimed_at=%s",
+            str(cita.id), cita.reminder_claimed_mark, cita.reminder_claimed_at.isoformat()
         )
-        return
+    await asyncio.gather(*(
+        release_cita_reminder(cita, cita.reminder_claimed_mark, fencing_token) for cita in stale
+    ))
+    _metrics["stale_claims_released"] += len(stale)
+    return len(stale)
 
-    try:
-        pre_estado = cita.estado_id
-        cita.estado_id = estado_cancelada.estado_id
-        cita.auto_canceled_at = now_utc()
+async def _auto_cancel_citas(due: List[Cita], fencing_token: Optional[int] = None) -> int:
+    """
+    Autocancelación en lote: por tenant se lee una vez el flag y el admin y se cancela
+    con un update_many que exige que la cita siga pendiente. Correos y eventos WS se
+    entregan en segundo plano. Devuelve cuántas citas se cancelaron.
+    """
+    por_tenant: Dict[str, List[Cita]] = {}
+    for cita in due:
+        por_tenant.setdefault(str(cita.tenant_id), []).append(cita)
 
-        admin = await get_admin_user(str(cita.tenant_id))
-        if admin:
-            cita.canceledBy = admin.id
+    canceladas = 0
+    for tenant_id, citas in por_tenant.items():
+        ids = [c.id for c in citas]
+        try:
+            if not await is_auto_cancel_enabled(tenant_id):
+                logger.debug("Autocancel deshabilitada para tenant | tenant_id=%s citas=%d", tenant_id, len(ids))
+                # La autocancelación es la última acción programada de la cita
+                await clear_citas_next_action(ids, fencing_token)
+                continue
 
-        await cita.save()
-        await send_cita_email('cancelacion', cita)
-        logger.info(
-            "Cita autocancelada | cita_id=%s from_estado=%s to_estado=%s fecha_inicio=%s",
-            str(cita.id), pre_estado, cita.estado_id, cita.fecha_inicio.isoformat()
-        )
+            admin = await get_admin_user(tenant_id)
+            afectadas = await auto_cancelar_citas(ids, tenant_id, admin.id if admin else None, fencing_token)
+        except Exception:
+            logger.exception("Error durante autocancelación | tenant_id=%s citas=%d", tenant_id, len(ids))
+            continue
+
+        for cita in afectadas:
+            logger.info(
+                "Cita autocancelada | cita_id=%s from_estado=%s to_estado=%s fecha_inicio=%s",
+                str(cita.id), ESTADOS_CITA.pendiente.value, cita.estado_id, cita.fecha_inicio.isoformat()
+            )
+        canceladas += len(afectadas)
+
+        if afectadas:
+            _run_in_background(_notify_auto_canceled(afectadas, tenant_id))
+
+    return canceladas
+
+async def _notify_auto_canceled(citas: List[Cita], tenant_id: str) -> None:
+    try:
+        citas_out = await citas_to_out_many(citas)
+        for cita, cita_out in zip(citas, citas_out):
+            await notificar_evento_cita(
+                tenant_id=tenant_id,
+                action='canceled',
+                payload=cita_out.model_dump(),
+                especialista_id=str(cita.especialista_id)
+            )
+        await send_cancelacion_emails(citas, tenant_id, enviar_horarios=False)
     except Exception:
-        logger.exception("Error durante autocancelación | cita_id=%s", str(cita.id))
+        logger.exception("Error notificando autocancelaciones | tenant_id=%s citas=%d", tenant_id, len(citas))
 
-async def _process_reminder_mark(mark_hour: int):
-    # Ventana objetivo (citas cuyo inicio ≈ now + mark_hour)
-    now = now_utc()
-    target = now + timedelta(seconds=HOUR_SECONDS * mark_hour)
-    start, end = window(target, TOLERANCE_SECONDS)
-    logger.debug(
-        "Procesando marca | mark=%sh window=[%s .. %s]",
-        mark_hour, start.isoformat(), end.isoformat()
-    )
+# Referencias fuertes a las tareas en segundo plano (asyncio solo guarda referencias débiles)
+_background_tasks: Set[asyncio.Task] = set()
+
+def _run_in_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-    pendientes = await Cita.find(And(
-        Cita.estado_id == ESTADOS_CITA.pendiente.value,
-        GTE(Cita.fecha_inicio, start),
-        LTE(Cita.fecha_inicio, end),
-    )).to_list()
+async def _catch_up_citas(citas: List[Cita], now: datetime, fencing_token: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Resuelve acciones cuya ventana ya pasó: por cita, solo la más reciente que sigue
+    teniendo sentido (autocancelar si ya venció, o la última marca no enviada); el resto
+    se reprograma a su próxima acción futura. Devuelve (recordatorios, autocanceladas).
+    """
+    reminders: List[Cita] = []
+    auto_cancels: List[Cita] = []
+    for cita in citas:
+        kind, mark = latest_due_action(cita.fecha_inicio, cita.estado_id, cita.reminders_sent_marks, now)
+        if kind == ACTION_AUTO_CANCEL:
+            auto_cancels.append(cita)
+        elif kind == ACTION_RECORDATORIO:
+            cita.next_action_mark = mark
+            reminders.append(cita)
+        else:
+            await reschedule_cita_next_action(cita, now, fencing_token)
 
-    logger.debug("Citas pendientes encontradas | mark=%sh count=%d", mark_hour, len(pendientes))
+    sent = await _send_reminders(reminders, fencing_token)
+    canceled = await _auto_cancel_citas(auto_cancels, fencing_token) if auto_cancels else 0
+    return sent, canceled
+
+async def _find_batch(
+    desde: Optional[datetime],
+    hasta: datetime,
+    cursor: Optional[Tuple[datetime, PydanticObjectId]],
+) -> List[Cita]:
+    """
+    Un lote de REMINDERS_CATCHUP_BATCH citas con next_action_at en [desde, hasta), en
+    orden (next_action_at, _id) a partir de `cursor` (keyset sobre idx_next_action_at_id).
+    """
+    rango: Dict[str, Any] = {"$lt": hasta}
+    if desde is not None:
+        rango["$gte"] = desde
+    filtro: Dict[str, Any] = {"next_action_at": rango}
+    if cursor is not None:
+        filtro = {"$and": [filtro, {"$or": [
+            {"next_action_at": {"$gt": cursor[0]}},
+            {"next_action_at": cursor[0], "_id": {"$gt": cursor[1]}},
+        ]}]}
+
+    return await Cita.find(filtro).sort(
+        [("next_action_at", ASCENDING), ("_id", ASCENDING)]
+    ).limit(CATCHUP_BATCH).to_list()
+
+async def _catch_up(
+    desde: Optional[datetime],
+    hasta: datetime,
+    now: datetime,
+    lease: Optional[MongoLease] = None,
+) -> Tuple[int, int]:
+    """
+    Recorre en lotes las acciones en [desde, hasta) que quedaron sin procesar por una
+    caída o un deploy. `desde` es el último watermark; sin watermark se recorre todo.
+    """
     sent = 0
-    skipped = 0
+    canceled = 0
+    # Se fija el token al empezar: si el lease se pierde, el lease lo pone en None
+    fencing_token = lease.fencing_token if lease is not None else None
+    cursor: Optional[Tuple[datetime, PydanticObjectId]] = None
+    while lease is None or lease.is_held():
+        lote = await _find_batch(desde, hasta, cursor)
+        if not lote:
+            break
 
-    for cita in pendientes:
-        if mark_hour in (cita.reminders_sent_marks or []):
-            skipped += 1
-            logger.debug(
-                "Recordatorio ya enviado previamente; se omite | cita_id=%s mark=%sh",
-                str(cita.id), mark_hour
-            )
-            continue
-        await _send_reminder(cita, mark_hour)
-        sent += 1
+        cursor = (lote[-1].next_action_at, lote[-1].id)
+        lote_sent, lote_canceled = await _catch_up_citas(lote, now, fencing_token)
+        sent += lote_sent
+        canceled += lote_canceled
+        logger.info("Recuperación | lote=%d recordatorios=%d autocanceladas=%d", len(lote), lote_sent, lote_canceled)
+
+        if len(lote) < CATCHUP_BATCH:
+            break
+
+    return sent, canceled
+
+# Posición del barrido de acciones atrasadas; rota entre ticks para que un lote de
+# citas que fallan siempre no tape a las que vienen detrás
+_stale_cursor: Optional[Tuple[datetime, PydanticObjectId]] = None
 
-    if sent or settings.DEBUG_REMINDERS:
+async def _sweep_stale(hasta: datetime, now: datetime, fencing_token: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Reintenta un lote de acciones anteriores a `hasta` (ya detrás del watermark) que un
+    tick previo no resolvió: autocancelación que lanzó error, marca liberada, reprogramación
+    fallida. Toda cita con next_action_at pasado está pendiente de resolver.
+    """
+    global _stale_cursor
+    lote = await _find_batch(None, hasta, _stale_cursor)
+    if not lote and _stale_cursor is not None:
+        _stale_cursor = None
+        lote = await _find_batch(None, hasta, None)
+    if not lote:
+        return 0, 0
+
+    _stale_cursor = (lote[-1].next_action_at, lote[-1].id) if len(lote) == CATCHUP_BATCH else None
+    sent, canceled = await _catch_up_citas(lote, now, fencing_token)
+    logger.warning(
+        "Reintento de acciones atrasadas | lote=%d recordatorios=%d autocanceladas=%d",
+        len(lote), sent, canceled
+    )
+    return sent, canceled
+
+async def _process_due_actions(lease: Optional[MongoLease] = None) -> datetime:
+    """
+    Un tick del scheduler: una sola consulta por idx_next_action_at_id trae las acciones
+    cuya ventana [at - tolerancia, at + tolerancia] contiene a now. Si desde el último
+    watermark pasó más que la tolerancia, antes se recupera el hueco en lotes, y cada
+    tick reintenta un lote de acciones anteriores al watermark que quedaron sin resolver.
+    Devuelve el horizonte procesado. Con `lease`, el tick se corta en cuanto este
+    worker deja de ser el dueño, y su fencing token acompaña cada escritura sobre citas.
+    """
+    now = now_utc()
+    horizon = now + timedelta(seconds=TOLERANCE_SECONDS)
+    limite = now - timedelta(seconds=TOLERANCE_SECONDS)
+
+    watermark = lease.watermark if lease is not None else None
+    fencing_token = lease.fencing_token if lease is not None else None
+    if watermark is None or watermark < limite:
         logger.info(
-            "Resumen marca | mark=%sh enviados=%d omitidos=%d",
-            mark_hour, sent, skipped
+            "Recuperando acciones perdidas | watermark=%s hasta=%s",
+            watermark.isoformat() if watermark else None, limite.isoformat()
         )
+        sent, canceled = await _catch_up(watermark, limite, now, lease)
+        _metrics["last_catch_up_at"] = now
+        _metrics["last_catch_up_actions"] = sent + canceled
 
-async def _process_auto_cancel_6h():
-    now = now_utc()
-    target = now + timedelta(seconds=HOUR_SECONDS * 6)
-    start, end = window(target, TOLERANCE_SECONDS)
-    logger.debug(
-        "Procesando autocancel (6h) | window=[%s .. %s]",
-        start.isoformat(), end.isoformat()
-    )
+    if lease is None or lease.is_held():
+        await _release_stale_claims(now, fencing_token)
+
+    # Lo anterior al watermark ya pasó por un tick; si sigue ahí, ese tick falló
+    if watermark is not None and (lease is None or lease.is_held()):
+        await _sweep_stale(min(watermark, limite), now, fencing_token)
 
-    pendientes = await Cita.find(And(
-        Cita.estado_id == ESTADOS_CITA.pendiente.value,
-        GTE(Cita.fecha_inicio, start),
-        LTE(Cita.fecha_inicio, end),
-    )).to_list()
+    due = await Cita.find({"next_action_at": {"$gte": limite, "$lte": horizon}}).sort(
+        [("next_action_at", ASCENDING)]
+    ).to_list()
+    logger.debug("Acciones vencidas | horizon=%s count=%d", horizon.isoformat(), len(due))
 
-    logger.debug("Citas pendientes en ventana 6h | count=%d", len(pendientes))
-    for cita in pendientes:
-        await _auto_cancel(cita)
+    # Lag: cuánto lleva esperando la acción vencida más antigua
+    _metrics["lag_seconds"] = max((now - _as_aware_utc(due[0].next_action_at)).total_seconds(), 0) if due else 0.0
+    _metrics["last_tick_actions"] = len(due)
+
+    reminders = [c for c in due if c.next_action_kind == ACTION_RECORDATORIO]
+    auto_cancels = [c for c in due if c.next_action_kind == ACTION_AUTO_CANCEL]
+
+    sent = 0
+    canceled = 0
+    if lease is None or lease.is_held():
+        sent = await _send_reminders(reminders, fencing_token)
+    else:
+        logger.warning("Lease perdido a mitad de tick; se detiene el procesamiento")
+
+    if auto_cancels and (lease is None or lease.is_held()):
+        canceled = await _auto_cancel_citas(auto_cancels, fencing_token)
+
+    if sent or canceled or settings.DEBUG_REMINDERS:
+        logger.info("Resumen tick | recordatorios=%d autocanceladas=%d", sent, canceled)
+
+    if lease is not None and lease.is_held():
+        await lease.save_watermark(horizon)
+
+    return horizon
+
+async def _seconds_until_next_action(horizon: datetime) -> float:
+    """
+    Segundos hasta que la próxima acción posterior a `horizon` entre en ventana, con
+    SLEEP_SECONDS como máximo. Las ya vencidas que fallaron se reintentan en ese máximo.
+    """
+    proxima = await Cita.find({"next_action_at": {"$gt": horizon}}).sort(
+        [("next_action_at", ASCENDING)]
+    ).first_or_none()
+    if proxima is None:
+        return SLEEP_SECONDS
+
+    delta = (_as_aware_utc(proxima.next_action_at) - now_utc()).total_seconds() - TOLERANCE_SECONDS
+    return min(SLEEP_SECONDS, max(delta, 0))
 
 async def process_windows_once():
     # Útil para endpoint /_debug/reminders/run-once
-    for h in REMINDER_MARKS_HOURS:
-        await _process_reminder_mark(h)
-    await _process_auto_cancel_6h()
+    await _process_due_actions()
     logger.info("Ejecución manual única completada (process_windows_once)")
 
 async def reminder_scheduler_loop():
@@ -162,14 +415,58 @@ async def reminder_scheduler_loop():
         settings.DEBUG_REMINDERS, TEST_SPEEDUP, HOUR_SECONDS, SLEEP_SECONDS, TOLERANCE_SECONDS, REMINDER_MARKS_HOURS
     )
 
-    while True:
-        tick += 1
+    # Solo el dueño del lease procesa; el resto queda en espera para tomar el relevo
+    heartbeat = asyncio.create_task(reminder_lease.keep_alive())
+    try:
+        while True:
+            if not reminder_lease.is_held():
+                await reminder_lease.acquired.wait()
+                if not reminder_lease.is_held():
+                    await asyncio.sleep(reminder_lease.renew_interval)
+                continue
+
+            tick += 1
+            sleep_seconds = SLEEP_SECONDS
+            started = now_utc()
+            try:
+                logger.debug("Tick #%d start | now=%s token=%s", tick, started.isoformat(), reminder_lease.fencing_token)
+                schedule_changed.clear()
+                horizon = await _process_due_actions(reminder_lease)
+                sleep_seconds = await _seconds_until_next_action(horizon)
+                logger.debug("Tick #%d end | sleep=%.1fs", tick, sleep_seconds)
+            except Exception:
+                logger.exception("Error no controlado en el scheduler (tick=%d)", tick)
+
+            _metrics["ticks"] = tick
+            _metrics["last_tick_at"] = started
+            _metrics["last_tick_duration_ms"] = (now_utc() - started).total_seconds() * 1000
+
+            # Duerme hasta la próxima acción; una cita nueva en este proceso despierta antes
+            try:
+                await asyncio.wait_for(schedule_changed.wait(), timeout=sleep_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        heartbeat.cancel()
         try:
-            logger.debug("Tick #%d start | now=%s", tick, now_utc().isoformat())
-            for h in REMINDER_MARKS_HOURS:
-                await _process_reminder_mark(h)
-            await _process_auto_cancel_6h()
-            logger.debug("Tick #%d end", tick)
-        except Exception:
-            logger.exception("Error no controlado en el scheduler (tick=%d)", tick)
-        await asyncio.sleep(SLEEP_SECONDS)
+            await heartbeat
+        except asyncio.CancelledError:
+            pass
+        await reminder_lease.release()
+
+def get_scheduler_metrics() -> SchedulerMetricsOut:
+    return SchedulerMetricsOut(
+        owner=reminder_lease.owner,
+        is_leader=reminder_lease.is_held(),
+        fencing_token=reminder_lease.fencing_token,
+        leader_since=reminder_lease.acquired_at,
+        ticks=_metrics["ticks"],
+        last_tick_at=_metrics["last_tick_at"],
+        last_tick_duration_ms=_metrics["last_tick_duration_ms"],
+        last_tick_actions=_metrics["last_tick_actions"],
+        lag_seconds=_metrics["lag_seconds"],
+        watermark=reminder_lease.watermark,
+        last_catch_up_at=_metrics["last_catch_up_at"],
+        last_catch_up_actions=_metrics["last_catch_up_actions"],
+        stale_claims_released=_metrics["stale_claims_released"],
+    )
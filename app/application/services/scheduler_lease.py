@@ -0,0 +1,105 @@
+# app/application/services/scheduler_lease.py
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.infrastructure.repositories.schedulerLease_repo import release_lease, renew_lease, save_lease_watermark, try_acquire_lease
+
+logger = logging.getLogger("app.scheduler_lease")
+
+
+class MongoLease:
+    """
+    Elección de líder con un documento por lease en Mongo. El dueño lo renueva cada
+    ttl/3; si deja de hacerlo, otro worker lo toma al vencer, es decir, en menos de un
+    periodo de lease. Cada toma incrementa `fencing_token`, y el dueño deja de actuar
+    en cuanto no puede renovar o su vencimiento local está por llegar.
+    """
+
+    def __init__(self, name: str, ttl_seconds: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.fencing_token: Optional[int] = None
+        self._expires_at: Optional[datetime] = None
+        self.acquired = asyncio.Event()
+        self.acquired_at: Optional[datetime] = None
+        self.watermark: Optional[datetime] = None
+
+    @property
+    def renew_interval(self) -> float:
+        return max(self.ttl_seconds / 3, 1)
+
+    def is_held(self) -> bool:
+        # Margen de un intervalo de renovación para no actuar con un lease a punto de vencer
+        if self._expires_at is None:
+            return False
+        margen = timedelta(seconds=self.renew_interval)
+        return datetime.now(timezone.utc) < self._expires_at - margen
+
+    def _set_held(self, fencing_token: int, expires_at: datetime) -> None:
+        if not self.acquired.is_set():
+            self.acquired_at = datetime.now(timezone.utc)
+            logger.info("Lease tomado | name=%s owner=%s token=%d", self.name, self.owner, fencing_token)
+        self.fencing_token = fencing_token
+        self._expires_at = expires_at.replace(tzinfo=timezone.utc) if expires_at.tzinfo is None else expires_at
+        self.acquired.set()
+
+    def _set_lost(self) -> None:
+        if self.acquired.is_set():
+            logger.warning("Lease perdido | name=%s owner=%s token=%s", self.name, self.owner, self.fencing_token)
+        self.fencing_token = None
+        self._expires_at = None
+        self.acquired_at = None
+        self.acquired.clear()
+
+    async def heartbeat_once(self) -> bool:
+        """Renueva si lo tenemos, si no intenta tomarlo. Devuelve si quedamos como dueño."""
+        try:
+            if self.acquired.is_set():
+                lease = await renew_lease(self.name, self.owner, self.fencing_token, self.ttl_seconds)
+            else:
+                lease = await try_acquire_lease(self.name, self.owner, self.ttl_seconds)
+        except Exception:
+            logger.exception("Error en heartbeat del lease | name=%s", self.name)
+            lease = None
+            if self.is_held():
+                # Fallo transitorio: seguimos mientras el vencimiento local lo permita
+                return True
+
+        if lease is None:
+            self._set_lost()
+            return False
+
+        self._set_held(lease.fencing_token, lease.expires_at)
+        if lease.watermark is not None:
+            wm = lease.watermark.replace(tzinfo=timezone.utc) if lease.watermark.tzinfo is None else lease.watermark
+            self.watermark = max(self.watermark, wm) if self.watermark else wm
+        return True
+
+    async def keep_alive(self) -> None:
+        while True:
+            await self.heartbeat_once()
+            await asyncio.sleep(self.renew_interval)
+
+    async def save_watermark(self, watermark: datetime) -> None:
+        if self.fencing_token is None:
+            return
+        if await save_lease_watermark(self.name, self.owner, self.fencing_token, watermark):
+            self.watermark = max(self.watermark, watermark) if self.watermark else watermark
+
+    async def release(self) -> None:
+        if self.fencing_token is None:
+            return
+        try:
+            await release_lease(self.name, self.owner, self.fencing_token)
+        finally:
+            self._set_lost()
+
+
+reminder_lease = MongoLease('reminders', settings.REMINDERS_LEASE_SECONDS)
@@ -0,0 +1,72 @@
+# app/application/services/tenant_service.py
+import logging
+from typing import Dict, Optional
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.exceptions import raise_internal_error
+from app.infrastructure.schemas.office import Office
+
+logger = logging.getLogger("app.tenants")
+
+
+class TenantResolver:
+    """
+    Mantiene en memoria los documentos Office y resuelve el tenant de cada request:
+    primero el claim tenant_id del JWT y, si no hay o no corresponde a una oficina
+    conocida, la oficina configurada por defecto.
+    """
+
+    def __init__(self, default_office_name: str):
+        self.default_office_name = default_office_name
+        self._offices: Dict[str, Office] = {}
+        self._default_id: Optional[str] = None
+
+    def _remember(self, office: Office) -> None:
+        self._offices[str(office.id)] = office
+        if office.name == self.default_office_name:
+            self._default_id = str(office.id)
+
+    async def warm(self) -> None:
+        offices = await Office.find_all().to_list()
+        self._offices.clear()
+        self._default_id = None
+        for office in offices:
+            self._remember(office)
+        logger.info("Tenants cargados en memoria | count=%d default=%s", len(self._offices), self._default_id)
+
+    async def get_default_office(self) -> Optional[Office]:
+        if self._default_id is None:
+            office = await Office.find_one(Office.name == self.default_office_name)
+            if office:
+                self._remember(office)
+        return self._offices.get(self._default_id) if self._default_id else None
+
+    async def get_office(self, tenant_id: str) -> Optional[Office]:
+        office = self._offices.get(str(tenant_id))
+        if office is not None:
+            return office
+
+        try:
+            office = await Office.get(PydanticObjectId(tenant_id))
+        except Exception:
+            return None
+        if office:
+            self._remember(office)
+        return office
+
+    async def resolve(self, claim_tenant_id: Optional[str] = None) -> str:
+        if claim_tenant_id:
+            office = await self.get_office(claim_tenant_id)
+            if office:
+                return str(office.id)
+
+        default = await self.get_default_office()
+        if default is None:
+            logger.error("No existe la oficina por defecto | name=%s", self.default_office_name)
+            raise raise_internal_error('No hay un consultorio por defecto configurado.')
+        return str(default.id)
+
+
+tenant_resolver = TenantResolver(default_office_name=settings.DEFAULT_OFFICE_NAME)
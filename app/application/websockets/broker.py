@@ -0,0 +1,230 @@
+# app/application/websockets/broker.py
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from pymongo import CursorType, ReturnDocument
+from pymongo.errors import CollectionInvalid
+
+from app.application.websockets.replay import stream_of
+from app.core.config import settings
+
+logger = logging.getLogger("app.ws_broker")
+
+# Entrega local: (salas, mensaje) -> encola en los sockets de este worker sin esperar la red
+Deliver = Callable[[List[str], dict], object]
+
+
+class EventBroker(ABC):
+    """
+    Publica eventos de salas WS. Cada worker se suscribe con `start(deliver)` y solo
+    entrega a sus propios sockets; el backend decide cómo llega el evento a los demás
+    (`_forward`) y de dónde sale la secuencia (`seq`) del tenant con la que se sella
+    cada evento (`next_seq`).
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    @abstractmethod
+    async def next_seq(self, stream: str) -> int:
+        """Siguiente `seq` del tenant; creciente para todos los workers que lo publican."""
+
+    @abstractmethod
+    async def _forward(self, rooms: List[str], message: dict) -> None:
+        """Hace llegar el evento (ya entregado localmente) a los demás workers."""
+
+    async def publish(self, rooms: List[str], message: dict) -> None:
+        message = {**message, "seq": await self.next_seq(stream_of(rooms[0]))}
+        if self._deliver is not None:
+            self._deliver(rooms, message)
+        await self._forward(rooms, message)
+
+
+class InMemoryBroker(EventBroker):
+    """
+    Un solo worker: el evento se entrega directo a los sockets locales. La secuencia
+    arranca en la hora actual en ms, así tras un reinicio sigue siendo mayor que la que
+    tenían los clientes (con menos de 1000 eventos/s por tenant) y estos reciben `resync`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._seqs: Dict[str, int] = {}
+
+    async def next_seq(self, stream: str) -> int:
+        seq = self._seqs.get(stream) or int(time.time() * 1000)
+        self._seqs[stream] = seq + 1
+        return seq
+
+    async def _forward(self, rooms: List[str], message: dict) -> None:
+        # No hay otros workers
+        return None
+
+
+# Contador global (en la colección de secuencias) que ordena los eventos del broker
+POS_COUNTER = '__pos__'
+# Publicaciones concurrentes de varios workers pueden insertarse en un orden distinto al
+# de su `pos`: al retomar el cursor se relee este margen hacia atrás y se descarta lo visto
+RESUME_MARGIN = 256
+
+
+class MongoCappedBroker(EventBroker):
+    """
+    Varios workers: cada publicación se inserta en una colección capped y cada worker
+    la sigue con un cursor tailable. El worker que publica entrega a sus sockets sin
+    esperar al cursor y descarta su propio evento al leerlo. Cada evento lleva un `pos`
+    asignado por un contador en Mongo; si el cursor muere se retoma por `pos` (los
+    ObjectId se generan en cada cliente y no ordenan entre procesos).
+    """
+
+    def __init__(self, database, collection_name: str, size_bytes: int, max_docs: int, warm_events: int):
+        super().__init__()
+        self.database = database
+        self.collection_name = collection_name
+        self.size_bytes = size_bytes
+        self.max_docs = max_docs
+        self.warm_events = warm_events
+        self.origin = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._task: Optional[asyncio.Task] = None
+        self._last_pos = 0
+        self._seen: Set[int] = set()
+        self._seen_order: Deque[int] = deque()
+
+    @property
+    def collection(self):
+        return self.database[self.collection_name]
+
+    async def _ensure_collection(self) -> None:
+        try:
+            await self.database.create_collection(
+                self.collection_name, capped=True, size=self.size_bytes, max=self.max_docs
+            )
+            # Un cursor tailable sobre una colección vacía muere al instante
+            await self.collection.insert_one({"pos": 0, "rooms": [], "message": None, "origin": None})
+        except CollectionInvalid:
+            pass
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        await self._ensure_collection()
+        await self._warm()
+        self._task = asyncio.create_task(self._tail())
+        logger.info("Broker WS en Mongo iniciado | collection=%s origin=%s", self.collection_name, self.origin)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await super().stop()
+
+    @property
+    def sequences(self):
+        return self.database[f'{self.collection_name}_seq']
+
+    async def next_seq(self, stream: str) -> int:
+        doc = await self.sequences.find_one_and_update(
+            {"_id": stream},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["seq"])
+
+    def _remember(self, pos: int) -> bool:
+        """Registra `pos` como visto; False si ya se había visto (relectura al retomar)."""
+        if pos in self._seen:
+            return False
+        self._seen.add(pos)
+        self._seen_order.append(pos)
+        if len(self._seen_order) > 4 * RESUME_MARGIN:
+            self._seen.discard(self._seen_order.popleft())
+        self._last_pos = max(self._last_pos, pos)
+        return True
+
+    async def _warm(self) -> None:
+        """
+        Rellena el buffer de replay con lo último publicado, para que tras un deploy los
+        clientes puedan retomar con `since` en lugar de recargar todo. Deja `_last_pos`
+        en el evento más nuevo, desde donde sigue el cursor.
+        """
+        docs = await self.collection.find(
+            {"pos": {"$exists": True}}, sort=[("$natural", -1)], limit=self.warm_events
+        ).to_list(length=self.warm_events)
+        for doc in reversed(docs):
+            self._remember(doc["pos"])
+            if doc.get("message"):
+                self._deliver(doc["rooms"], doc["message"])
+
+    async def _forward(self, rooms: List[str], message: dict) -> None:
+        try:
+            await self.collection.insert_one({
+                "pos": await self.next_seq(POS_COUNTER),
+                "rooms": rooms,
+                # Normalizado a JSON como lo recibirá el socket (fechas, Decimal, etc.)
+                "message": json.loads(json.dumps(message, default=str)),
+                "origin": self.origin,
+                "createdAt": datetime.now(timezone.utc),
+            })
+        except Exception:
+            # Los sockets locales ya recibieron el evento; solo se pierde en los demás workers
+            logger.exception("No se pudo publicar el evento en %s", self.collection_name)
+
+    async def _tail(self) -> None:
+        # Sigue después de lo ya visto (por _warm o por un cursor anterior), con margen
+        while True:
+            filtro = {"pos": {"$gte": max(self._last_pos - RESUME_MARGIN, 0)}}
+            cursor = self.collection.find(filtro, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                while cursor.alive:
+                    async for doc in cursor:
+                        if not self._remember(doc["pos"]):
+                            continue
+                        if doc.get("origin") == self.origin or not doc.get("message"):
+                            continue
+                        try:
+                            self._deliver(doc["rooms"], doc["message"])
+                        except Exception:
+                            logger.exception("Error entregando evento del broker")
+                    await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cursor del broker interrumpido; reintentando")
+            finally:
+                await cursor.close()
+            await asyncio.sleep(1)
+
+
+def build_broker(kind: str) -> EventBroker:
+    if kind == 'mongo':
+        from app.core.db import database
+        return MongoCappedBroker(
+            database,
+            collection_name='ws_events',
+            size_bytes=settings.WS_EVENTS_CAPPED_BYTES,
+            max_docs=settings.WS_EVENTS_CAPPED_MAX,
+            warm_events=settings.WS_REPLAY_BUFFER_SIZE * 4,
+        )
+    return InMemoryBroker()
+
+
+ws_broker = build_broker(settings.WS_BROKER)
@@ -1,31 +1,305 @@
 # app/application/websockets/manager.py
-from typing import Dict, Set
+from typing import Deque, Dict, FrozenSet, List, Optional, Set, Tuple
 from fastapi import WebSocket
-from collections import defaultdict
+from collections import defaultdict, deque
+import asyncio
 import json
+import logging
+import time
+
+from app.application.websockets.replay import ReplayBuffer, stream_of
+from app.core.config import settings
+
+log = logging.getLogger("ws")
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# 1013 "Try Again Later": el cliente reconecta y se resincroniza
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Sin mensajes del cliente dentro de idle_timeout
+IDLE_CLOSE_CODE = 4408
+CLOSE_TIMEOUT_SECONDS = 5
+
+PING_FRAME = json.dumps({"entity": "sync", "action": "ping"})
+
+
+def compact_event(message: dict) -> dict:
+    """Delta de un evento: id, acción, seq y solo los campos que cambió (todo si es nuevo)."""
+    data = message.get("data") or {}
+    changed = message.get("changed")
+    return {
+        "entity": message.get("entity"),
+        "id": message.get("id", data.get("id")),
+        "action": message.get("action"),
+        "seq": message.get("seq"),
+        "data": data if changed is None else {campo: data.get(campo) for campo in changed},
+    }
+
+def batch_frame(messages: List[dict]) -> str:
+    events = [compact_event(m) for m in messages]
+    seqs = [e["seq"] for e in events if e["seq"] is not None]
+    return json.dumps({"entity": "batch", "seq": max(seqs) if seqs else None, "events": events}, default=str)
+
+def coalesced_frame(messages: List[dict]) -> str:
+    # Un evento solo en la ventana sale como siempre (mensaje completo); el batch con
+    # deltas es solo para ráfagas, así los clientes que no lo conocen no se rompen
+    if len(messages) == 1:
+        return json.dumps(messages[0], default=str)
+    return batch_frame(messages)
+
+
+class WSConnection:
+    """
+    Socket con cola de salida acotada y su propia tarea escritora. Encolar nunca
+    espera a la red; si la cola se llena se descarta el mensaje más viejo o se cierra
+    la conexión, según `policy`.
+    """
+
+    def __init__(self, websocket: WebSocket, manager: "WSManager", max_queue: int, policy: str):
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max_queue
+        self.policy = policy
+        self.rooms: Set[str] = set()
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+        self._task: Optional[asyncio.Task] = asyncio.create_task(self._writer())
+
+    def enqueue(self, text: str) -> None:
+        if self._overflowed:
+            return
+        if len(self._queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                self._overflowed = True
+                self._ready.set()
+                return
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(text)
+        self._ready.set()
+
+    async def _writer(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                if self._overflowed:
+                    log.warning("WS cola llena, cerrando conexión lenta | rooms=%s", sorted(self.rooms))
+                    await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                    break
+                while self._queue:
+                    await self.websocket.send_text(self._queue.popleft())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        # Socket caído o cerrado por lento: sale de todas sus salas
+        self._task = None
+        self.manager.drop(self.websocket)
+
+    def touch(self) -> None:
+        self.last_seen = time.monotonic()
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._queue.clear()
+
 
 class WSManager:
-    def __init__(self):
+    def __init__(
+        self,
+        max_queue: int = 256,
+        policy: str = DROP_OLDEST,
+        replay_size: int = 500,
+        ping_interval: int = 25,
+        idle_timeout: int = 0,
+        coalesce_ms: int = 100,
+    ):
         self.rooms: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self.connections: Dict[WebSocket, WSConnection] = {}
+        self.max_queue = max_queue
+        self.policy = policy
+        self.replay = ReplayBuffer(replay_size)
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.reaped = 0
+        self.dropped_frames = 0
+        self._closing: Set[asyncio.Task] = set()
+        self.coalesce_seconds = coalesce_ms / 1000
+        # Eventos en la ventana de coalescencia, por tenant
+        self._pending: Dict[str, List[Tuple[List[str], dict]]] = {}
 
     async def connect(self, room: str, websocket: WebSocket):
         # NO websocket.accept() aquí
+        conn = self.connections.get(websocket)
+        if conn is None:
+            conn = WSConnection(websocket, self, self.max_queue, self.policy)
+            self.connections[websocket] = conn
+        conn.rooms.add(room)
         self.rooms[room].add(websocket)
 
     def disconnect(self, room: str, websocket: WebSocket):
-        if websocket in self.rooms.get(room, set()):
-            self.rooms[room].remove(websocket)
-        if not self.rooms[room]:
-            self.rooms.pop(room, None)
-
-    async def broadcast(self, room: str, message: dict):
-        dead = []
-        for ws in list(self.rooms.get(room, set())):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(websocket)
+            if not members:
+                self.rooms.pop(room, None)
+        conn = self.connections.get(websocket)
+        if conn is not None:
+            conn.rooms.discard(room)
+            if not conn.rooms:
+                self.connections.pop(websocket, None)
+                self.dropped_frames += conn.dropped
+                conn.close()
+
+    def drop(self, websocket: WebSocket):
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return
+        for room in list(conn.rooms):
+            self.disconnect(room, websocket)
+
+    def touch(self, websocket: WebSocket):
+        conn = self.connections.get(websocket)
+        if conn is not None:
+            conn.touch()
+
+    async def _close_quietly(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=CLOSE_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    def reap(self, websocket: WebSocket, code: int = IDLE_CLOSE_CODE):
+        """Saca el socket de todas sus salas ya mismo y lo cierra en segundo plano."""
+        self.drop(websocket)
+        self.reaped += 1
+        task = asyncio.create_task(self._close_quietly(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def heartbeat_once(self) -> None:
+        # Un socket medio abierto (teléfono dormido) no responde: se cierra por inactividad
+        # en vez de esperar a que falle un broadcast
+        now = time.monotonic()
+        for ws, conn in list(self.connections.items()):
+            if self.idle_timeout and now - conn.last_seen > self.idle_timeout:
+                log.info("WS reaped por inactividad | rooms=%s idle=%.0fs", sorted(conn.rooms), now - conn.last_seen)
+                self.reap(ws)
+            else:
+                conn.enqueue(PING_FRAME)
+
+    async def heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
             try:
-                await ws.send_text(json.dumps(message, default=str))
+                self.heartbeat_once()
             except Exception:
-                dead.append(ws)
-        for ws in dead:
-            self.disconnect(room, ws)
+                log.exception("Error en heartbeat WS")
+
+    def total_dropped_frames(self) -> int:
+        return self.dropped_frames + sum(conn.dropped for conn in self.connections.values())
+
+    def gauges(self, prefix: str = "") -> Dict[str, int]:
+        """Conexiones por sala (opcionalmente solo las salas que empiezan con `prefix`)."""
+        return {room: len(members) for room, members in self.rooms.items() if room.startswith(prefix)}
+
+    def _send_now(self, rooms: List[str], message: dict) -> None:
+        # Sin coalescencia: el mensaje tal cual, serializado una vez
+        recipients: Set[WebSocket] = set()
+        for room in rooms:
+            recipients.update(self.rooms.get(room, ()))
+        if not recipients:
+            return
+        text = json.dumps(message, default=str)
+        for ws in recipients:
+            conn = self.connections.get(ws)
+            if conn is not None:
+                conn.enqueue(text)
+
+    def deliver(self, rooms: List[str], message: dict) -> None:
+        """
+        Encola el evento en cada socket de las salas (sin repetir sockets que estén en
+        varias); no espera a la red. Con coalescencia, los eventos de un tenant se juntan
+        durante `coalesce_seconds` y cada socket recibe un solo frame: el mensaje tal cual
+        si le tocó uno, o un frame `batch` si le tocaron varios.
+        """
+        if message.get("seq") is not None:
+            # Se guarda aunque no haya sockets aquí: alguien puede reconectar a este worker
+            self.replay.record(rooms, message["seq"], message)
+
+        if self.coalesce_seconds <= 0:
+            self._send_now(rooms, message)
+            return
+
+        stream = stream_of(rooms[0])
+        pending = self._pending.get(stream)
+        if pending is None:
+            pending = self._pending[stream] = []
+            asyncio.get_running_loop().call_later(self.coalesce_seconds, self._flush, stream)
+        pending.append((rooms, message))
+
+    def _flush(self, stream: str) -> None:
+        items = self._pending.pop(stream, [])
+        recipients: Set[WebSocket] = set()
+        for rooms, _ in items:
+            for room in rooms:
+                recipients.update(self.rooms.get(room, ()))
+
+        # Sockets con las mismas salas reciben el mismo frame: se arma una vez por grupo
+        frames: Dict[FrozenSet[str], str] = {}
+        for ws in recipients:
+            conn = self.connections.get(ws)
+            if conn is None:
+                continue
+            key = frozenset(conn.rooms)
+            if key not in frames:
+                frames[key] = coalesced_frame([message for rooms, message in items if key.intersection(rooms)])
+            conn.enqueue(frames[key])
+
+    def broadcast(self, room: str, message: dict) -> None:
+        self.deliver([room], message)
+
+    def resume(self, rooms: List[str], websocket: WebSocket, since: Optional[int]) -> bool:
+        """
+        Llamar justo después de `connect`, sin awaits de por medio, para que ningún
+        evento en vivo se cuele entre lo reenviado. Encola los eventos con seq > since y
+        un frame `sync`; devuelve False si el cliente debe recargar todo (`resync`).
+        """
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return False
+        last = self.replay.last_seq(rooms[0])
+        # Lo que sigue en la ventana de coalescencia ya le llegará en el próximo batch
+        en_ventana = {m.get("seq") for _, m in self._pending.get(stream_of(rooms[0]), ())}
+        messages = [] if since is None else self.replay.replay(rooms, since, skip=en_ventana)
+        if messages is None:
+            frames = None
+        elif self.coalesce_seconds > 0:
+            frames = [coalesced_frame(messages)] if messages else []
+        else:
+            frames = [json.dumps(m, default=str) for m in messages]
+
+        # Un reenvío que no cabe en la cola perdería eventos: mejor recargar
+        if frames is None or len(frames) >= conn.max_queue:
+            conn.enqueue(json.dumps({"entity": "sync", "action": "resync", "seq": last}))
+            return False
+        for text in frames:
+            conn.enqueue(text)
+        conn.enqueue(json.dumps({"entity": "sync", "action": "ready", "seq": last, "replayed": len(messages)}))
+        return True
 
-manager = WSManager()
+manager = WSManager(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    policy=settings.WS_SLOW_CONSUMER_POLICY,
+    replay_size=settings.WS_REPLAY_BUFFER_SIZE,
+    ping_interval=settings.WS_PING_INTERVAL_SECONDS,
+    idle_timeout=settings.WS_IDLE_TIMEOUT_SECONDS,
+    coalesce_ms=settings.WS_COALESCE_MS,
+)
@@ -0,0 +1,61 @@
+# app/application/websockets/replay.py
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+
+def stream_of(room: str) -> str:
+    """Las salas de un tenant ("tenant:{tid}" y "tenant:{tid}:esp:{eid}") comparten secuencia."""
+    return ":".join(room.split(":")[:2])
+
+
+class ReplayBuffer:
+    """
+    Últimos `size` eventos de cada sala como (seq, mensaje). La secuencia es
+    por tenant, así un socket en la sala del tenant y en la del especialista ve una sola
+    serie creciente y puede reconectar con un único `since`.
+
+    `replay` devuelve None cuando no puede garantizar que el cliente no perdió eventos:
+    la sala ya descartó eventos posteriores a `since`, el worker no vio el tramo pedido
+    (arrancó después) o `since` no corresponde a esta serie. Los seq en `skip` se omiten
+    porque el socket ya los va a recibir por otra vía (eventos aún en la ventana de
+    coalescencia).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._events: Dict[str, Deque[Tuple[int, dict]]] = defaultdict(lambda: deque(maxlen=self.size))
+        # Mayor seq que ya no se puede reenviar, por sala
+        self._floor: Dict[str, int] = {}
+        # Seq anterior al primer evento visto del tenant, y el último visto
+        self._stream_floor: Dict[str, int] = {}
+        self._last: Dict[str, int] = {}
+
+    def last_seq(self, room: str) -> Optional[int]:
+        return self._last.get(stream_of(room))
+
+    def record(self, rooms: List[str], seq: int, message: dict) -> None:
+        stream = stream_of(rooms[0])
+        if stream not in self._stream_floor:
+            self._stream_floor[stream] = seq - 1
+        self._last[stream] = max(self._last.get(stream, seq), seq)
+        for room in rooms:
+            events = self._events[room]
+            if len(events) == events.maxlen:
+                self._floor[room] = max(self._floor.get(room, events[0][0]), events[0][0])
+            events.append((seq, message))
+
+    def replay(self, rooms: List[str], since: int, skip: Set[int] = frozenset()) -> Optional[List[dict]]:
+        stream = stream_of(rooms[0])
+        last = self._last.get(stream)
+        if last is None or since > last or since < self._stream_floor[stream]:
+            return None
+        if any(self._floor.get(room, since) > since for room in rooms):
+            return None
+
+        pendientes: Dict[int, dict] = {}
+        for room in rooms:
+            # Con varios workers el orden de llegada puede no coincidir con el de seq
+            for seq, message in self._events.get(room, ()):
+                if seq > since and seq not in skip:
+                    pendientes.setdefault(seq, message)
+        return [pendientes[seq] for seq in sorted(pendientes)]
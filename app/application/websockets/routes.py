@@ -36,7 +36,11 @@ async def _auth_from_ws(websocket: WebSocket):
         return None, None
 
 @ws_router.websocket("/ws/citas")
-async def ws_citas(websocket: WebSocket, especialista_id: str | None = Query(default=None)):
+async def ws_citas(
+    websocket: WebSocket,
+    especialista_id: str | None = Query(default=None),
+    since: int | None = Query(default=None),  # último seq recibido, para reenviar lo perdido
+):
     try:
         user, tenant_id = await _auth_from_ws(websocket)
         if not user:
@@ -47,13 +51,17 @@ async def ws_citas(websocket: WebSocket, especialista_id: str | None = Query(def
 
         room_tenant = f"tenant:{tenant_id}"
         room_especialista = f"tenant:{tenant_id}:esp:{especialista_id}" if especialista_id else None
-        await manager.connect(room_tenant, websocket)
-        if room_especialista:
-            await manager.connect(room_especialista, websocket)
+        rooms = [room_tenant] + ([room_especialista] if room_especialista else [])
+        for room in rooms:
+            await manager.connect(room, websocket)
+        # Sin awaits entre connect y resume: lo reenviado y lo nuevo no se mezclan
+        if not manager.resume(rooms, websocket, since) and since is not None:
+            log.info("WS resync: tenant=%s esp=%s since=%s", tenant_id, especialista_id, since)
 
         while True:
             try:
-                await websocket.receive_text()  # keepalive
+                await websocket.receive_text()  # cualquier mensaje (p. ej. respuesta al ping) cuenta como actividad
+                manager.touch(websocket)
             except WebSocketDisconnect:
                 log.info("WS disconnected: user=%s tenant=%s esp=%s", user["id"], tenant_id, especialista_id)
                 manager.disconnect(room_tenant, websocket)
@@ -1,12 +1,19 @@
-from fastapi import Depends
-from app.core.security import get_current_user
-from app.infrastructure.repositories.office_repo import get_benedetta_office
-from app.infrastructure.schemas.user import User
+from fastapi import Depends, Request
+from app.application.services.tenant_service import tenant_resolver
+from app.core.security import decode_access_token, get_auth_context
+from app.shared.dto.authContext_dto import AuthContext
 
 
-async def get_user_and_tenant(user: User = Depends(get_current_user)):
-    return user, str(user.tenant_id)
+async def get_user_and_tenant(ctx: AuthContext = Depends(get_auth_context)):
+    return ctx.user, ctx.tenant_id
 
-async def get_tenant() -> str:
-    current = await get_benedetta_office()
-    return str(current.id)
+async def get_tenant(request: Request) -> str:
+    claim_tenant_id = None
+    auth = request.headers.get('authorization')
+    if auth and auth.lower().startswith('bearer '):
+        try:
+            claim_tenant_id = decode_access_token(auth.split(' ', 1)[1]).get('tenant_id')
+        except ValueError:
+            claim_tenant_id = None
+
+    return await tenant_resolver.resolve(claim_tenant_id)
\ No newline at end of file
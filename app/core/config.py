@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     SENDGRID_API_KEY: str = Field(env='SENDGRID_API_KEY')
     SENDGRID_FROM_EMAIL: str = Field(env='SENDGRID_FROM_EMAIL')
+    SENDGRID_API_URL: str = Field(default='https://api.sendgrid.com', env='SENDGRID_API_URL')
     S3_ENDPOINT: str = Field(env='S3_ENDPOINT')
     S3_REGION: str = Field(env='S3_REGION')
     S3_BUCKET: str = Field(env='S3_BUCKET')
@@ -20,8 +21,33 @@ class Settings(BaseSettings):
     REMINDERS_TEST_SPEEDUP: str = Field(env='REMINDERS_TEST_SPEEDUP')
     REMINDERS_SLEEP_SECONDS: int = Field(default=60, env="REMINDERS_SLEEP_SECONDS")
     REMINDERS_TOLERANCE_SECONDS: int = Field(default=120, env="REMINDERS_TOLERANCE_SECONDS")
+    MAIL_TEMPLATES_AUTO_RELOAD: bool = Field(default=False, env="MAIL_TEMPLATES_AUTO_RELOAD")
     FRONTEND_APP_URL: str = Field(default="http://localhost:5173", env="FRONTEND_APP_URL")
+    REMINDERS_CATCHUP_BATCH: int = Field(default=500, env="REMINDERS_CATCHUP_BATCH")
+    REMINDERS_LEASE_SECONDS: int = Field(default=30, env="REMINDERS_LEASE_SECONDS")
+    REMINDERS_CLAIM_TIMEOUT_SECONDS: int = Field(default=600, env="REMINDERS_CLAIM_TIMEOUT_SECONDS")
     DEBUG_REMINDERS: bool = Field(default=False, env="DEBUG_REMINDERS")  
+    DEFAULT_OFFICE_NAME: str = Field(default="Benedetta Bellezza", env="DEFAULT_OFFICE_NAME")
+    PERMISSION_CACHE_TTL_SECONDS: int = Field(default=5, env="PERMISSION_CACHE_TTL_SECONDS")
+    EMAIL_SEND_CONCURRENCY: int = Field(default=8, env="EMAIL_SEND_CONCURRENCY")
+    EMAIL_OUTBOX_POLL_SECONDS: int = Field(default=5, env="EMAIL_OUTBOX_POLL_SECONDS")
+    EMAIL_OUTBOX_LOCK_SECONDS: int = Field(default=60, env="EMAIL_OUTBOX_LOCK_SECONDS")
+    EMAIL_MAX_ATTEMPTS: int = Field(default=6, env="EMAIL_MAX_ATTEMPTS")
+    EMAIL_RETRY_BASE_SECONDS: int = Field(default=10, env="EMAIL_RETRY_BASE_SECONDS")
+    EMAIL_OUTBOX_RETENTION_DAYS: int = Field(default=30, env="EMAIL_OUTBOX_RETENTION_DAYS")
+    OFFICE_SETTINGS_TTL_SECONDS: int = Field(default=5, env="OFFICE_SETTINGS_TTL_SECONDS")
+    WS_BROKER: str = Field(default="memory", env="WS_BROKER")  # memory | mongo
+    WS_EVENTS_CAPPED_BYTES: int = Field(default=16 * 1024 * 1024, env="WS_EVENTS_CAPPED_BYTES")
+    WS_SEND_QUEUE_SIZE: int = Field(default=256, env="WS_SEND_QUEUE_SIZE")
+    WS_SLOW_CONSUMER_POLICY: str = Field(default="drop_oldest", env="WS_SLOW_CONSUMER_POLICY")  # drop_oldest | disconnect
+    WS_REPLAY_BUFFER_SIZE: int = Field(default=500, env="WS_REPLAY_BUFFER_SIZE")
+    WS_PING_INTERVAL_SECONDS: int = Field(default=25, env="WS_PING_INTERVAL_SECONDS")
+    # 0 = sin límite. Activarlo exige que el cliente envíe algo (p. ej. "pong") con más
+    # frecuencia que este valor; los sockets muertos ya los corta el ping de uvicorn
+    # (--ws-ping-interval / --ws-ping-timeout). Ver README.
+    WS_IDLE_TIMEOUT_SECONDS: int = Field(default=0, env="WS_IDLE_TIMEOUT_SECONDS")
+    WS_COALESCE_MS: int = Field(default=100, env="WS_COALESCE_MS")  # 0 = un frame por evento
+    WS_EVENTS_CAPPED_MAX: int = Field(default=50000, env="WS_EVENTS_CAPPED_MAX")
     
 
     class Config:
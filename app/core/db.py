@@ -2,6 +2,8 @@ from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import settings
+from app.infrastructure.schemas.cacheVersion import CacheVersion
+from app.infrastructure.schemas.emailOutbox import EmailOutbox
 from app.infrastructure.schemas.cita import Cita
 from app.infrastructure.schemas.especialidad import Especialidad
 from app.infrastructure.schemas.especialista import Especialista
@@ -12,15 +14,16 @@ from app.infrastructure.schemas.officeConfig import OfficeConfig
 from app.infrastructure.schemas.paciente import Paciente
 from app.infrastructure.schemas.permission import Permission
 from app.infrastructure.schemas.role import Role
+from app.infrastructure.schemas.schedulerLease import SchedulerLease
 from app.infrastructure.schemas.tratamiento import Tratamiento
 from app.infrastructure.schemas.user import User
 
 client = AsyncIOMotorClient(settings.MONGO_URI)
 database = client[settings.DB_NAME]
 
-async def init_db():
+async def init_db(db=None):
     await init_beanie(
-        database=database,
+        database=db if db is not None else database,
         document_models=[
             Office,
             Permission,
@@ -34,6 +37,9 @@ async def init_db():
             OfficeConfig,
             Tratamiento,
             HistorialClinico,
-            ImageAsset
+            ImageAsset,
+            CacheVersion,
+            SchedulerLease,
+            EmailOutbox
         ]
     )
\ No newline at end of file
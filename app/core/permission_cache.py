@@ -0,0 +1,72 @@
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.infrastructure.repositories.cacheVersion_repo import bump_cache_version, get_cache_version
+from app.infrastructure.schemas.permission import Permission
+from app.infrastructure.schemas.role import Role
+
+AUTH_CACHE_SCOPE = 'auth'
+
+
+class PermissionCache:
+    """
+    Cache en proceso role_id -> (nombre del rol, frozenset de nombres de permiso), separado por tenant.
+
+    Cada tenant tiene un contador de versión en la colección `cache_versions` (scope 'auth'). Las escrituras
+    sobre roles/permisos lo incrementan (bump); los demás workers lo releen como máximo cada
+    `ttl_seconds` y vacían su cache del tenant si cambió.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._roles: Dict[str, Dict[str, Tuple[str, FrozenSet[str]]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    async def _sync_version(self, tenant_id: str) -> None:
+        now = time.monotonic()
+        checked_at = self._checked_at.get(tenant_id)
+        if checked_at is not None and now - checked_at < self.ttl_seconds:
+            return
+
+        version = await get_cache_version(AUTH_CACHE_SCOPE, tenant_id)
+        if self._versions.get(tenant_id) != version:
+            self._roles.pop(tenant_id, None)
+            self._versions[tenant_id] = version
+        self._checked_at[tenant_id] = now
+
+    async def get_role(self, role_id: str, tenant_id: str) -> Optional[Tuple[str, FrozenSet[str]]]:
+        await self._sync_version(tenant_id)
+
+        roles = self._roles.setdefault(tenant_id, {})
+        cached = roles.get(role_id)
+        if cached is not None:
+            return cached
+
+        role = await Role.get(PydanticObjectId(role_id))
+        if not role:
+            return None
+
+        permissions = await Permission.find(
+            {'_id': {'$in': role.permissions}, 'tenant_id': PydanticObjectId(tenant_id)}
+        ).to_list()
+
+        entry = (role.name, frozenset(p.name for p in permissions))
+        roles[role_id] = entry
+        return entry
+
+    async def get_permissions(self, role_id: str, tenant_id: str) -> Optional[FrozenSet[str]]:
+        entry = await self.get_role(role_id, tenant_id)
+        return entry[1] if entry else None
+
+    async def invalidate(self, tenant_id: str) -> None:
+        version = await bump_cache_version(AUTH_CACHE_SCOPE, tenant_id)
+        self._roles.pop(tenant_id, None)
+        self._versions[tenant_id] = version
+        self._checked_at[tenant_id] = time.monotonic()
+
+
+permission_cache = PermissionCache(ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS)
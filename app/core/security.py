@@ -7,9 +7,9 @@ from app.core.config import settings
 from jose import JWTError, jwt
 
 from app.core.exceptions import raise_forbidden
-from app.infrastructure.schemas.permission import Permission
-from app.infrastructure.schemas.role import Role
+from app.core.permission_cache import permission_cache
 from app.infrastructure.schemas.user import User
+from app.shared.dto.authContext_dto import AuthContext
 from app.shared.dto.token_dto import TokenData
 from app.shared.utils import get_utc_now
 
@@ -51,23 +51,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     
     return user
 
-def require_permission(permission_name: str):
-    async def permission_dependency(user: User = Depends(get_current_user)):
-        role = await Role.get(user.role)
-        if not role:
-            raise raise_forbidden('Rol no valido')
-        
-        permissions = await Permission.find(
-            {'_id': {'$in': role.permissions}, 'tenant_id': user.tenant_id}
-        ).to_list()
+async def get_auth_context(user: User = Depends(get_current_user)) -> AuthContext:
+    # FastAPI cachea las dependencias por request: todas las que dependan de
+    # get_auth_context comparten el mismo JWT decode, User.get y resolución de rol.
+    role = await permission_cache.get_role(str(user.role), str(user.tenant_id))
+    if role is None:
+        raise raise_forbidden('Rol no valido')
 
-        has_permission = any(p.name == permission_name for p in permissions)
-        if not has_permission:
-            raise raise_forbidden(f'No se tiene el permiso: {permission_name}')
-        
-        return user
-    
-    return permission_dependency
+    role_name, permissions = role
+    return AuthContext(
+        user=user,
+        tenant_id=str(user.tenant_id),
+        role_id=str(user.role),
+        role_name=role_name,
+        permissions=permissions
+    )
+
+def require_permissions(*permission_names: str):
+    async def permissions_dependency(ctx: AuthContext = Depends(get_auth_context)) -> AuthContext:
+        missing = [p for p in permission_names if p not in ctx.permissions]
+        if missing:
+            raise raise_forbidden(f'No se tiene el permiso: {", ".join(missing)}')
+
+        return ctx
+
+    return permissions_dependency
+
+def require_permission(permission_name: str):
+    return require_permissions(permission_name)
 
 def decode_access_token(token: str) -> Dict[str, Any]:
     try:
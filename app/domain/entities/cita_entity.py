@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 from app.domain.entities.especialidad_entity import EspecialidadOut
@@ -29,4 +29,8 @@ class CitaOut(BaseModel):
     cancel_motivo: str | None
     duration_minutes: int
     estado: EstadoCitaOut
-    motivo: Optional[str]
\ No newline at end of file
+    motivo: Optional[str]
+
+class CitaPageOut(BaseModel):
+    items: List[CitaOut]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -23,6 +23,18 @@ class EspecialidadOut(BaseModel):
     createdAt: datetime
 
 
+class NextAvailableSlotOut(BaseModel):
+    especialista_id: str
+    especialista_name: str
+    fecha_inicio: datetime
+    fecha_fin: datetime
+
+class NextAvailableOut(BaseModel):
+    especialidad_id: str
+    timezone: str
+    slots: List[NextAvailableSlotOut]
+
+
 class PresignEspecialidadReq(BaseModel):
     content_type: Optional[str] = "image/webp"
 
@@ -48,4 +48,10 @@ class EspecialistaUpdateWithUser(BaseModel):
 
 class EspecialistaProfileOut(BaseModel):
     user: UserOut | None
-    especialista: EspecialistaOut | None
\ No newline at end of file
+    especialista: EspecialistaOut | None
+
+class SlotsOut(BaseModel):
+    especialista_id: str
+    timezone: str
+    duration_minutes: int
+    slots: List[datetime]
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class OfficeConfigUpdate(BaseModel):
@@ -7,4 +9,16 @@ class OfficeConfigUpdate(BaseModel):
 class OfficeConfigOut(BaseModel):
     id: str
     name: str
-    value:str
\ No newline at end of file
+    value:str
+
+class OfficeSettings(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    tenant_id: str
+    version: int
+    duracion_cita: timedelta
+    confirmacion_automatica: bool
+    correos_encendidos: bool
+    restringir_atencion_horario: bool
+    auto_cancelacion_habilitada: bool
+    office_timezone: ZoneInfo
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class SchedulerMetricsOut(BaseModel):
+    owner: str
+    is_leader: bool
+    fencing_token: Optional[int]
+    leader_since: Optional[datetime]
+    ticks: int
+    last_tick_at: Optional[datetime]
+    last_tick_duration_ms: Optional[float]
+    last_tick_actions: int
+    lag_seconds: float
+    watermark: Optional[datetime]
+    last_catch_up_at: Optional[datetime]
+    last_catch_up_actions: int
+    stale_claims_released: int
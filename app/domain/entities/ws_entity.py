@@ -0,0 +1,11 @@
+from typing import Dict
+from pydantic import BaseModel
+
+
+class WSMetricsOut(BaseModel):
+    connections: int
+    rooms: Dict[str, int]
+    reaped: int
+    dropped_frames: int
+    ping_interval_seconds: int
+    idle_timeout_seconds: int
@@ -1,25 +1,65 @@
+from typing import Sequence
+import httpx
 from app.core.config import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from app.shared.dto.outboxEmail_dto import OutboxRecipient
+
+_client: httpx.AsyncClient | None = None
+
+
+class EmailDeliveryError(Exception):
+    """Fallo al entregar un correo al proveedor; `retryable` indica si vale la pena reintentar."""
+
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Un solo cliente con pool de conexiones keep-alive para todo el proceso
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.SENDGRID_API_URL,
+            headers={"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"},
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(
+                max_connections=settings.EMAIL_SEND_CONCURRENCY,
+                max_keepalive_connections=settings.EMAIL_SEND_CONCURRENCY,
+            ),
+        )
+    return _client
+
+async def close_email_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 async def send_event_email(event: str, message: str):
     print(f"[EMAIL] ✉️ Enviando email por evento '{event}' para cita: {message}")
 
-async def send_sendgrid_email(to: str, subject: str, html: str):
-    message = Mail(
-        from_email=settings.SENDGRID_FROM_EMAIL,
-        to_emails=to,
-        subject=subject,
-        html_content=html
-    )
+async def deliver_email(recipients: Sequence[OutboxRecipient], subject: str, html: str) -> None:
+    """
+    Envía un mensaje por la API v3 de SendGrid con una personalization por destinatario
+    (cada una con sus substitutions): una sola llamada para todos. Lanza EmailDeliveryError
+    si no fue aceptado.
+    """
+    payload = {
+        "personalizations": [
+            {"to": [{"email": r.email}], **({"substitutions": r.substitutions} if r.substitutions else {})}
+            for r in recipients
+        ],
+        "from": {"email": settings.SENDGRID_FROM_EMAIL},
+        "subject": subject,
+        "content": [{"type": "text/html", "value": html}],
+    }
 
     try:
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
-        print(f'Correo enviado ({response.status_code}) {response.body} a {to}')
-    except Exception as e:
-        print(f'Error al enviar correo: {e}')
-
-
+        response = await _get_client().post('/v3/mail/send', json=payload)
+    except httpx.HTTPError as e:
+        raise EmailDeliveryError(f'Error de red: {e}', retryable=True)
 
-    
\ No newline at end of file
+    if response.status_code not in (200, 202):
+        # 429 y 5xx son transitorios; el resto (credenciales, payload) no mejora reintentando
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise EmailDeliveryError(f'SendGrid {response.status_code}: {response.text[:200]}', retryable=retryable)
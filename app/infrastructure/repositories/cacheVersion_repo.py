@@ -0,0 +1,22 @@
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+
+from app.infrastructure.schemas.cacheVersion import CacheVersion
+from app.shared.utils import get_utc_now
+
+
+async def get_cache_version(scope: str, tenant_id: str) -> int:
+    doc = await CacheVersion.get_motor_collection().find_one(
+        {"tenant_id": PydanticObjectId(tenant_id), "scope": scope},
+        {"version": 1}
+    )
+    return int(doc["version"]) if doc else 0
+
+async def bump_cache_version(scope: str, tenant_id: str) -> int:
+    doc = await CacheVersion.get_motor_collection().find_one_and_update(
+        {"tenant_id": PydanticObjectId(tenant_id), "scope": scope},
+        {"$inc": {"version": 1}, "$set": {"updatedAt": get_utc_now()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return int(doc["version"])
@@ -1,27 +1,35 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from string import Template
 from typing import Any, Dict, List, Literal, Optional, Tuple
 from beanie import PydanticObjectId
 from pydantic import EmailStr
-# from app.application.services.notification_service import notificar_evento_cita
+from app.application.services.availability_service import get_free_slots
+from app.application.services.email_outbox_service import encolar_correos
+from app.application.services.notification_service import notificar_evento_cita
+from app.application.services.reminder_schedule import REMINDER_CLAIMED, REMINDER_FAILED, REMINDER_SENT, clear_next_action_fields, next_action_fields, schedule_changed
+from app.application.services.tenant_service import tenant_resolver
 from app.core.exceptions import raise_duplicate_entity, raise_forbidden, raise_not_found
 from app.core.config import settings
 from app.domain.entities.cita_entity import CitaCreate, CitaOut
-from app.infrastructure.notifiers.email_notifier import send_sendgrid_email
-from app.infrastructure.repositories.especialidad_repo import especialidad_to_out, get_especialidad_by_id
-from app.infrastructure.repositories.especialista_repo import especialista_to_out, get_especialista_by_id, get_especialista_profile_by_id
-from app.infrastructure.repositories.estadoCita_repo import estado_cita_to_out, get_estado_cita_by_id, get_estado_cita_by_name
-from app.infrastructure.repositories.officeConfig_repo import get_office_config_by_name, get_office_timezone
-from app.infrastructure.repositories.office_repo import get_benedetta_office
-from app.infrastructure.repositories.paciente_repo import get_paciente_by_id, get_paciente_profile_by_id, get_pacientes_with_user, paciente_to_out
-from app.infrastructure.repositories.user_repo import get_admin_user, get_user_by_id, user_to_out
+from app.infrastructure.repositories.especialidad_repo import get_especialidad_by_id, get_especialidades_by_ids
+from app.infrastructure.repositories.especialista_repo import get_especialista_by_id, get_especialistas_by_ids
+from app.infrastructure.repositories.estadoCita_repo import estado_cita_to_out, get_estado_cita_by_id, get_estado_cita_by_name, get_estados_cita_by_ids
+from app.infrastructure.repositories.officeConfig_repo import get_office_settings, get_office_timezone
+from app.infrastructure.repositories.paciente_repo import get_paciente_by_id, get_paciente_profile_by_id, get_pacientes_by_ids
+from app.infrastructure.repositories.user_repo import get_admin_user, get_user_by_id, get_users_by_ids, user_to_out
 from app.infrastructure.schemas.cita import Cita
+from app.infrastructure.schemas.especialista import Especialista
 from beanie.operators import And, GTE, LTE, LT, GT, NE
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
 
-from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA, TRANSICIONES_CITA
+from app.shared.dto.citaMailContext_dto import CitaMailContext
 from app.shared.dto.mailData_dto import MailData, ReceiverData
-from app.shared.utils import get_mail_html
+from app.shared.dto.outboxEmail_dto import OutboxEmail, OutboxRecipient
+from app.shared.mail_templates import CompiledTemplate, mail_renderer
+from app.shared.utils import decode_cursor, encode_cursor, get_utc_now
 
 
 async def get_cita_by_id(cita_id: str, tenant_id: str) -> Cita:
@@ -77,58 +85,14 @@ async def get_citas_by_especialista_id(
         cursor = cursor.limit(limit)
     return await cursor.to_list()
 
-async def exists_cita_same_day(paciente_id: str, especialista_id: str, fecha_ref_utc: datetime, tenant_id: str, exclude_cita_id: str | None = None) -> bool:
-    tz = await get_office_timezone(tenant_id)
-    dt_local = fecha_ref_utc.astimezone(tz)
-
-    start_local = dt_local.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_local = start_local + timedelta(days=1)
-
-    start_utc = start_local.astimezone(timezone.utc)
-    end_utc = end_local.astimezone(timezone.utc)
-    
-    filters = [
-        Cita.tenant_id == PydanticObjectId(tenant_id),
-        Cita.paciente_id == PydanticObjectId(paciente_id),
-        Cita.especialista_id == PydanticObjectId(especialista_id),
-        GTE(Cita.fecha_inicio, start_utc),
-        LT(Cita.fecha_inicio, end_utc),
-        Cita.estado_id != ESTADOS_CITA.cancelada.value,  # ignora canceladas
-    ]
-
-    if exclude_cita_id:
-        filters.append(NE(Cita.id, PydanticObjectId(exclude_cita_id)))
-    
-    count = await Cita.find(And(*filters)).count()
-    return count > 0
-
-
-async def exists_solapamiento(especialista_id: str, fecha_inicio: datetime, fecha_fin: datetime, tenant_id: str) -> bool:
-    cita = await Cita.find(And(
-        Cita.tenant_id == PydanticObjectId(tenant_id),
-        Cita.especialista_id == PydanticObjectId(especialista_id),
-        LT(Cita.fecha_inicio, fecha_fin),
-        GT(Cita.fecha_fin, fecha_inicio),
-        NE(Cita.estado_id, ESTADOS_CITA.cancelada.value)
-    )).first_or_none()
-    return cita is not None
-
 def _overlap(a_start, a_end, b_start, b_end) -> bool:
     return (a_start < b_end) and (a_end > b_start)
 
-async def exists_inactividad_en_rango(
-    especialista_id: str,
-    inicio_utc_aw: datetime,   # aware UTC
-    fin_utc_aw: datetime,      # aware UTC
-    tenant_id: str,
+def _find_inactividad_en_rango(
+    esp,
+    inicio_utc_aw: datetime,
+    fin_utc_aw: datetime,
 ) -> Optional[tuple[datetime, datetime, str]]:
-    """
-    Devuelve (ia_ini_aw, ia_fin_aw, motivo) si alguna inactividad del especialista
-    se solapa con [inicio_utc_aw, fin_utc_aw). Caso contrario, None.
-
-    Las inactividades están guardadas como UTC naive -> se convierten a aware UTC.
-    """
-    esp = await get_especialista_by_id(especialista_id, tenant_id)
     if not esp or not getattr(esp, "inactividades", None):
         return None
 
@@ -148,11 +112,55 @@ async def exists_inactividad_en_rango(
 
     return None
 
+async def check_conflictos_cita(
+    paciente_id: str,
+    especialista_id: str,
+    inicio_utc: datetime,
+    fin_utc: datetime,
+    tz: ZoneInfo,
+    tenant_id: str,
+) -> Tuple[bool, bool]:
+    """
+    Devuelve (solapamiento, mismo_dia) con una sola agregación sobre las citas no
+    canceladas del especialista: el solape con [inicio_utc, fin_utc) y si el paciente
+    ya tiene cita con él el mismo día local.
+    """
+    dia_local = inicio_utc.astimezone(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    dia_ini_utc = dia_local.astimezone(timezone.utc)
+    dia_fin_utc = (dia_local + timedelta(days=1)).astimezone(timezone.utc)
+
+    solape = {"fecha_inicio": {"$lt": fin_utc}, "fecha_fin": {"$gt": inicio_utc}}
+    mismo_dia = {
+        "paciente_id": PydanticObjectId(paciente_id),
+        "fecha_inicio": {"$gte": dia_ini_utc, "$lt": dia_fin_utc},
+    }
+
+    pipeline = [
+        {
+            "$match": {
+                "tenant_id": PydanticObjectId(tenant_id),
+                "especialista_id": PydanticObjectId(especialista_id),
+                "estado_id": {"$ne": ESTADOS_CITA.cancelada.value},
+                "$or": [solape, mismo_dia],
+            }
+        },
+        {
+            "$facet": {
+                "solape": [{"$match": solape}, {"$limit": 1}, {"$project": {"_id": 1}}],
+                "mismo_dia": [{"$match": mismo_dia}, {"$limit": 1}, {"$project": {"_id": 1}}],
+            }
+        },
+    ]
+
+    rows = await Cita.get_motor_collection().aggregate(pipeline).to_list(length=1)
+    result = rows[0] if rows else {}
+    return bool(result.get("solape")), bool(result.get("mismo_dia"))
+
 async def create_cita(data: CitaCreate, tenant_id: str) -> Cita:
-    duracion_parameter = await get_office_config_by_name('duracion_cita_minutos', tenant_id);
-    duracion = timedelta(minutes=float(duracion_parameter.value))
+    office_settings = await get_office_settings(tenant_id)
+    duracion = office_settings.duracion_cita
 
-    tz = await get_office_timezone(tenant_id)
+    tz = office_settings.office_timezone
     dt_local = data.fecha_inicio
     if dt_local.tzinfo is None:
         dt_local = dt_local.replace(tzinfo=tz)
@@ -163,21 +171,39 @@ async def create_cita(data: CitaCreate, tenant_id: str) -> Cita:
 
     fecha_fin_utc = dt_utc + duracion
 
-    paciente = await get_paciente_profile_by_id(data.paciente_id, tenant_id)
+    estado_inicial = ESTADOS_CITA.confirmada if office_settings.confirmacion_automatica else ESTADOS_CITA.pendiente
+
+    # Lecturas independientes en paralelo; el especialista se lee una sola vez y
+    # se reutiliza para validar inactividades.
+    paciente, especialista, especialidad, estado, conflictos = await asyncio.gather(
+        get_paciente_by_id(data.paciente_id, tenant_id),
+        get_especialista_by_id(data.especialista_id, tenant_id),
+        get_especialidad_by_id(data.especialidad_id, tenant_id),
+        get_estado_cita_by_id(estado_inicial.value, tenant_id),
+        check_conflictos_cita(data.paciente_id, data.especialista_id, dt_utc, fecha_fin_utc, tz, tenant_id),
+    )
 
     if not paciente:
-        raise_not_found('Paciente')
+        raise raise_not_found('Paciente')
 
-    especialista = await get_especialista_profile_by_id(data.especialista_id, tenant_id)
     if not especialista:
-        raise_not_found('Especialista')
+        raise raise_not_found('Especialista')
 
-    if not await get_especialidad_by_id(data.especialidad_id, tenant_id):
-        raise_not_found('Especialidad')
+    if not especialidad:
+        raise raise_not_found('Especialidad')
 
-    ia_hit = await exists_inactividad_en_rango(
-        data.especialista_id, dt_utc, fecha_fin_utc, tenant_id
+    paciente_user, especialista_user = await asyncio.gather(
+        get_user_by_id(str(paciente.user_id), tenant_id),
+        get_user_by_id(str(especialista.user_id), tenant_id),
     )
+
+    if not paciente_user:
+        raise raise_not_found('Paciente')
+
+    if not especialista_user:
+        raise raise_not_found('Especialista')
+
+    ia_hit = _find_inactividad_en_rango(especialista, dt_utc, fecha_fin_utc)
     if ia_hit:
         ia_ini_aw, ia_fin_aw, ia_motivo = ia_hit
         # Mensaje en horario local de la oficina, más claro para el usuario
@@ -190,110 +216,238 @@ async def create_cita(data: CitaCreate, tenant_id: str) -> Cita:
         mensaje += ').'
         raise raise_duplicate_entity(mensaje)
 
-
-    if await exists_solapamiento(data.especialista_id, dt_utc, fecha_fin_utc, tenant_id):
+    hay_solape, hay_mismo_dia = conflictos
+    if hay_solape:
         raise raise_duplicate_entity(f'Cita con la hora seleccionada para el especialista')
     
-    if await exists_cita_same_day(data.paciente_id, data.especialista_id, dt_utc, tenant_id):
+    if hay_mismo_dia:
         raise raise_duplicate_entity('El paciente ya teiene una cita con este especilista el mismo dia')
-    
-    confirmacion_parameter = await get_office_config_by_name('confirmacion_automatica', tenant_id)
-
-    estado_inicial = ESTADOS_CITA.confirmada if confirmacion_parameter.value == '1' else ESTADOS_CITA.pendiente
 
-    estado = await get_estado_cita_by_id(estado_inicial.value, tenant_id)
     if not estado:
         raise raise_not_found(f'Estado de cita {estado_inicial}')
     
     cita = Cita(
         paciente_id=PydanticObjectId(data.paciente_id),
         especialista_id=PydanticObjectId(data.especialista_id),
-        paciente_name=f'{paciente.user.name} {paciente.user.lastname}',
-        especialista_name=f'{especialista.user.name} {especialista.user.lastname}',
+        paciente_name=f'{paciente_user.name} {paciente_user.lastname}',
+        especialista_name=f'{especialista_user.name} {especialista_user.lastname}',
         fecha_inicio=dt_utc,
         fecha_fin=fecha_fin_utc,
-        duration_minutes=int(duracion_parameter.value),
+        duration_minutes=int(duracion.total_seconds() // 60),
         motivo=data.motivo,
         estado_id=estado.estado_id,
         tenant_id=PydanticObjectId(tenant_id),
-        especialidad_id=data.especialidad_id
+        especialidad_id=data.especialidad_id,
+        **next_action_fields(dt_utc, estado.estado_id, []),
     )
 
     cita_guardada = await cita.insert()
+    if cita_guardada.next_action_at is not None:
+        schedule_changed.set()
 
     # await notificar_evento_cita(estado.nombre, f'{cita_guardada.id} {cita_guardada.fecha_inicio} {cita_guardada.fecha_fin}')
 
     return cita_guardada
 
-async def confirm_cita(cita_id: str, tenant_id: str) -> Cita:
-    cita = await Cita.find(And(
-        Cita.tenant_id == PydanticObjectId(tenant_id),
-        Cita.id == PydanticObjectId(cita_id)
-    )).first_or_none();
+async def transicionar_cita(cita_id: str, tenant_id: str, transicion: str, cambios: Optional[Dict[str, Any]] = None) -> Cita:
+    """
+    Aplica una transición de TRANSICIONES_CITA en un único round trip: el filtro exige
+    uno de los estados de origen, así dos requests concurrentes no pueden aplicarla ambos.
+    Solo escribe estado_id y los `cambios` indicados.
+    """
+    regla = TRANSICIONES_CITA[transicion]
+    if regla.hacia != ESTADOS_CITA.pendiente:
+        cambios = {**clear_next_action_fields(), **(cambios or {})}
 
-    if not cita:
-        raise raise_not_found('Cita')
-    
-    estado_cita = await get_estado_cita_by_id(cita.estado_id, tenant_id)
-    if estado_cita.nombre != ESTADOS_CITA.pendiente.name:
-        raise raise_duplicate_entity('La cita tiene un estado distindo a pendiente')
+    doc = await Cita.get_motor_collection().find_one_and_update(
+        {
+            "_id": PydanticObjectId(cita_id),
+            "tenant_id": PydanticObjectId(tenant_id),
+            "estado_id": {"$in": [e.value for e in regla.desde]},
+        },
+        {"$set": {"estado_id": regla.hacia.value, **(cambios or {})}},
+        return_document=ReturnDocument.AFTER,
+    )
 
-    estado = await get_estado_cita_by_id(ESTADOS_CITA.confirmada.value, tenant_id)
-    if not estado:
-        raise raise_not_found(f'Estado de cita {ESTADOS_CITA.confirmada.value}')
-    
-    cita.estado_id=estado.estado_id
+    if doc is None:
+        # Solo en el camino de error: distinguir inexistente de estado inválido
+        if not await get_cita_by_id(cita_id, tenant_id):
+            raise raise_not_found('Cita')
+        raise raise_duplicate_entity(regla.error)
 
-    cita_guardada = await cita.save()
-    # await notificar_evento_cita(estado.nombre, f'{cita_guardada.id} {cita_guardada.fecha_inicio} {cita_guardada.fecha_fin}')
-    return cita_guardada
+    return Cita.model_validate(doc)
+
+async def confirm_cita(cita_id: str, tenant_id: str) -> Cita:
+    return await transicionar_cita(cita_id, tenant_id, 'confirmar')
 
 async def set_attended_cita(cita_id: str, tenant_id: str) -> Cita:
-    cita = await get_cita_by_id(cita_id, tenant_id);
+    return await transicionar_cita(cita_id, tenant_id, 'atender')
 
-    if not cita:
-        raise raise_not_found('Cita')
-    
-    cita.estado_id = ESTADOS_CITA.atendida.value
+async def cancel_cita(cita_id: str, tenant_id: str, user_id: str, motivo: str) -> Cita:
+    if not motivo:
+        raise raise_duplicate_entity('Debe proporcionar un motivo para cancelar la cita.')
 
-    cita_guardada = await cita.save()
+    return await transicionar_cita(cita_id, tenant_id, 'cancelar', {
+        "canceledBy": PydanticObjectId(user_id),
+        "motivo_cancelacion": motivo,
+    })
 
-    return cita_guardada
+def _fence_filter(fencing_token: Optional[int]) -> Dict[str, Any]:
+    """
+    Condición de fencing para las escrituras del scheduler: se rechaza la escritura si un
+    líder con un token mayor ya tocó la cita. Sin token (ejecución manual) no se filtra.
+    """
+    if fencing_token is None:
+        return {}
+    return {"$or": [{"scheduler_fence": None}, {"scheduler_fence": {"$lte": fencing_token}}]}
 
-async def cancel_cita(cita_id: str, tenant_id: str, user_id: str, motivo: str) -> Cita:
-    cita = await Cita.find(And(
-        Cita.tenant_id == PydanticObjectId(tenant_id),
-        Cita.id == PydanticObjectId(cita_id)
-    )).first_or_none()
+def _fence_set(fencing_token: Optional[int]) -> Dict[str, Any]:
+    return {"scheduler_fence": fencing_token} if fencing_token is not None else {}
 
-    if not cita:
-        raise raise_not_found('Cita')
-    
-    if cita.canceledBy:
-        raise raise_duplicate_entity('La cita ya se encuentra cancelada');
-    
-    if not motivo:
-        raise raise_duplicate_entity('Debe proporcionar un motivo para cancelar la cita.')
+async def auto_cancelar_citas(
+    ids: List[PydanticObjectId],
+    tenant_id: str,
+    canceled_by: Optional[PydanticObjectId],
+    fencing_token: Optional[int] = None,
+) -> List[Cita]:
+    """
+    Autocancela en un solo update_many las citas de `ids` que sigan pendientes y devuelve
+    exactamente las que cambió este llamado (identificadas por su auto_canceled_at).
+    """
+    if not ids:
+        return []
 
-    estado = await get_estado_cita_by_id(ESTADOS_CITA.cancelada.value, tenant_id)
-    if not estado:
-        raise raise_not_found(f'Estado de cita {ESTADOS_CITA.cancelada.value}')
-    
-    
-    user = await get_user_by_id(user_id, tenant_id)
-    if not estado:
-        raise raise_not_found(f'Estado de cita {ESTADOS_CITA.cancelada.value}')
-    
-    cita.estado_id=estado.estado_id
-    cita.canceledBy=user.id
-    cita.motivo_cancelacion=motivo
+    now = get_utc_now()
+    result = await Cita.get_motor_collection().update_many(
+        {
+            "_id": {"$in": ids},
+            "tenant_id": PydanticObjectId(tenant_id),
+            "estado_id": ESTADOS_CITA.pendiente.value,
+            **_fence_filter(fencing_token),
+        },
+        {"$set": {
+            "estado_id": ESTADOS_CITA.cancelada.value,
+            "auto_canceled_at": now,
+            "canceledBy": canceled_by,
+            **clear_next_action_fields(),
+            **_fence_set(fencing_token),
+        }},
+    )
+    if not result.modified_count:
+        return []
 
-    cita_guardada = await cita.save()
-    # await notificar_evento_cita(estado.nombre, f'{cita_guardada.id} {cita_guardada.fecha_inicio} {cita_guardada.fecha_fin}')
+    return await Cita.find({"_id": {"$in": ids}, "auto_canceled_at": now}).to_list()
 
-    
+async def clear_citas_next_action(ids: List[PydanticObjectId], fencing_token: Optional[int] = None) -> None:
+    """
+    Quita la próxima acción de las citas de `ids` que sigan pendientes; si una cita se
+    confirmó o canceló entre la lectura y esta escritura, su next_action_* no se toca.
+    """
+    if not ids:
+        return
+    await Cita.get_motor_collection().update_many(
+        {"_id": {"$in": ids}, "estado_id": ESTADOS_CITA.pendiente.value, **_fence_filter(fencing_token)},
+        {"$set": {**clear_next_action_fields(), **_fence_set(fencing_token)}},
+    )
 
-    return cita_guardada
+async def reschedule_cita_next_action(cita: Cita, now: datetime, fencing_token: Optional[int] = None) -> None:
+    """Reprograma next_action_* de una cita a su próxima acción futura."""
+    await Cita.get_motor_collection().update_one(
+        {"_id": cita.id, **_fence_filter(fencing_token)},
+        {"$set": {
+            **next_action_fields(cita.fecha_inicio, cita.estado_id, cita.reminders_sent_marks, now),
+            **_fence_set(fencing_token),
+        }},
+    )
+
+async def claim_cita_reminder(cita: Cita, mark: int, fencing_token: Optional[int] = None) -> Optional[Cita]:
+    """
+    Reserva la marca de recordatorio antes de enviar, en una sola actualización: solo
+    gana quien la agrega a reminders_sent_marks, y de paso avanza next_action_*.
+    Devuelve None si la cita ya no está pendiente, la marca ya fue reservada o un
+    líder más nuevo ya escribió la cita.
+    """
+    marks = [*(cita.reminders_sent_marks or []), mark]
+    doc = await Cita.get_motor_collection().find_one_and_update(
+        {
+            "_id": cita.id,
+            "estado_id": ESTADOS_CITA.pendiente.value,
+            "reminders_sent_marks": {"$ne": mark},
+            **_fence_filter(fencing_token),
+        },
+        {
+            "$addToSet": {"reminders_sent_marks": mark},
+            "$set": {
+                f"reminders_status.{mark}": REMINDER_CLAIMED,
+                "reminder_claimed_mark": mark,
+                "reminder_claimed_at": get_utc_now(),
+                **next_action_fields(cita.fecha_inicio, ESTADOS_CITA.pendiente.value, marks),
+                **_fence_set(fencing_token),
+            },
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    return Cita.model_validate(doc) if doc else None
+
+async def complete_cita_reminders(cita_ids: List[PydanticObjectId], mark: int, fencing_token: Optional[int] = None) -> None:
+    """Marca como enviada la misma marca en varias citas con un solo update_many."""
+    if not cita_ids:
+        return
+    await Cita.get_motor_collection().update_many(
+        {"_id": {"$in": cita_ids}, **_fence_filter(fencing_token)},
+        {"$set": {
+            f"reminders_status.{mark}": REMINDER_SENT,
+            "last_reminder_sent_at": get_utc_now(),
+            "reminder_claimed_mark": None,
+            "reminder_claimed_at": None,
+        }},
+    )
+
+async def fail_cita_reminders(cita_ids: List[PydanticObjectId], mark: int, fencing_token: Optional[int] = None) -> None:
+    """
+    Deja la marca como fallida sin liberarla: para errores que un reintento no arregla
+    (p. ej. faltan datos del paciente), la marca no vuelve a programarse.
+    """
+    if not cita_ids:
+        return
+    await Cita.get_motor_collection().update_many(
+        {"_id": {"$in": cita_ids}, **_fence_filter(fencing_token)},
+        {"$set": {
+            f"reminders_status.{mark}": REMINDER_FAILED,
+            "reminder_claimed_mark": None,
+            "reminder_claimed_at": None,
+        }},
+    )
+
+async def release_cita_reminder(cita: Cita, mark: int, fencing_token: Optional[int] = None) -> None:
+    """
+    Libera una marca reservada cuyo envío falló para que se reintente mientras siga en
+    ventana. Solo aplica si la marca sigue reservada (no se pisa un envío ya completado).
+    """
+    marks = [m for m in (cita.reminders_sent_marks or []) if m != mark]
+    await Cita.get_motor_collection().update_one(
+        {
+            "_id": cita.id,
+            "estado_id": ESTADOS_CITA.pendiente.value,
+            f"reminders_status.{mark}": REMINDER_CLAIMED,
+            **_fence_filter(fencing_token),
+        },
+        {
+            "$pull": {"reminders_sent_marks": mark},
+            "$set": {
+                f"reminders_status.{mark}": REMINDER_FAILED,
+                "reminder_claimed_mark": None,
+                "reminder_claimed_at": None,
+                **next_action_fields(cita.fecha_inicio, ESTADOS_CITA.pendiente.value, marks),
+            },
+        },
+    )
+
+async def get_stale_reminder_claims(claimed_before: datetime, limit: int) -> List[Cita]:
+    """Citas con una marca reservada antes de `claimed_before` que nunca se completó ni liberó."""
+    return await Cita.find(
+        {"reminder_claimed_at": {"$lt": claimed_before}}
+    ).sort([("reminder_claimed_at", ASCENDING)]).limit(limit).to_list()
 
 def _as_aware_utc(dt):
     if dt is None:
@@ -302,286 +456,345 @@ def _as_aware_utc(dt):
     return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
 
 async def cita_to_out(cita: Cita) -> CitaOut:
+    citas_out = await citas_to_out_many([cita])
+    return citas_out[0]
 
-    # paciente = await get_paciente_profile_by_id(str(cita.paciente_id), str(cita.tenant_id))
-    
-    # especialista = await get_especialista_profile_by_id(str(cita.especialista_id), str(cita.tenant_id))
-    tenant_id = str(cita.tenant_id)
-    tz = await get_office_timezone(tenant_id)
+async def citas_to_out_many(citas: List[Cita]) -> List[CitaOut]:
+    """
+    Serializa un lote de citas resolviendo las referencias una sola vez por tenant:
+    zona horaria, especialidades, estados y usuarios que cancelaron se obtienen
+    con una consulta `$in` cada uno, sin importar cuántas citas haya.
+    """
+    if not citas:
+        return []
+
+    por_tenant: Dict[str, List[Cita]] = {}
+    for c in citas:
+        por_tenant.setdefault(str(c.tenant_id), []).append(c)
+
+    contexto: Dict[str, Tuple[ZoneInfo, Dict[str, Any], Dict[int, Any], Dict[str, Any]]] = {}
+    for tenant_id, citas_tenant in por_tenant.items():
+        tz = await get_office_timezone(tenant_id)
+
+        especialidad_ids = {str(c.especialidad_id) for c in citas_tenant}
+        estado_ids = {c.estado_id for c in citas_tenant}
+        canceled_ids = {str(c.canceledBy) for c in citas_tenant if c.canceledBy}
+
+        especialidades = await get_especialidades_by_ids(list(especialidad_ids), tenant_id)
+        estados = await get_estados_cita_by_ids(list(estado_ids), tenant_id)
+        usuarios = await get_users_by_ids(list(canceled_ids), tenant_id) if canceled_ids else []
+
+        contexto[tenant_id] = (
+            tz,
+            {str(e.id): e for e in especialidades},
+            {e.estado_id: e for e in estados},
+            {str(u.id): u for u in usuarios},
+        )
+
+    out: List[CitaOut] = []
+    for cita in citas:
+        tz, especialidades_map, estados_map, usuarios_map = contexto[str(cita.tenant_id)]
+        out.append(_build_cita_out(
+            cita,
+            tz,
+            especialidades_map.get(str(cita.especialidad_id)),
+            estados_map.get(cita.estado_id),
+            usuarios_map.get(str(cita.canceledBy)) if cita.canceledBy else None,
+        ))
 
+    return out
+
+def _build_cita_out(cita: Cita, tz: ZoneInfo, especialidad, estado, canceled_by_user) -> CitaOut:
     inicio_utc = _as_aware_utc(cita.fecha_inicio)
     fin_utc = _as_aware_utc(cita.fecha_fin)
 
     inicio_local_aw = inicio_utc.astimezone(tz) if inicio_utc else None
     fin_local_aw = fin_utc.astimezone(tz) if fin_utc else None
 
-    # import logging
-    # logger = logging.getLogger("app.cita_to_out")
-    # logger.info("cita_to_out | utc=%s -> local=%s tz=%s",
-    #             cita.fecha_inicio.isoformat() if cita.fecha_inicio else None,
-    #             inicio_local_aw.isoformat() if inicio_local_aw else None,
-    #             getattr(tz, "key", str(tz)))
-
-    especialidad = await get_especialidad_by_id(str(cita.especialidad_id), str(cita.tenant_id))
-    estado = await get_estado_cita_by_id(cita.estado_id, str(cita.tenant_id))
-    
-    canceledByUser = None
-    if cita.canceledBy:
-        canceledByUser = await get_user_by_id(cita.canceledBy, str(cita.tenant_id))
-
-    cita_out = CitaOut(
+    return CitaOut(
         id=str(cita.id),
         paciente=str(cita.paciente_id),
         pacienteName=cita.paciente_name if cita.paciente_name else '',
         duration_minutes=cita.duration_minutes,
-        especialidad=especialidad.nombre,
+        especialidad=especialidad.nombre if especialidad else '',
         especialista=cita.especialista_name if cita.especialista_name else '',
         estado=estado_cita_to_out(estado) if estado else None,
         fecha_fin=fin_local_aw,
         fecha_inicio=inicio_local_aw,
         motivo=cita.motivo,
         cancel_motivo=cita.motivo_cancelacion,
-        canceledBy=user_to_out(canceledByUser) if canceledByUser else None,
-        
+        canceledBy=user_to_out(canceled_by_user) if canceled_by_user else None,
     )
 
-    return cita_out
-
-async def get_citas_by_tenant_id(tenant_id: str) -> list[Cita]:
-    return await Cita.find(Cita.tenant_id == PydanticObjectId(tenant_id)).to_list()
+async def get_citas_page_by_tenant_id(
+    tenant_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    estado_id: Optional[int] = None,
+    especialista_id: Optional[str] = None,
+    paciente_id: Optional[str] = None,
+) -> Tuple[List[Cita], Optional[str]]:
+    """
+    Paginación keyset por (fecha_inicio, _id) descendente. Devuelve la página y el
+    cursor opaco de la siguiente (None si no hay más). Nunca usa skip.
+    """
+    filtros: Dict[str, Any] = {"tenant_id": PydanticObjectId(tenant_id)}
+    for campo, valor in (("especialista_id", especialista_id), ("paciente_id", paciente_id)):
+        if not valor:
+            continue
+        try:
+            filtros[campo] = PydanticObjectId(valor)
+        except Exception:
+            raise raise_duplicate_entity(f'{campo} inválido.')
+    if estado_id is not None:
+        filtros["estado_id"] = estado_id
+
+    rango: Dict[str, datetime] = {}
+    if desde:
+        rango["$gte"] = _as_aware_utc(desde)
+    if hasta:
+        rango["$lt"] = _as_aware_utc(hasta)
+    if rango:
+        filtros["fecha_inicio"] = rango
+
+    if cursor:
+        try:
+            last = decode_cursor(cursor)
+            last_fecha = datetime.fromisoformat(last["f"])
+            last_id = PydanticObjectId(last["i"])
+        except Exception:
+            raise raise_duplicate_entity('Cursor de paginación inválido.')
+
+        filtros["$or"] = [
+            {"fecha_inicio": {"$lt": last_fecha}},
+            {"fecha_inicio": last_fecha, "_id": {"$lt": last_id}},
+        ]
 
-async def send_cita_email(event: Literal['reserva', 'confirmacion', 'cancelacion', 'recordatorio'], cita: Cita) -> None:
+    rows = await Cita.find(filtros).sort(
+        [("fecha_inicio", DESCENDING), ("_id", DESCENDING)]
+    ).limit(limit + 1).to_list()
 
-    office = await get_benedetta_office()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor({"f": last_row.fecha_inicio.isoformat(), "i": str(last_row.id)})
 
-    email_sending_parameter = await get_office_config_by_name('correos_encendidos', str(office.id))
+    return rows, next_cursor
 
-    if email_sending_parameter.value == '0':
-        return
+async def load_cita_mail_context(citas: List[Cita], tenant_id: str) -> Optional[CitaMailContext]:
+    """
+    Carga una sola vez todo lo que necesitan los correos de `citas`: oficina, configuración,
+    admin y un $in por colección. Devuelve None si el envío de correos está desactivado.
+    """
+    office = await tenant_resolver.get_office(tenant_id)
+    office_settings = await get_office_settings(str(office.id))
+    if not office_settings.correos_encendidos:
+        return None
         # raise raise_forbidden('El envio de correos esta desactivado, activelo pasando el valor de 1 al parametro "correos_encendidos" en la pagina de configuraciones.')
 
-    data: list[Tuple[str, EmailStr]] = []
-
-    admin_user = await get_admin_user(str(office.id))
+    admin_user, especialistas, pacientes, especialidades = await asyncio.gather(
+        get_admin_user(str(office.id)),
+        get_especialistas_by_ids([str(c.especialista_id) for c in citas], str(office.id)),
+        get_pacientes_by_ids([str(c.paciente_id) for c in citas], str(office.id)),
+        get_especialidades_by_ids([str(c.especialidad_id) for c in citas], str(office.id)),
+    )
 
-    especialista_user = await get_especialista_profile_by_id(str(cita.especialista_id), str(office.id))
-    especialista_full_name = f'{especialista_user.user.name} {especialista_user.user.lastname}'
+    user_ids = [str(e.user_id) for e in especialistas] + [str(p.user_id) for p in pacientes]
+    users = await get_users_by_ids(user_ids, str(office.id))
+
+    return CitaMailContext(
+        office=office,
+        office_settings=office_settings,
+        admin_user=admin_user,
+        especialistas={str(e.id): e for e in especialistas},
+        pacientes={str(p.id): p for p in pacientes},
+        users={str(u.id): u for u in users},
+        especialidades={str(e.id): e for e in especialidades},
+    )
 
-    paciente_user = await get_paciente_profile_by_id(str(cita.paciente_id), str(office.id))
-    paciente_full_name = f'{paciente_user.user.name} {paciente_user.user.lastname}'
+def build_cita_mails(
+    event: Literal['reserva', 'confirmacion', 'cancelacion', 'recordatorio'],
+    cita: Cita,
+    ctx: CitaMailContext,
+    horarios_html: Optional[str] = None,
+    dedupe_prefix: Optional[str] = None
+) -> List[OutboxEmail]:
+    """
+    Arma el correo del evento de una cita a partir del contexto compartido, listo para el
+    outbox: un mensaje con todos los destinatarios. Con `horarios_html` la cancelación usa
+    la variante con horarios disponibles. La dedupe_key es `dedupe_prefix` (por defecto
+    evento:cita). Devuelve una lista vacía si faltan datos de la cita.
+    """
+    especialista = ctx.especialistas.get(str(cita.especialista_id))
+    paciente = ctx.pacientes.get(str(cita.paciente_id))
+    especialidad = ctx.especialidades.get(str(cita.especialidad_id))
+    especialista_user = ctx.users.get(str(especialista.user_id)) if especialista else None
+    paciente_user = ctx.users.get(str(paciente.user_id)) if paciente else None
+    if not (especialista_user and paciente_user and especialidad):
+        return []
 
-    especialidad = await get_especialidad_by_id(str(cita.especialidad_id), str(office.id))
+    especialista_full_name = f'{especialista_user.name} {especialista_user.lastname}'
+    paciente_full_name = f'{paciente_user.name} {paciente_user.lastname}'
 
-    tz = await get_office_timezone(str(office.id))
-    inicio_local = cita.fecha_inicio.astimezone(tz)
+    inicio_local = _as_aware_utc(cita.fecha_inicio).astimezone(ctx.office_settings.office_timezone)
 
     base_data = MailData(
         fecha=inicio_local.strftime('%d/%m/%Y'),
         hora=inicio_local.strftime('%H:%M'),
-        nombre_consultorio=office.name,
+        nombre_consultorio=ctx.office.name,
         nombre_especialidad=especialidad.nombre,
         nombre_especialista=especialista_full_name,
         nombre_paciente=paciente_full_name
     )
 
-    data = list[Tuple[str, EmailStr]]
+    receptores: List[Tuple[str, EmailStr]] = [(paciente_full_name, paciente_user.email)]
     if event == 'recordatorio':
-        data = [
-            (get_email_message(event, base_data, nombre_receptor=paciente_full_name), paciente_user.user.email),
-        ]
-        
         mail_subject = 'Recordatorio Cita'
     else:
-
-
-        data = [
-            (get_email_message(event, base_data, nombre_receptor=paciente_full_name), paciente_user.user.email),
-            (get_email_message(event, base_data, nombre_receptor=especialista_full_name), especialista_user.user.email),
-            (get_email_message(event, base_data, nombre_receptor=admin_user.name), admin_user.email),
-        ]
+        receptores.append((especialista_full_name, especialista_user.email))
+        if ctx.admin_user:
+            receptores.append((ctx.admin_user.name, ctx.admin_user.email))
 
         mail_subject = f'{event.capitalize()} de Cita'
 
-    for mail in data:
-        await send_sendgrid_email(mail[1], mail_subject ,mail[0])
+    if event == 'cancelacion' and horarios_html is not None:
+        mail_subject = 'Cancelación de Cita'
+
+    # Un solo mensaje por evento: el cuerpo se arma una vez con una etiqueta en lugar del
+    # nombre y SendGrid la sustituye por destinatario (una personalization por cada uno)
+    plantilla = get_email_template(event, base_data, horarios_html)
+    destinatarios: Dict[str, OutboxRecipient] = {}
+    for nombre, email in receptores:
+        destinatarios.setdefault(str(email).lower(), OutboxRecipient(
+            email=email,
+            substitutions={RECEPTOR_TAG: nombre},
+        ))
+
+    return [OutboxEmail(
+        recipients=list(destinatarios.values()),
+        subject=mail_subject,
+        html=plantilla.render({'nombre_receptor': RECEPTOR_TAG}),
+        dedupe_key=dedupe_prefix or f'{event}:{cita.id}',
+        tenant_id=str(cita.tenant_id),
+    )]
+
+async def send_cita_email(event: Literal['reserva', 'confirmacion', 'cancelacion', 'recordatorio'], cita: Cita) -> bool:
+    """
+    Encola los correos del evento en el outbox; el envío lo hace el worker en segundo
+    plano. Devuelve False si no se pudo armar el correo (faltan datos de la cita).
+    """
+    ctx = await load_cita_mail_context([cita], str(cita.tenant_id))
+    if ctx is None:
+        return True
+
+    mails = build_cita_mails(event, cita, ctx)
+    await encolar_correos(mails)
+    return bool(mails)
 
+async def send_cancelacion_emails(citas: List[Cita], tenant_id: str, enviar_horarios: bool = True) -> None:
+    """Correos de cancelación de un lote: un contexto y, si aplica, un HTML de horarios por especialista."""
+    if not citas:
+        return
 
-def get_email_message(event: Literal['reserva', 'confirmacion', 'cancelacion', 'recordatorio'], mailData: MailData, nombre_receptor: str) -> str:
-    if event == 'reserva':
-        mail_template_name = 'reserva_mail_template.html'
-        
-    if event == 'cancelacion':
-        mail_template_name = 'cancelacion_mail_template.html'
+    ctx = await load_cita_mail_context(citas, tenant_id)
+    if ctx is None:
+        return
 
-    if event == 'confirmacion':
-        mail_template_name = 'confirmacion_mail_template.html'
-    
-    if event == 'recordatorio':
-        mail_template_name = 'recordatorio_mail_template.html'
+    horarios: Dict[str, str] = {}
+    if enviar_horarios:
+        especialista_ids = list({str(c.especialista_id) for c in citas})
+        htmls = await asyncio.gather(*(
+            _build_horarios_disponibles_html(eid, tenant_id, especialista=ctx.especialistas.get(eid))
+            for eid in especialista_ids
+        ))
+        horarios = dict(zip(especialista_ids, htmls))
+
+    mails = [
+        mail
+        for cita in citas
+        for mail in build_cita_mails('cancelacion', cita, ctx, horarios.get(str(cita.especialista_id)))
+    ]
+    await encolar_correos(mails)
 
-    values = {
-        **mailData.model_dump(),
-        'nombre_receptor':nombre_receptor
-    }
 
-    if event == 'recordatorio':
-        values['cta_url'] = settings.FRONTEND_APP_URL
+# Etiqueta de sustitución por destinatario (substitutions de SendGrid)
+RECEPTOR_TAG = '-nombre_receptor-'
 
-    html = get_mail_html(mail_template_name, values)
+MAIL_TEMPLATES = {
+    'reserva': 'reserva_mail_template.html',
+    'confirmacion': 'confirmacion_mail_template.html',
+    'cancelacion': 'cancelacion_mail_template.html',
+    'recordatorio': 'recordatorio_mail_template.html',
+}
 
-    return html
+def get_email_template(
+    event: Literal['reserva', 'confirmacion', 'cancelacion', 'recordatorio'],
+    mailData: MailData,
+    horarios_html: Optional[str] = None
+) -> CompiledTemplate:
+    """Plantilla del evento con los datos de la cita ya aplicados; solo falta nombre_receptor."""
+    values = mailData.model_dump()
 
-async def get_email_message_cancelacion_inactividad(mailData: MailData, nombre_receptor: str, horarios_html: str) -> str:
-    values = {
-        **mailData.model_dump(),
-        "nombre_receptor": nombre_receptor,
-        "horarios_disponibles": horarios_html or ""
-    }
+    if event == 'recordatorio':
+        values['cta_url'] = settings.FRONTEND_APP_URL
 
-    return get_mail_html('cancelacion_mail_template.html', values)
+    if event == 'cancelacion':
+        values['horarios_disponibles'] = horarios_html or ''
 
+    return mail_renderer.get(MAIL_TEMPLATES[event]).partial(values)
 
 async def _build_horarios_disponibles_html(
     especialista_id: str,
     tenant_id: str,
-    max_por_dia: int = 6
+    max_por_dia: int = 6,
+    especialista: Optional[Especialista] = None
 ) -> str:
-    DAY_MAP = {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 0: 6}
-    tz = await get_office_timezone(tenant_id)
+    office_settings = await get_office_settings(tenant_id)
+    tz = office_settings.office_timezone
     now_local = datetime.now(tz)
 
     # Inicio de semana local (Lunes 00:00)
     week_start_local = (now_local - timedelta(days=now_local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
     week_end_local = week_start_local + timedelta(days=7)
 
-    week_start_utc = week_start_local.astimezone(timezone.utc)
-    week_end_utc = week_end_local.astimezone(timezone.utc)
-
-    # Datos base
-    especialista = await get_especialista_by_id(especialista_id, tenant_id)
+    if especialista is None:
+        especialista = await get_especialista_by_id(especialista_id, tenant_id)
     if not especialista:
         return "<p>No se pudo obtener la información del especialista.</p>"
 
-    # Duración de cita (min)
-    dur_param = await get_office_config_by_name("duracion_cita_minutos", tenant_id)
-    try:
-        step = timedelta(minutes=float(dur_param.value))
-    except Exception:
-        step = timedelta(minutes=45)
-
-    # Citas no canceladas de la semana (para filtrar solapes)
-    citas_semana = await Cita.find(And(
-        Cita.tenant_id == PydanticObjectId(tenant_id),
-        Cita.especialista_id == PydanticObjectId(especialista_id),
-        LT(Cita.fecha_inicio, week_end_utc),
-        GT(Cita.fecha_fin, week_start_utc),
-        NE(Cita.estado_id, ESTADOS_CITA.cancelada.value),
-    )).to_list()
-
-    booked = []
-    for c in citas_semana:
-        b_ini = _as_aware_utc(c.fecha_inicio).astimezone(tz)
-        b_fin = _as_aware_utc(c.fecha_fin).astimezone(tz)
-        booked.append((b_ini, b_fin))
-
-    # Inactividades del especialista (si existen)
-    inacts = []
-    for ia in getattr(especialista, "inactividades", []) or []:
-        ia_ini = _as_aware_utc(getattr(ia, "desde", None))
-        ia_fin = _as_aware_utc(getattr(ia, "hasta", None))
-        if ia_ini and ia_fin:
-            inacts.append((ia_ini, ia_fin))
+    slots = await get_free_slots(
+        especialista_id,
+        tenant_id,
+        week_start_local.astimezone(timezone.utc),
+        week_end_local.astimezone(timezone.utc),
+        office_settings=office_settings,
+        especialista=especialista,
+    )
 
-    def _overlap(a_start, a_end, b_start, b_end):
-        return (a_start < b_end) and (a_end > b_start)
+    return _horarios_html(slots, tz, max_por_dia)
 
+def _horarios_html(slots: List[Tuple[datetime, datetime]], tz: ZoneInfo, max_por_dia: int = 6) -> str:
     day_names = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
-    html_parts = ["<ul>"]
 
-    # Generar slots por día
-    for d in range(7):
-        date_local = week_start_local + timedelta(days=d)
-
-        # Disponibilidades del día d
-        slots_out = []
-        for disp in getattr(especialista, "disponibilidades", []) or []:
-            disp_index = DAY_MAP.get(getattr(disp, "dia", None), None)
-            if disp_index is None or disp_index != d:
-                continue
-            try:
-                h1, m1 = map(int, str(disp.desde).split(":")[:2])
-                h2, m2 = map(int, str(disp.hasta).split(":")[:2])
-            except Exception:
-                continue
-
-            block_start = date_local.replace(hour=h1, minute=m1, second=0, microsecond=0)
-            block_end = date_local.replace(hour=h2, minute=m2, second=0, microsecond=0)
-
-            t = block_start
-            while t + step <= block_end:
-                if t > now_local:
-                    slot_end = t + step
-                    # Solape con citas (en local)
-                    has_cita = any(_overlap(t, slot_end, b_ini, b_fin) for (b_ini, b_fin) in booked)
-                    # Solape con inactividades (en UTC)
-                    t_utc = t.astimezone(timezone.utc)
-                    end_utc = slot_end.astimezone(timezone.utc)
-                    has_inact = any(_overlap(t_utc, end_utc, ia_ini, ia_fin) for (ia_ini, ia_fin) in inacts)
-                    if not has_cita and not has_inact:
-                        slots_out.append(t.strftime("%H:%M"))
-                        if len(slots_out) >= max_por_dia:
-                            break
-                t += step
-
-        if slots_out:
-            html_parts.append(f"<li><strong>{day_names[d]} {date_local.strftime('%d/%m')}</strong>: {', '.join(slots_out)}</li>")
-
-    html_parts.append("</ul>")
+    por_dia: Dict[Any, List[str]] = {}
+    for ini, _ in slots:
+        ini_local = ini.astimezone(tz)
+        horas = por_dia.setdefault(ini_local.date(), [])
+        if len(horas) < max_por_dia:
+            horas.append(ini_local.strftime("%H:%M"))
 
     # Si no hay nada, devolvemos mensaje corto (evita correo vacío)
-    html = "".join(html_parts)
-    if html == "<ul></ul>":
+    if not por_dia:
         return "<p>No hay horarios disponibles esta semana (o ya pasaron).</p>"
-    return html
 
-async def _send_cita_email_cancelacion_inactividad(cita: Cita) -> None:
-    office = await get_benedetta_office()
-    email_sending_parameter = await get_office_config_by_name('correos_encendidos', str(office.id))
-    if email_sending_parameter.value == '0':
-        return
-    
-    
-    admin_user = await get_admin_user(str(office.id))
-    especialista_user = await get_especialista_profile_by_id(str(cita.especialista_id), str(office.id))
-    especialista_full_name = f'{especialista_user.user.name} {especialista_user.user.lastname}'
-
-    paciente_user = await get_paciente_profile_by_id(str(cita.paciente_id), str(office.id))
-    paciente_full_name = f'{paciente_user.user.name} {paciente_user.user.lastname}'
-
-    especialidad = await get_especialidad_by_id(str(cita.especialidad_id), str(office.id))
-    tz = await get_office_timezone(str(office.id))
-    inicio_local = _as_aware_utc(cita.fecha_inicio).astimezone(tz)
-
-    base_data = MailData(
-        fecha=inicio_local.strftime('%d/%m/%Y'),
-        hora=inicio_local.strftime('%H:%M'),
-        nombre_consultorio=office.name,
-        nombre_especialidad=especialidad.nombre,
-        nombre_especialista=especialista_full_name,
-        nombre_paciente=paciente_full_name
-    )
-
-    horarios_html = await _build_horarios_disponibles_html(str(cita.especialista_id), str(office.id))
-
-    emails = [
-        (await get_email_message_cancelacion_inactividad(base_data, paciente_full_name, horarios_html), paciente_user.user.email),
-        (await get_email_message_cancelacion_inactividad(base_data, especialista_full_name, horarios_html), especialista_user.user.email),
-        (await get_email_message_cancelacion_inactividad(base_data, admin_user.name, horarios_html), admin_user.email),
-    ]
-    subject = 'Cancelación de Cita'
-
-    for html, to_addr in emails:
-        await send_sendgrid_email(to_addr, subject, html)
+    html_parts = ["<ul>"]
+    for dia in sorted(por_dia):
+        html_parts.append(f"<li><strong>{day_names[dia.weekday()]} {dia.strftime('%d/%m')}</strong>: {', '.join(por_dia[dia])}</li>")
+    html_parts.append("</ul>")
+    return "".join(html_parts)
 
 async def get_pacientes_con_citas_por_especialista(
     tenant_id: str,
@@ -660,23 +873,47 @@ async def cancelar_citas(
     else:
         cancel_user = await get_admin_user(tenant_id)
 
-    actualizadas = 0
-    for cid in ids:
-        cita = await get_cita_by_id(cid, tenant_id)
-        if not cita:
-            continue
-        if cita.estado_id == estado_cancel.estado_id:
-            continue
+    regla = TRANSICIONES_CITA['cancelar']
+    filtro: Dict[str, Any] = {
+        "tenant_id": PydanticObjectId(tenant_id),
+        "_id": {"$in": list({PydanticObjectId(cid) for cid in ids})},
+        "estado_id": {"$in": [e.value for e in regla.desde]},
+    }
 
-        cita.estado_id = estado_cancel.estado_id
-        cita.canceledBy = cancel_user.id if cancel_user else None
-        cita.motivo_cancelacion = motivo
-        await cita.save()
-        actualizadas += 1
+    citas = await Cita.find(filtro).to_list()
+    if not citas:
+        return 0
 
-        if enviar_horarios:
-            await _send_cita_email_cancelacion_inactividad(cita)
-        else:
-            await send_cita_email('cancelacion', cita)
-    
-    return actualizadas
\ No newline at end of file
+    cambios = {
+        "estado_id": estado_cancel.estado_id,
+        "canceledBy": cancel_user.id if cancel_user else None,
+        "motivo_cancelacion": motivo,
+        **clear_next_action_fields(),
+    }
+    filtro["_id"] = {"$in": [c.id for c in citas]}
+    result = await Cita.get_motor_collection().update_many(filtro, {"$set": cambios})
+
+    if result.modified_count != len(citas):
+        # Otra request movió alguna cita entre la lectura y la escritura: solo notificamos las nuestras
+        citas = await Cita.find({
+            "_id": filtro["_id"],
+            "estado_id": estado_cancel.estado_id,
+            "canceledBy": cambios["canceledBy"],
+            "motivo_cancelacion": motivo,
+        }).to_list()
+    else:
+        for cita in citas:
+            for campo, valor in cambios.items():
+                setattr(cita, campo, valor)
+
+    # Los sockets reciben las cancelaciones juntas en un frame por la coalescencia del manager
+    for cita, cita_out in zip(citas, await citas_to_out_many(citas)):
+        await notificar_evento_cita(
+            tenant_id=tenant_id,
+            action='canceled',
+            payload=cita_out.model_dump(),
+            especialista_id=str(cita.especialista_id)
+        )
+    await send_cancelacion_emails(citas, tenant_id, enviar_horarios)
+
+    return result.modified_count
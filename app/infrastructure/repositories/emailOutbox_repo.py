@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from beanie import PydanticObjectId
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from app.infrastructure.schemas.emailOutbox import EmailOutbox
+from app.shared.dto.outboxEmail_dto import OutboxEmail, OutboxRecipient
+from app.shared.utils import get_utc_now
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def enqueue_emails(emails: List[OutboxEmail]) -> int:
+    """
+    Encola los correos en un solo insert_many desordenado. Los que ya existen con la
+    misma dedupe_key se ignoran. Devuelve cuántos quedaron encolados ahora.
+    """
+    if not emails:
+        return 0
+
+    now = get_utc_now()
+    docs = [
+        EmailOutbox(
+            tenant_id=PydanticObjectId(e.tenant_id) if e.tenant_id else None,
+            dedupe_key=e.dedupe_key,
+            recipients=e.recipients,
+            subject=e.subject,
+            html=e.html,
+            next_attempt_at=now,
+            createdAt=now,
+        ).model_dump(exclude={"id", "revision_id"})
+        for e in emails
+    ]
+
+    try:
+        result = await EmailOutbox.get_motor_collection().insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        errores = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errores):
+            raise
+        return int(e.details.get("nInserted", 0))
+
+async def claim_next_email(lock_seconds: int, max_attempts: int) -> Optional[EmailOutbox]:
+    """
+    Toma un correo listo para enviar (pendiente y vencido, o 'sending' con el lock
+    expirado por la caída de un worker) que no haya agotado `max_attempts`, y lo bloquea
+    por `lock_seconds`. Un documento que no valida contra el esquema se marca 'failed'
+    (reintentarlo no lo arregla) y se sigue con el próximo.
+    """
+    while True:
+        now = get_utc_now()
+        doc = await EmailOutbox.get_motor_collection().find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "locked_until": {"$lt": now}},
+                ],
+                "attempts": {"$lt": max_attempts},
+            },
+            {
+                "$set": {"status": "sending", "locked_until": now + timedelta(seconds=lock_seconds)},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return None
+        try:
+            return EmailOutbox.model_validate(doc)
+        except ValidationError as e:
+            await mark_email_failed(doc["_id"], f"Documento inválido: {e}")
+
+async def fail_exhausted_emails(max_attempts: int) -> int:
+    """
+    Marca 'failed' los correos que agotaron `max_attempts` sin llegar a un estado final
+    (el worker cayó durante el último intento); claim_next_email ya no los toma.
+    """
+    result = await EmailOutbox.get_motor_collection().update_many(
+        {
+            "$or": [
+                {"status": "pending"},
+                {"status": "sending", "locked_until": {"$lt": get_utc_now()}},
+            ],
+            "attempts": {"$gte": max_attempts},
+        },
+        {"$set": {
+            "status": "failed",
+            "failedAt": get_utc_now(),
+            "locked_until": None,
+            "last_error": "Intentos agotados sin confirmación del envío",
+        }},
+    )
+    return result.modified_count
+
+async def mark_emails_sent(ids: List[PydanticObjectId]) -> None:
+    if not ids:
+        return
+    await EmailOutbox.get_motor_collection().update_many(
+        {"_id": {"$in": ids}, "status": "sending"},
+        {"$set": {"status": "sent", "sentAt": get_utc_now(), "locked_until": None, "last_error": None}},
+    )
+
+async def mark_email_retry(
+    email_id: PydanticObjectId,
+    next_attempt_at: datetime,
+    error: str,
+    recipients: Optional[List[OutboxRecipient]] = None,
+) -> None:
+    """Reprograma el correo; con `recipients`, el reintento va solo a esos destinatarios."""
+    cambios = {"status": "pending", "next_attempt_at": next_attempt_at, "locked_until": None, "last_error": error[:500]}
+    if recipients is not None:
+        cambios["recipients"] = [r.model_dump() for r in recipients]
+    await EmailOutbox.get_motor_collection().update_one(
+        {"_id": email_id, "status": "sending"},
+        {"$set": cambios},
+    )
+
+async def mark_email_failed(email_id: PydanticObjectId, error: str) -> None:
+    await EmailOutbox.get_motor_collection().update_one(
+        {"_id": email_id, "status": "sending"},
+        {"$set": {"status": "failed", "failedAt": get_utc_now(), "locked_until": None, "last_error": error[:500]}},
+    )
+
+async def get_next_email_attempt_at() -> Optional[datetime]:
+    doc = await EmailOutbox.get_motor_collection().find_one(
+        {"status": "pending"},
+        {"next_attempt_at": 1},
+        sort=[("status", 1), ("next_attempt_at", 1)],
+    )
+    return doc["next_attempt_at"] if doc else None
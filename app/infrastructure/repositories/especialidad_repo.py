@@ -115,6 +115,15 @@ async def get_especialidad_by_id(especialidad_id: str, tenant_id: str) -> Especi
         Especialidad.id == PydanticObjectId(especialidad_id)
     )).first_or_none()
 
+async def get_especialidades_by_ids(especialidad_ids: list[str], tenant_id: str) -> list[Especialidad]:
+    ids = list({PydanticObjectId(eid) for eid in especialidad_ids})
+    if not ids:
+        return []
+    return await Especialidad.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "_id": {"$in": ids}
+    }).to_list()
+
 
 def especialidad_to_out(especialidad: Especialidad) -> EspecialidadOut:
     d = especialidad.model_dump()
@@ -152,6 +152,15 @@ async def get_especialista_by_id(especialista_id: str, tenant_id: str) -> Especi
         Especialista.id == PydanticObjectId(especialista_id)
     )).first_or_none()
 
+async def get_especialistas_by_ids(especialista_ids: list[str], tenant_id: str) -> list[Especialista]:
+    ids = list({PydanticObjectId(eid) for eid in especialista_ids})
+    if not ids:
+        return []
+    return await Especialista.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "_id": {"$in": ids}
+    }).to_list()
+
 async def get_especialista_profile_by_id(especialista_id: str, tenant_id: str) -> EspecialistaProfileOut:
     especialista = await get_especialista_by_id(especialista_id, tenant_id)
     user = await get_user_by_id(str(especialista.user_id), tenant_id)
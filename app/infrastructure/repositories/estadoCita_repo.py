@@ -16,6 +16,15 @@ async def get_estado_cita_by_id(estado_id: int, tenant_id: str) -> EstadoCita:
         EstadoCita.estado_id == estado_id
     )).first_or_none()
 
+async def get_estados_cita_by_ids(estado_ids: list[int], tenant_id: str) -> list[EstadoCita]:
+    ids = list({int(eid) for eid in estado_ids})
+    if not ids:
+        return []
+    return await EstadoCita.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "estado_id": {"$in": ids}
+    }).to_list()
+
 def estado_cita_to_out(estado_cita: EstadoCita) -> EstadoCitaOut:
     estado_cita_dict = estado_cita.model_dump()
     estado_cita_dict['id'] = str(estado_cita.id)
@@ -1,10 +1,19 @@
+import time
+from datetime import timedelta
+from typing import Dict, List
 from zoneinfo import ZoneInfo
 from beanie import PydanticObjectId
 from beanie.operators import And
+from app.core.config import settings
 from app.core.exceptions import raise_not_found
-from app.domain.entities.officeConfig_entity import OfficeConfigOut, OfficeConfigUpdate
+from app.domain.entities.officeConfig_entity import OfficeConfigOut, OfficeConfigUpdate, OfficeSettings
+from app.infrastructure.repositories.cacheVersion_repo import bump_cache_version, get_cache_version
 from app.infrastructure.schemas.officeConfig import OfficeConfig
 
+OFFICE_CONFIG_CACHE_SCOPE = 'office_config'
+DEFAULT_DURACION_MINUTOS = 45
+DEFAULT_TIMEZONE = 'America/La_Paz'
+
 
 async def get_office_config(tenant_id: str) -> list[OfficeConfig]:
     config = await OfficeConfig.find(OfficeConfig.tenant_id == PydanticObjectId(tenant_id)).to_list()
@@ -18,6 +27,7 @@ async def update_office_config(config_id: str, data: OfficeConfigUpdate, tenant_
     config.value = data.value
 
     await config.save()
+    await office_settings_cache.invalidate(tenant_id)
     return config
 
 async def get_office_config_by_name(name: str, tenant_id: str) -> OfficeConfig:
@@ -31,14 +41,96 @@ def office_config_to_out(office_config: OfficeConfig) -> OfficeConfigOut:
     office_config_dict['id'] = str(office_config.id)
     return OfficeConfigOut(**office_config_dict)
 
-async def is_auto_cancel_enabled(tenant_id: str, default: bool = False) -> bool:
-    oc = await get_office_config_by_name('auto_cancelacion_habilitada', tenant_id)
-    if not oc or oc.value not in ('0', '1'):
+def _flag(values: Dict[str, str], name: str, default: bool) -> bool:
+    value = values.get(name)
+    if value not in ('0', '1'):
         return default
-    
-    return oc.value == '1'
+    return value == '1'
+
+def build_office_settings(tenant_id: str, configs: List[OfficeConfig], version: int) -> OfficeSettings:
+    values = {oc.name: oc.value for oc in configs}
+
+    try:
+        duracion = timedelta(minutes=float(values.get('duracion_cita_minutos')))
+    except (TypeError, ValueError):
+        duracion = timedelta(minutes=DEFAULT_DURACION_MINUTOS)
+
+    try:
+        tz = ZoneInfo(values.get('office_timezone') or DEFAULT_TIMEZONE)
+    except Exception:
+        tz = ZoneInfo(DEFAULT_TIMEZONE)
+
+    return OfficeSettings(
+        tenant_id=tenant_id,
+        version=version,
+        duracion_cita=duracion,
+        confirmacion_automatica=_flag(values, 'confirmacion_automatica', False),
+        correos_encendidos=_flag(values, 'correos_encendidos', True),
+        restringir_atencion_horario=_flag(values, 'restringir_atencion_horario', True),
+        auto_cancelacion_habilitada=_flag(values, 'auto_cancelacion_habilitada', False),
+        office_timezone=tz,
+    )
+
+
+class OfficeSettingsCache:
+    """
+    Snapshot tipado de la configuración de cada oficina. Se carga en bloque al arrancar,
+    se recarga en este worker cuando update_office_config escribe y, en los demás workers,
+    cuando cambia la versión del scope 'office_config' (se relee como máximo cada `ttl_seconds`).
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[str, OfficeSettings] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    async def load_all(self) -> None:
+        configs = await OfficeConfig.find_all().to_list()
+        por_tenant: Dict[str, List[OfficeConfig]] = {}
+        for oc in configs:
+            por_tenant.setdefault(str(oc.tenant_id), []).append(oc)
+
+        now = time.monotonic()
+        for tenant_id, tenant_configs in por_tenant.items():
+            version = await get_cache_version(OFFICE_CONFIG_CACHE_SCOPE, tenant_id)
+            self._snapshots[tenant_id] = build_office_settings(tenant_id, tenant_configs, version)
+            self._checked_at[tenant_id] = now
+
+    async def _reload(self, tenant_id: str, version: int) -> OfficeSettings:
+        configs = await get_office_config(tenant_id)
+        snapshot = build_office_settings(tenant_id, configs, version)
+        self._snapshots[tenant_id] = snapshot
+        self._checked_at[tenant_id] = time.monotonic()
+        return snapshot
+
+    async def get(self, tenant_id: str) -> OfficeSettings:
+        tenant_id = str(tenant_id)
+        snapshot = self._snapshots.get(tenant_id)
+        checked_at = self._checked_at.get(tenant_id)
+        if snapshot is not None and checked_at is not None and time.monotonic() - checked_at < self.ttl_seconds:
+            return snapshot
+
+        version = await get_cache_version(OFFICE_CONFIG_CACHE_SCOPE, tenant_id)
+        if snapshot is not None and snapshot.version == version:
+            self._checked_at[tenant_id] = time.monotonic()
+            return snapshot
+
+        return await self._reload(tenant_id, version)
+
+    async def invalidate(self, tenant_id: str) -> OfficeSettings:
+        version = await bump_cache_version(OFFICE_CONFIG_CACHE_SCOPE, str(tenant_id))
+        return await self._reload(str(tenant_id), version)
+
+
+office_settings_cache = OfficeSettingsCache(ttl_seconds=settings.OFFICE_SETTINGS_TTL_SECONDS)
+
+async def get_office_settings(tenant_id: str) -> OfficeSettings:
+    return await office_settings_cache.get(tenant_id)
+
+async def is_auto_cancel_enabled(tenant_id: str) -> bool:
+    office_settings = await get_office_settings(tenant_id)
+    return office_settings.auto_cancelacion_habilitada
 
-async def get_office_timezone(tenant_id: str, default_tz: str = 'America/La_Paz') -> ZoneInfo:
-    oc = await get_office_config_by_name('office_timezone', tenant_id)
-    tzname = oc.value if oc and oc.value else default_tz
-    return ZoneInfo(tzname)
\ No newline at end of file
+async def get_office_timezone(tenant_id: str) -> ZoneInfo:
+    office_settings = await get_office_settings(tenant_id)
+    return office_settings.office_timezone
@@ -76,6 +76,15 @@ async def get_paciente_by_id(paciente_id: str, tenant_id: str) -> Paciente:
         Paciente.id == PydanticObjectId(paciente_id)
     )).first_or_none()
 
+async def get_pacientes_by_ids(paciente_ids: list[str], tenant_id: str) -> list[Paciente]:
+    ids = list({PydanticObjectId(pid) for pid in paciente_ids})
+    if not ids:
+        return []
+    return await Paciente.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "_id": {"$in": ids}
+    }).to_list()
+
 # async def filter_paciente_by(criteria: FilterPaciente, tenant_id: str) -> list[Paciente]:
 #     query = Paciente.find(Paciente.tenant_id == PydanticObjectId(tenant_id))
 
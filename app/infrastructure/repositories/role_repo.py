@@ -1,6 +1,7 @@
 from beanie import PydanticObjectId
 from beanie.operators import And
 from app.core.exceptions import raise_not_found
+from app.core.permission_cache import permission_cache
 from app.domain.entities.role_entity import RoleCreate, RoleOut, RoleUpdate
 from app.infrastructure.repositories.permission_repo import get_permission_by_name_list, get_permission_by_id_list
 from app.infrastructure.schemas.role import Role
@@ -40,6 +41,7 @@ async def update_role(role_id: str, data: RoleUpdate, tennant_id: str) -> Role:
     role.description = data.description
     role.permissions = [PydanticObjectId(p) for p in data.permissions]
     await role.save()
+    await permission_cache.invalidate(tennant_id)
     return role
 
 async def delete_role(role_id: str, tenant_id: str) -> bool:
@@ -48,6 +50,7 @@ async def delete_role(role_id: str, tenant_id: str) -> bool:
         raise raise_not_found(f'Rol {role_id}')
     
     await role.delete()
+    await permission_cache.invalidate(tenant_id)
     return True
 
 async def get_role_by_id(role_id: str, tenant_id: str) -> Role:
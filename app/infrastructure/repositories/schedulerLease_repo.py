@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.infrastructure.schemas.schedulerLease import SchedulerLease
+from app.shared.utils import get_utc_now
+
+
+async def try_acquire_lease(name: str, owner: str, ttl_seconds: int) -> Optional[SchedulerLease]:
+    """
+    Toma el lease si está libre o vencido (o ya es nuestro) e incrementa el fencing token.
+    Devuelve None si otro dueño lo tiene vigente.
+    """
+    now = get_utc_now()
+    try:
+        doc = await SchedulerLease.get_motor_collection().find_one_and_update(
+            {"name": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {
+                "$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds), "heartbeat_at": now},
+                "$inc": {"fencing_token": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # El documento existe y el filtro no coincidió: lease vigente de otro worker
+        return None
+
+    return SchedulerLease.model_validate(doc)
+
+async def renew_lease(name: str, owner: str, fencing_token: int, ttl_seconds: int) -> Optional[SchedulerLease]:
+    """Extiende el lease solo si seguimos siendo el dueño con el mismo token."""
+    now = get_utc_now()
+    doc = await SchedulerLease.get_motor_collection().find_one_and_update(
+        {"name": name, "owner": owner, "fencing_token": fencing_token},
+        {"$set": {"expires_at": now + timedelta(seconds=ttl_seconds), "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return SchedulerLease.model_validate(doc) if doc else None
+
+async def release_lease(name: str, owner: str, fencing_token: int) -> None:
+    await SchedulerLease.get_motor_collection().update_one(
+        {"name": name, "owner": owner, "fencing_token": fencing_token},
+        {"$set": {"owner": None, "expires_at": get_utc_now()}},
+    )
+
+async def save_lease_watermark(name: str, owner: str, fencing_token: int, watermark: datetime) -> bool:
+    """Guarda el watermark solo si seguimos siendo el dueño; nunca lo retrocede."""
+    result = await SchedulerLease.get_motor_collection().update_one(
+        {"name": name, "owner": owner, "fencing_token": fencing_token},
+        {"$max": {"watermark": watermark}},
+    )
+    return result.matched_count == 1
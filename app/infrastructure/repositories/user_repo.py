@@ -129,6 +129,15 @@ async def get_user_by_id(user_id: str, tenant_id: str) -> User | None:
 
     return user
 
+async def get_users_by_ids(user_ids: list[str], tenant_id: str) -> list[User]:
+    ids = list({PydanticObjectId(uid) for uid in user_ids})
+    if not ids:
+        return []
+    return await User.find({
+        "tenant_id": PydanticObjectId(tenant_id),
+        "_id": {"$in": ids}
+    }).to_list()
+
 async def get_admin_user(tenant_id: str) -> User:
     admin_role = await get_role_by_name('admin', tenant_id)
     return await User.find(And(
@@ -0,0 +1,19 @@
+from datetime import datetime
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+from app.shared.utils import get_utc_now
+
+
+class CacheVersion(Document):
+    tenant_id: PydanticObjectId = Field(...)
+    scope: str = Field(...)
+    version: int = Field(default=0)
+    updatedAt: datetime = Field(default_factory=get_utc_now)
+
+    class Settings:
+        name = 'cache_versions'
+        indexes = [
+            IndexModel([("tenant_id", ASCENDING), ("scope", ASCENDING)], name="uniq_cache_version_tenant_scope", unique=True),
+        ]
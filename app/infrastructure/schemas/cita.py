@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from beanie import Document, PydanticObjectId
 from pymongo import IndexModel, ASCENDING, DESCENDING
@@ -22,9 +22,20 @@ class Cita(Document):
     motivo: Optional[str] = Field(default=None, max_length=500)
     canceledBy: Optional[PydanticObjectId] = Field(default=None)
     reminders_sent_marks: List[int] = Field(default_factory=list)
+    # Marca (en horas, como str) -> 'claimed' | 'sent' | 'failed'
+    reminders_status: Dict[str, Literal['claimed', 'sent', 'failed']] = Field(default_factory=dict)
+    # Reserva en curso (marca y momento); se limpia al completar o liberar la marca
+    reminder_claimed_mark: Optional[int] = Field(default=None)
+    reminder_claimed_at: Optional[datetime] = Field(default=None)
     last_reminder_sent_at: Optional[datetime] = Field(default=None)
     auto_canceled_at: Optional[datetime] = Field(default=None)
     motivo_cancelacion: Optional[str] = Field(default=None, max_length=250)
+    # Próxima acción del scheduler de recordatorios (ver reminder_schedule.compute_next_action)
+    next_action_at: Optional[datetime] = Field(default=None)
+    next_action_kind: Optional[Literal['recordatorio', 'auto_cancel']] = Field(default=None)
+    next_action_mark: Optional[int] = Field(default=None)
+    # Fencing token del último líder del scheduler que escribió la cita (ver scheduler_lease)
+    scheduler_fence: Optional[int] = Field(default=None)
 
     class Settings:
         name = "citas"
@@ -37,6 +48,19 @@ class Cita(Document):
                 [("tenant_id", ASCENDING), ("paciente_id", ASCENDING), ("fecha_inicio", DESCENDING)],
                 name="idx_tenant_paciente_fecha_desc",
             ),
+            IndexModel(
+                [("tenant_id", ASCENDING), ("fecha_inicio", DESCENDING), ("_id", DESCENDING)],
+                name="idx_tenant_fecha_id_desc",
+            ),
+            IndexModel(
+                [("next_action_at", ASCENDING), ("_id", ASCENDING)],
+                name="idx_next_action_at_id",
+            ),
+            IndexModel(
+                [("reminder_claimed_at", ASCENDING)],
+                name="idx_reminder_claimed_at",
+                partialFilterExpression={"reminder_claimed_at": {"$type": "date"}},
+            ),
             IndexModel(
                 [
                     ("tenant_id", ASCENDING),
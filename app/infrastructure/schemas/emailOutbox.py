@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+from beanie import Document, PydanticObjectId
+from pydantic import Field, model_validator
+from pymongo import ASCENDING, IndexModel
+
+from app.core.config import settings
+from app.shared.dto.outboxEmail_dto import OutboxRecipient
+from app.shared.utils import get_utc_now
+
+RETENTION_SECONDS = settings.EMAIL_OUTBOX_RETENTION_DAYS * 24 * 60 * 60
+
+
+class EmailOutbox(Document):
+    tenant_id: Optional[PydanticObjectId] = Field(default=None)
+    # Identifica el correo lógico (evento + cita): encolar dos veces no duplica el envío
+    dedupe_key: str = Field(...)
+    # Una personalization de SendGrid por destinatario, con sus sustituciones
+    recipients: List[OutboxRecipient] = Field(...)
+    subject: str = Field(...)
+    html: str = Field(...)
+    status: Literal['pending', 'sending', 'sent', 'failed'] = Field(default='pending')
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=get_utc_now)
+    locked_until: Optional[datetime] = Field(default=None)
+    last_error: Optional[str] = Field(default=None, max_length=500)
+    createdAt: datetime = Field(default_factory=get_utc_now)
+    sentAt: Optional[datetime] = Field(default=None)
+    failedAt: Optional[datetime] = Field(default=None)
+
+    class Settings:
+        name = 'email_outbox'
+        indexes = [
+            IndexModel([("dedupe_key", ASCENDING)], name="uniq_email_outbox_dedupe_key", unique=True),
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="idx_email_outbox_status_next"),
+            # Purga de correos en estado final. La retención debe superar cualquier ventana en
+            # la que se pueda volver a encolar la misma dedupe_key (recordatorios: hasta la cita)
+            IndexModel([("sentAt", ASCENDING)], name="ttl_email_outbox_sent", expireAfterSeconds=RETENTION_SECONDS),
+            IndexModel([("failedAt", ASCENDING)], name="ttl_email_outbox_failed", expireAfterSeconds=RETENTION_SECONDS),
+        ]
+
+    @model_validator(mode="before")
+    @classmethod
+    def legacy_to_as_recipients(cls, data: Any) -> Any:
+        # Filas encoladas antes de las personalizations: un solo `to` con el html ya armado
+        if isinstance(data, dict) and "recipients" not in data and data.get("to"):
+            data = {**data, "recipients": [{"email": data["to"]}]}
+        return data
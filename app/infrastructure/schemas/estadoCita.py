@@ -1,6 +1,7 @@
 from enum import Enum
+from typing import List
 from beanie import Document, PydanticObjectId
-from pydantic import Field
+from pydantic import BaseModel, Field
 
 class ESTADOS_CITA(Enum):
     pendiente=0
@@ -8,6 +9,30 @@ class ESTADOS_CITA(Enum):
     cancelada=2
     atendida=3
 
+class TransicionCita(BaseModel):
+    desde: List[ESTADOS_CITA]
+    hacia: ESTADOS_CITA
+    error: str
+
+# Transiciones permitidas: se aplican con un único find_one_and_update filtrado por `desde`
+TRANSICIONES_CITA = {
+    'confirmar': TransicionCita(
+        desde=[ESTADOS_CITA.pendiente],
+        hacia=ESTADOS_CITA.confirmada,
+        error='La cita tiene un estado distindo a pendiente',
+    ),
+    'atender': TransicionCita(
+        desde=[ESTADOS_CITA.pendiente, ESTADOS_CITA.confirmada],
+        hacia=ESTADOS_CITA.atendida,
+        error='Solo se pueden atender citas pendientes o confirmadas',
+    ),
+    'cancelar': TransicionCita(
+        desde=[ESTADOS_CITA.pendiente, ESTADOS_CITA.confirmada],
+        hacia=ESTADOS_CITA.cancelada,
+        error='La cita ya se encuentra cancelada o atendida',
+    ),
+}
+
 class EstadoCita(Document):
     estado_id: int = Field(..., unique=True)
     nombre: str
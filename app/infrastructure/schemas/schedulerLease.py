@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+from app.shared.utils import get_utc_now
+
+
+class SchedulerLease(Document):
+    name: str = Field(...)
+    owner: Optional[str] = Field(default=None)
+    # Crece en cada cambio de dueño; nunca se reinicia (por eso no hay índice TTL que borre el documento)
+    fencing_token: int = Field(default=0)
+    expires_at: datetime = Field(default_factory=get_utc_now)
+    heartbeat_at: datetime = Field(default_factory=get_utc_now)
+    # Hasta dónde quedó procesado el trabajo del scheduler (último tick completo)
+    watermark: Optional[datetime] = Field(default=None)
+
+    class Settings:
+        name = 'scheduler_leases'
+        indexes = [
+            IndexModel([("name", ASCENDING)], name="uniq_scheduler_lease_name", unique=True),
+        ]
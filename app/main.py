@@ -7,10 +7,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.application.services.email_outbox_service import email_outbox_worker
 from app.application.services.reminder_service import reminder_scheduler_loop
+from app.application.services.tenant_service import tenant_resolver
 from app.core.db import init_db
 from app.core.exceptions import internal_errror_handler
 from app.core.config import settings
+from app.infrastructure.notifiers.email_notifier import close_email_client
+from app.infrastructure.repositories.officeConfig_repo import office_settings_cache
+from app.shared.mail_templates import mail_renderer
 from app.presentation.api.v1 import (
     auth_routes,
     cita_routes,
@@ -24,7 +29,11 @@ from app.presentation.api.v1 import (
     tratamiento_routes,
     user_routes,
     reportes_citas_routes,
+    scheduler_routes,
+    ws_routes,
 )
+from app.application.websockets.broker import ws_broker
+from app.application.websockets.manager import manager
 from app.application.websockets.routes import ws_router
 
 # 👇 importante: orquestador del seed
@@ -39,17 +48,26 @@ async def lifespan(app: FastAPI):
     # Startup: conecta DB y levanta rutas
     await init_db()
     print("\nConectando a la base de datos\n")
+    await tenant_resolver.warm()
+    await office_settings_cache.load_all()
+    mail_renderer.load_all()
+    await ws_broker.start(manager.deliver)
 
     # Entrega el control a FastAPI (para health check OK)
     reminders_task = asyncio.create_task(reminder_scheduler_loop())
+    email_task = asyncio.create_task(email_outbox_worker.run())
+    ws_heartbeat_task = asyncio.create_task(manager.heartbeat_loop())
     try:
         yield
     finally:
-        reminders_task.cancel()
-        try:
-            await reminders_task
-        except asyncio.CancelledError:
-            pass
+        for task in (reminders_task, email_task, ws_heartbeat_task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await ws_broker.stop()
+        await close_email_client()
     
 
 app = FastAPI(lifespan=lifespan)
@@ -78,6 +96,8 @@ app.include_router(tratamiento_routes.router)
 app.include_router(historial_routes.router)
 app.include_router(ws_router)
 app.include_router(reportes_citas_routes.router)
+app.include_router(scheduler_routes.router)
+app.include_router(ws_routes.router)
 
 # # Static
 # app.mount("/static", StaticFiles(directory="static"))
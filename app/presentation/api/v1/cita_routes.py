@@ -1,13 +1,13 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Query
 
 from app.application.services.notification_service import notificar_evento_cita
 from app.core.auth_utils import get_tenant, get_user_and_tenant
-from app.core.exceptions import raise_not_found
-from app.core.security import require_permission
-from app.domain.entities.cita_entity import CitaCreate, CitaOut
-from app.infrastructure.repositories.cita_repo import cancel_cita, cita_to_out, confirm_cita, create_cita, get_citas_by_especialista_id, get_citas_by_paciente_id, get_citas_by_tenant_id, get_pacientes_con_citas_por_especialista, send_cita_email, set_attended_cita
-from app.infrastructure.repositories.role_repo import get_role_by_id
+from app.core.security import get_auth_context, require_permission
+from app.domain.entities.cita_entity import CitaCreate, CitaOut, CitaPageOut
+from app.infrastructure.repositories.cita_repo import cancel_cita, cita_to_out, citas_to_out_many, confirm_cita, create_cita, get_citas_by_especialista_id, get_citas_by_paciente_id, get_citas_page_by_tenant_id, get_pacientes_con_citas_por_especialista, send_cita_email, set_attended_cita
+from app.shared.dto.authContext_dto import AuthContext
 from app.shared.dto.mailData_dto import MailData
 
 
@@ -18,7 +18,6 @@ async def agendar_cita(data: CitaCreate, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     cita = await create_cita(data, tenant_id)
     cita_out = await cita_to_out(cita)
-    # role = await get_role_by_id(str(user.role), tenant_id)
     await notificar_evento_cita(
         tenant_id=tenant_id,
         action='created',
@@ -29,48 +28,59 @@ async def agendar_cita(data: CitaCreate, ctx=Depends(get_user_and_tenant)):
     return cita_out
 
 @router.get('/mis-citas', response_model=list[CitaOut])
-async def listar_mis_citas(ctx=Depends(get_user_and_tenant)):
-    user, tenant_id = ctx
-    role = await get_role_by_id(str(user.role), tenant_id)
-    if not role: 
-        raise raise_not_found(f'Rol {user.role}')
+async def listar_mis_citas(auth: AuthContext = Depends(get_auth_context)):
+    user, tenant_id = auth.user, auth.tenant_id
 
     citas = []
-    if role.name == 'paciente':
+    if auth.role_name == 'paciente':
         citas = await get_citas_by_paciente_id(user.id, tenant_id)
 
-    if role.name == 'especialista':
+    if auth.role_name == 'especialista':
         citas = await get_citas_by_especialista_id(user.id, tenant_id)
 
-    return [await cita_to_out(c) for c in citas]
+    return await citas_to_out_many(citas)
 
 @router.get('/especialista/{especialista_id}', response_model=list[CitaOut])
 async def listar_mis_citas(especialista_id: str, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     citas = await get_citas_by_especialista_id(especialista_id, tenant_id)
 
-    return [await cita_to_out(c) for c in citas]
+    return await citas_to_out_many(citas)
 
 @router.get('/paciente/{paciente_id}', response_model=list[CitaOut])
 async def listar_mis_citas(paciente_id: str, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     citas = await get_citas_by_paciente_id(paciente_id, tenant_id)
 
-    return [await cita_to_out(c) for c in citas]
-
-@router.get('/admin', response_model=list[CitaOut], dependencies=[Depends(require_permission('read_appointments'))])
-async def listar_citas_todas_admin(ctx=Depends(get_user_and_tenant)):
-    user, tenant_id = ctx
+    return await citas_to_out_many(citas)
+
+@router.get('/admin', response_model=CitaPageOut, dependencies=[Depends(require_permission('read_appointments'))])
+async def listar_citas_todas_admin(
+    cursor: Optional[str] = Query(default=None, description='Cursor opaco devuelto en next_cursor'),
+    limit: int = Query(default=50, ge=1, le=500),
+    desde: Optional[datetime] = Query(default=None),
+    hasta: Optional[datetime] = Query(default=None),
+    estado_id: Optional[int] = Query(default=None),
+    especialista_id: Optional[str] = Query(default=None),
+    paciente_id: Optional[str] = Query(default=None),
+    auth: AuthContext = Depends(get_auth_context)
+):
+    tenant_id = auth.tenant_id
 
-    role = await get_role_by_id(str(user.role), tenant_id)
-    if not role: 
-        raise raise_not_found(f'Rol {user.role}')
-    
-    if role.name != 'admin':
-        return []
+    if auth.role_name != 'admin':
+        return CitaPageOut(items=[], next_cursor=None)
     
-    citas = await get_citas_by_tenant_id(tenant_id)
-    return [await cita_to_out(c) for c in citas]
+    citas, next_cursor = await get_citas_page_by_tenant_id(
+        tenant_id,
+        cursor=cursor,
+        limit=limit,
+        desde=desde,
+        hasta=hasta,
+        estado_id=estado_id,
+        especialista_id=especialista_id,
+        paciente_id=paciente_id,
+    )
+    return CitaPageOut(items=await citas_to_out_many(citas), next_cursor=next_cursor)
 
 @router.put('/cancelar/{cita_id}/{motivo}', response_model=CitaOut, dependencies=[Depends(require_permission('cancel_appointments'))])
 async def cancelar_cita(cita_id: str, motivo: str, ctx=Depends(get_user_and_tenant)):
@@ -118,8 +128,8 @@ async def pacientes_con_citas_especialista(
     especialista_id: str,
     estados: str = Query(default='confirmada,pendiente', description='CSV de estados, ej: "confirmada,pendiente"'),
     limit: int = Query(default=10, ge=1, le=2000),
+    tenant_id: str = Depends(get_tenant),
 ):
-    tenant_id = await get_tenant()
     estados_list: List[str] = [s.strip() for s in estados.split(',') if s.strip()]
     items = await get_pacientes_con_citas_por_especialista(tenant_id, especialista_id, estados_list, limit)
     return {'items': items, 'count': len(items)}
\ No newline at end of file
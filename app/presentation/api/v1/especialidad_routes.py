@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, status
+from datetime import datetime, timezone
+from typing import Optional
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, Query, status
 
-from app.core.auth_utils import get_user_and_tenant
+from app.application.services.availability_service import find_next_available
+from app.core.auth_utils import get_tenant, get_user_and_tenant
+from app.core.exceptions import raise_duplicate_entity, raise_not_found
 from app.core.security import require_permission
-from app.domain.entities.especialidad_entity import EspecialidadCreate, EspecialidadOut, EspecialidadUpdate, PresignEspecialidadReq, RegisterEspecialidadImageReq
-from app.infrastructure.repositories.especialidad_repo import create_especialidad, delete_especialidad, especialidad_to_out, get_especialidades_by_tenant, update_especialidad
-from app.infrastructure.repositories.office_repo import get_benedetta_office
+from app.domain.entities.especialidad_entity import EspecialidadCreate, EspecialidadOut, EspecialidadUpdate, NextAvailableOut, NextAvailableSlotOut, PresignEspecialidadReq, RegisterEspecialidadImageReq
+from app.infrastructure.repositories.especialidad_repo import create_especialidad, delete_especialidad, especialidad_to_out, get_especialidad_by_id, get_especialidades_by_tenant, update_especialidad
+from app.infrastructure.repositories.officeConfig_repo import get_office_settings
 
 
 router = APIRouter(prefix='/especialidades', tags=['Especialidades'])
@@ -16,11 +21,48 @@ async def crear_especialidad(data: EspecialidadCreate, ctx=Depends(get_user_and_
     return especialidad_to_out(created)
 
 @router.get('/', response_model=list[EspecialidadOut])
-async def listar_especialidades():
-    office = await get_benedetta_office()
-    especialidades = await get_especialidades_by_tenant(str(office.id))
+async def listar_especialidades(tenant_id: str = Depends(get_tenant)):
+    especialidades = await get_especialidades_by_tenant(tenant_id)
     return [especialidad_to_out(e) for e in especialidades]
 
+@router.get('/{especialidad_id}/next-available', response_model=NextAvailableOut, dependencies=[Depends(require_permission('read_especialists'))])
+async def buscar_proximos_disponibles(
+    especialidad_id: str,
+    desde: Optional[datetime] = Query(default=None, alias='from'),
+    n: int = Query(default=5, ge=1, le=50),
+    ctx=Depends(get_user_and_tenant)
+):
+    user, tenant_id = ctx
+    try:
+        PydanticObjectId(especialidad_id)
+    except Exception:
+        raise raise_duplicate_entity('especialidad_id inválido.')
+
+    if not await get_especialidad_by_id(especialidad_id, tenant_id):
+        raise raise_not_found('Especialidad')
+
+    office_settings = await get_office_settings(tenant_id)
+    tz = office_settings.office_timezone
+
+    desde_utc = datetime.now(timezone.utc)
+    if desde:
+        desde_utc = (desde if desde.tzinfo else desde.replace(tzinfo=tz)).astimezone(timezone.utc)
+
+    encontrados = await find_next_available(especialidad_id, tenant_id, desde_utc, n)
+    return NextAvailableOut(
+        especialidad_id=especialidad_id,
+        timezone=tz.key,
+        slots=[
+            NextAvailableSlotOut(
+                especialista_id=str(esp.id),
+                especialista_name=nombre,
+                fecha_inicio=ini.astimezone(tz),
+                fecha_fin=fin.astimezone(tz)
+            )
+            for esp, nombre, ini, fin in encontrados
+        ]
+    )
+
 @router.put('/{especialidad_id}', response_model=EspecialidadOut, dependencies=[Depends(require_permission('update_specialties'))])
 async def editar_especialidad(especialidad_id: str, data: EspecialidadUpdate, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
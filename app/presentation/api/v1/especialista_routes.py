@@ -1,15 +1,20 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, Query, status
 
+from app.application.services.availability_service import get_free_slots
 from app.core.auth_utils import get_user_and_tenant
-from app.core.security import require_permission
-from app.domain.entities.especialista_entity import EspecialistaCreate, EspecialistaCreateWithUser, EspecialistaOut, EspecialistaProfileOut, EspecialistaUpdate, EspecialistaUpdateWithUser, InactividadPayload
-from app.infrastructure.repositories.especialista_repo import agregar_inactividad_y_verificar, create_especialista, delete_especialista, eliminar_inactividad, especialista_to_out, get_especialista_by_especialidad_id, get_especialista_by_user_id, get_especialista_profile_by_id, get_especialistas_by_tenant, get_especialistas_with_user, re_verificar_inactividad, update_especialista
+from app.core.exceptions import raise_duplicate_entity, raise_not_found
+from app.core.security import require_permission, require_permissions
+from app.domain.entities.especialista_entity import EspecialistaCreate, EspecialistaCreateWithUser, EspecialistaOut, EspecialistaProfileOut, EspecialistaUpdate, EspecialistaUpdateWithUser, InactividadPayload, SlotsOut
+from app.infrastructure.repositories.especialista_repo import agregar_inactividad_y_verificar, create_especialista, delete_especialista, eliminar_inactividad, especialista_to_out, get_especialista_by_especialidad_id, get_especialista_by_id, get_especialista_by_user_id, get_especialista_profile_by_id, get_especialistas_by_tenant, get_especialistas_with_user, re_verificar_inactividad, update_especialista
+from app.infrastructure.repositories.officeConfig_repo import get_office_settings
 from app.infrastructure.repositories.user_repo import create_user, update_user, user_to_out
 
 
 router = APIRouter(prefix='/especialistas', tags=['Especialistas'])
 
+MAX_SLOTS_RANGE = timedelta(days=62)
+
 @router.get('/perfil/{especialista_id}', response_model=EspecialistaProfileOut, dependencies=[
     Depends(require_permission('read_especialists')),
 ])
@@ -18,10 +23,7 @@ async def obtener_perfil_especialista_by_id(especialista_id: str, ctx=Depends(ge
     especialista = await get_especialista_profile_by_id(especialista_id, tenant_id)
     return especialista
 
-@router.get('/with-user', response_model=list[EspecialistaProfileOut], dependencies=[
-    Depends(require_permission('read_especialists')),
-    Depends(require_permission('read_users'))
-])
+@router.get('/with-user', response_model=list[EspecialistaProfileOut], dependencies=[Depends(require_permissions('read_especialists', 'read_users'))])
 async def listar_especialistas_with_user(ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     especialistas = await get_especialistas_with_user(tenant_id)
@@ -48,16 +50,46 @@ async def actualizar_especialista(especialista_id: str, payload:EspecialistaUpda
     especialista = await update_especialista(especialista_id, payload, tenant_id)
     return especialista_to_out(especialista)
 
-@router.post('/perfil', response_model=EspecialistaOut, dependencies=[
-    Depends(require_permission('create_users')),
-    Depends(require_permission('create_especialists'))
-])
+@router.post('/perfil', response_model=EspecialistaOut, dependencies=[Depends(require_permissions('create_users', 'create_especialists'))])
 async def registrar_especialista_perfil(payload: EspecialistaCreateWithUser, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     new_user = await create_user(payload.user, tenant_id)
     created = await create_especialista(payload.especialista, user_id=str(new_user.id), tenant_id=tenant_id)
     return especialista_to_out(created)
 
+@router.get('/{especialista_id}/slots', response_model=SlotsOut, dependencies=[Depends(require_permission('read_especialists'))])
+async def listar_slots_disponibles(
+    especialista_id: str,
+    desde: datetime = Query(..., alias='from'),
+    hasta: datetime = Query(..., alias='to'),
+    ctx=Depends(get_user_and_tenant)
+):
+    user, tenant_id = ctx
+    office_settings = await get_office_settings(tenant_id)
+    tz = office_settings.office_timezone
+
+    desde_utc = (desde if desde.tzinfo else desde.replace(tzinfo=tz)).astimezone(timezone.utc)
+    hasta_utc = (hasta if hasta.tzinfo else hasta.replace(tzinfo=tz)).astimezone(timezone.utc)
+    if hasta_utc <= desde_utc:
+        raise raise_duplicate_entity('El rango de fechas es inválido.')
+    if hasta_utc - desde_utc > MAX_SLOTS_RANGE:
+        raise raise_duplicate_entity(f'El rango no puede superar {MAX_SLOTS_RANGE.days} días.')
+
+    especialista = await get_especialista_by_id(especialista_id, tenant_id)
+    if not especialista:
+        raise raise_not_found('Especialista')
+
+    slots = await get_free_slots(
+        especialista_id, tenant_id, desde_utc, hasta_utc,
+        office_settings=office_settings, especialista=especialista
+    )
+    return SlotsOut(
+        especialista_id=especialista_id,
+        timezone=tz.key,
+        duration_minutes=int(office_settings.duracion_cita.total_seconds() // 60),
+        slots=[ini.astimezone(tz) for ini, _ in slots]
+    )
+
 @router.get('/{user_id}', response_model=EspecialistaOut, dependencies=[Depends(require_permission('read_especialists'))])
 async def obtener_especialista_by_user_id(user_id: str, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
@@ -70,19 +102,13 @@ async def listar_especialistas(ctx=Depends(get_user_and_tenant)):
     especialistas = await get_especialistas_by_tenant(tenant_id)
     return [especialista_to_out(e) for e in especialistas]
 
-@router.delete('/{especialista_id}', status_code=status.HTTP_204_NO_CONTENT, dependencies=[
-    Depends(require_permission('delete_users')),
-    Depends(require_permission('delete_especialists'))
-])
+@router.delete('/{especialista_id}', status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permissions('delete_users', 'delete_especialists'))])
 async def eliminar_especialista(especialista_id: str, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     await delete_especialista(especialista_id, tenant_id)
     return None
 
-@router.put('/perfil/{especialista_id}', response_model=EspecialistaOut, dependencies=[
-    Depends(require_permission('update_users')),
-    Depends(require_permission('update_especialists')),
-])
+@router.put('/perfil/{especialista_id}', response_model=EspecialistaOut, dependencies=[Depends(require_permissions('update_users', 'update_especialists'))])
 async def admin_edita_especialista(especialista_id: str, payload: EspecialistaUpdateWithUser, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     especialista = await update_especialista(especialista_id, payload.especialista, tenant_id)
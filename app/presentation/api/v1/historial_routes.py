@@ -16,14 +16,12 @@ def historial_presign_upload(body: PresignReq):
     return presign_upload(body)
 
 @router.post('/upload/register')
-async def historial_register_image(body: RegisterImageReq):
+async def historial_register_image(body: RegisterImageReq, tenant_id: str = Depends(get_tenant)):
     # user, tenant_id = ctx
-    tenant_id = await get_tenant()
     return await register_image(body, tenant_id)
 
 @router.post('/upload/register-attach')
-async def historial_register_attachment(body: RegisterImageReq):
-    tenant_id = await get_tenant()
+async def historial_register_attachment(body: RegisterImageReq, tenant_id: str = Depends(get_tenant)):
     return await register_attachment(body, tenant_id)
 
 @router.get('/images/signed-get')
@@ -31,48 +29,40 @@ def historial_signed_get(key: str = Query(...)):
     return signed_get(key)
 
 @router.post('/')
-async def crear_historial(body: HistorialCreate):
+async def crear_historial(body: HistorialCreate, tenant_id: str = Depends(get_tenant)):
     # user, tenant_id = ctx
-    tenant_id = await get_tenant()
     return await create_historial(body, tenant_id)
     
 
 @router.post('/{historial_id}/entradas/{tratamiento_id}')
-async def historial_add_entrada(historial_id: str, tratamiento_id: str, body: EntradaAdd):
+async def historial_add_entrada(historial_id: str, tratamiento_id: str, body: EntradaAdd, tenant_id: str = Depends(get_tenant)):
     # user, tenant_id = ctx
-    tenant_id = await get_tenant()
     return await add_entrada(historial_id, tratamiento_id, tenant_id, body)
     
 @router.put('/{historial_id}/anamnesis')
-async def update_anamnesis(historial_id: str, body: UpdateHistorial):
-    tenant_id = await get_tenant()
+async def update_anamnesis(historial_id: str, body: UpdateHistorial, tenant_id: str = Depends(get_tenant)):
     return await update_historial_anamnesis(body, tenant_id, historial_id)
 
 
 @router.get('/{paciente_id}')
-async def obtener_historial_by_paciente_id(paciente_id: str):
-    tenant_id = await get_tenant()
+async def obtener_historial_by_paciente_id(paciente_id: str, tenant_id: str = Depends(get_tenant)):
     historial = await get_historial_by_paciente_id(paciente_id, tenant_id)
     return historial
 
 @router.post('/{historial_id}/tratamientos')
-async def historial_add_tratamiento(historial_id: str, body: TratamientoAdd):
-    tenant_id = await get_tenant()
+async def historial_add_tratamiento(historial_id: str, body: TratamientoAdd, tenant_id: str = Depends(get_tenant)):
     return await add_tratamiento(historial_id,tenant_id, body)
 
 @router.post('/{historial_id}/tratamientos/{tratamiento_id}/anamnesis:set-once')
-async def set_anamnesis_once_route(historial_id: str, tratamiento_id: str, body: TratamientoAdd):
-    tenant_id = await get_tenant()
+async def set_anamnesis_once_route(historial_id: str, tratamiento_id: str, body: TratamientoAdd, tenant_id: str = Depends(get_tenant)):
     return await set_anamnesis_once(historial_id, tratamiento_id, tenant_id, body)
 
 @router.put("/{historial_id}/tratamientos/{tratamiento_id}/entradas/{entrada_id}/recomendaciones")
-async def put_recomendaciones(historial_id: str, tratamiento_id: str, entrada_id: str, body: RecomendacionesUpdate):
-    tenant_id = await get_tenant()
+async def put_recomendaciones(historial_id: str, tratamiento_id: str, entrada_id: str, body: RecomendacionesUpdate, tenant_id: str = Depends(get_tenant)):
     return await set_recomendaciones(historial_id, tratamiento_id, entrada_id, body.recomendaciones, tenant_id)
 
 @router.get("/{historial_id}/tratamientos/{tratamiento_id}/print", response_class=StreamingResponse)
-async def print_tratamiento_pdf(historial_id: str, tratamiento_id: str, download: bool = Query(False)):
-    tenant_id = await get_tenant()
+async def print_tratamiento_pdf(historial_id: str, tratamiento_id: str, download: bool = Query(False), tenant_id: str = Depends(get_tenant)):
     pdf_bytes = await generate_tratamiento_pdf(historial_id, tratamiento_id, tenant_id)
     dispo = 'attachment' if download else 'inline'
     headers = {"Content-Disposition": f'{dispo}; filename="historia_clinica_{tratamiento_id}.pdf"'}
@@ -4,7 +4,6 @@ from app.core.auth_utils import get_tenant, get_user_and_tenant
 from app.core.security import require_permission
 from app.domain.entities.officeConfig_entity import OfficeConfigOut, OfficeConfigUpdate
 from app.infrastructure.repositories.officeConfig_repo import get_office_config, office_config_to_out, update_office_config
-from app.infrastructure.repositories.office_repo import get_benedetta_office
 
 
 router = APIRouter(prefix='/config', tags=['Configuracion'])
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 
 from app.core.auth_utils import get_user_and_tenant
 from app.core.exceptions import raise_not_found
-from app.core.security import get_current_user, require_permission
+from app.core.security import get_current_user, require_permission, require_permissions
 from app.domain.entities.paciente_entity import  PacienteAutoCreate, PacienteCreate, PacienteCreateWithUser, PacienteOut, PacienteProfileOut, PacienteUpdate, PacienteUpdateWithUser
 from app.infrastructure.repositories.paciente_repo import create_paciente, delete_paciente, get_paciente_by_user_id, get_paciente_profile_by_id, get_pacientes_by_tenant, get_pacientes_with_user, paciente_to_out, update_paciente
 from app.infrastructure.repositories.user_repo import create_user, update_user, user_to_out
@@ -19,30 +19,21 @@ async def obtener_perfil_paciente_by_id(paciente_id: str, ctx=Depends(get_user_a
     paciente = await get_paciente_profile_by_id(paciente_id, tenant_id)
     return paciente
 
-@router.get('/with-user', response_model=list[PacienteProfileOut], dependencies=[
-    Depends(require_permission('read_patients')),
-    Depends(require_permission('read_users')),
-])
+@router.get('/with-user', response_model=list[PacienteProfileOut], dependencies=[Depends(require_permissions('read_patients', 'read_users'))])
 async def listar_pacientes_with_user(ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     pacientes = await get_pacientes_with_user(tenant_id)
     return pacientes
 
 # region PERFIL
-@router.post('/perfil', response_model=PacienteOut, dependencies=[
-    Depends(require_permission('create_patients')),
-    Depends(require_permission('create_users')),
-])
+@router.post('/perfil', response_model=PacienteOut, dependencies=[Depends(require_permissions('create_patients', 'create_users'))])
 async def crear_perfil_paciente(payload: PacienteCreateWithUser, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     new_user = await create_user(payload.user, tenant_id)
     created = await create_paciente(payload.paciente, user_id=str(new_user.id), tenant_id=tenant_id)
     return paciente_to_out(created)
 
-@router.put('/perfil/{paciente_id}', response_model=PacienteOut, dependencies=[
-    Depends(require_permission('update_users')),
-    Depends(require_permission('update_patients')),
-])
+@router.put('/perfil/{paciente_id}', response_model=PacienteOut, dependencies=[Depends(require_permissions('update_users', 'update_patients'))])
 async def editar_perfil_paciente(paciente_id: str, payload: PacienteUpdateWithUser, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     paciente = await update_paciente(paciente_id, payload.paciente, tenant_id)
@@ -93,9 +84,7 @@ async def obtener_paciente_by_user_id(user_id: str, ctx=Depends(get_user_and_ten
         raise raise_not_found(f'Paciente con id de usuario: {user_id}')
     return paciente_to_out(paciente)
 
-@router.delete('/{paciente_id}', status_code=status.HTTP_204_NO_CONTENT, dependencies=[
-    Depends(require_permission('delete_users')),
-    Depends(require_permission('delete_patients'))])
+@router.delete('/{paciente_id}', status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permissions('delete_users', 'delete_patients'))])
 async def eliminar_paciente(paciente_id: str, ctx=Depends(get_user_and_tenant)):
     user, tenant_id = ctx
     await delete_paciente(paciente_id, tenant_id)
@@ -15,24 +15,24 @@ async def reportes_overview(
     from_date: date | None = Query(None, description="YYYY-MM-DD"),
     to_date: date | None = Query(None, description="YYYY-MM-DD"),
     # ctx=Depends(get_user_and_tenant),
+    tenant_id: str = Depends(get_tenant),
 ) -> Dict[str, Any]:
-    tenant_id = await get_tenant()
     return await overview_report(tenant_id, from_date, to_date)
 
 @router.get('/por-estado-especialista')
 async def reportes_por_estado_especialista(
     especialista: str = Query(..., description='Nombre visible del especialista'),
     from_date: date | None = Query(None),
-    to_date: date | None = Query(None)
+    to_date: date | None = Query(None),
+    tenant_id: str = Depends(get_tenant),
 ) -> List[Dict[str, Any]]:
-    tenant_id = await get_tenant()
     return await por_estado_de_especialista(tenant_id, from_date, to_date, especialista)
 
 @router.get('/por-estado-especialidad')
 async def reportes_por_estado_especialidad(
     especialidad: str = Query(..., description='Nombre visible de la especialidad'),
     from_date: date | None = Query(None),
-    to_date: date | None = Query(None)
+    to_date: date | None = Query(None),
+    tenant_id: str = Depends(get_tenant),
 ) -> List[Dict[str, Any]]:
-    tenant_id = await get_tenant()
     return await por_estado_de_especialidad(tenant_id, from_date, to_date, especialidad)
\ No newline at end of file
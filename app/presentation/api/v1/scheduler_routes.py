@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+
+from app.application.services.reminder_service import get_scheduler_metrics
+from app.core.exceptions import raise_forbidden
+from app.core.security import get_auth_context
+from app.domain.entities.scheduler_entity import SchedulerMetricsOut
+from app.shared.dto.authContext_dto import AuthContext
+
+
+router = APIRouter(prefix='/scheduler', tags=['Scheduler'])
+
+
+@router.get('/metrics', response_model=SchedulerMetricsOut)
+async def metricas_scheduler(auth: AuthContext = Depends(get_auth_context)):
+    # Métricas del worker que atiende la request; el líder reporta is_leader=True
+    if auth.role_name != 'admin':
+        raise raise_forbidden()
+
+    return get_scheduler_metrics()
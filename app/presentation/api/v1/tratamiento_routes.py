@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, status
 
-from app.core.auth_utils import get_user_and_tenant
+from app.core.auth_utils import get_tenant, get_user_and_tenant
 from app.core.security import require_permission
 from app.domain.entities.tratamiento_entity import TratamientoCreate, TratamientoOut, TratamientoUpdate
-from app.infrastructure.repositories.office_repo import get_benedetta_office
 from app.infrastructure.repositories.tratamiento_repo import create_tratamiento, delete_tratamiento, get_tratamientos_by_tenant, tratamiento_to_out, update_tratamiento
 
 
@@ -16,9 +15,8 @@ async def crear_tratamiento(data: TratamientoCreate, ctx=Depends(get_user_and_te
     return tratamiento_to_out(created)
 
 @router.get('/', response_model=list[TratamientoOut])
-async def listar_tratamientos():
-    office = await get_benedetta_office()
-    tratamientos = await get_tratamientos_by_tenant(str(office.id))
+async def listar_tratamientos(tenant_id: str = Depends(get_tenant)):
+    tratamientos = await get_tratamientos_by_tenant(tenant_id)
     return [tratamiento_to_out(t) for t in tratamientos]
 
 @router.put('/{tratamiento_id}', response_model=TratamientoOut, dependencies=[Depends(require_permission('update_tratamientos'))])
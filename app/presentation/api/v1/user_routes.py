@@ -1,9 +1,8 @@
 from fastapi import APIRouter, Depends, status
 
-from app.core.auth_utils import get_user_and_tenant
+from app.core.auth_utils import get_tenant, get_user_and_tenant
 from app.core.security import require_permission
 from app.domain.entities.user_entity import UserBase, UserOut, UserUpdate
-from app.infrastructure.repositories.office_repo import get_benedetta_office
 from app.infrastructure.repositories.user_repo import create_user, delete_user, get_users_by_tenant, update_user, user_to_out
 
 
@@ -16,9 +15,8 @@ async def listar_usuarios(ctx=Depends(get_user_and_tenant)):
     return [user_to_out(u) for u in usuarios]
 
 @router.post('/', response_model=UserOut)
-async def crear_usuario(payload: UserBase):
-    office = await get_benedetta_office()
-    user = await create_user(payload, str(office.id))
+async def crear_usuario(payload: UserBase, tenant_id: str = Depends(get_tenant)):
+    user = await create_user(payload, tenant_id)
     return user_to_out(user)
 
 @router.delete('/{user_id}', status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_permission('delete_users'))])
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from app.application.websockets.manager import manager
+from app.core.exceptions import raise_forbidden
+from app.core.security import get_auth_context
+from app.domain.entities.ws_entity import WSMetricsOut
+from app.shared.dto.authContext_dto import AuthContext
+
+
+router = APIRouter(prefix='/ws', tags=['WebSocket'])
+
+
+@router.get('/metrics', response_model=WSMetricsOut)
+async def metricas_ws(auth: AuthContext = Depends(get_auth_context)):
+    # Gauges del worker que atiende la request, solo salas del tenant del admin
+    if auth.role_name != 'admin':
+        raise raise_forbidden()
+
+    rooms = manager.gauges(prefix=f'tenant:{auth.tenant_id}')
+    return WSMetricsOut(
+        connections=len(manager.connections),
+        rooms=rooms,
+        reaped=manager.reaped,
+        dropped_frames=manager.total_dropped_frames(),
+        ping_interval_seconds=manager.ping_interval,
+        idle_timeout_seconds=manager.idle_timeout,
+    )
@@ -0,0 +1,29 @@
+import asyncio
+from datetime import datetime, timezone
+from app.application.services.reminder_schedule import next_action_fields
+from app.core.db import init_db
+from app.infrastructure.schemas.cita import Cita
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
+
+async def backfill_next_action():
+    await init_db()
+    now = datetime.now(timezone.utc)
+    # Solo las pendientes futuras pueden tener acciones programadas
+    citas = await Cita.find({
+        "estado_id": ESTADOS_CITA.pendiente.value,
+        "fecha_inicio": {"$gt": now},
+    }).to_list()
+
+    print(f"Citas pendientes a programar: {len(citas)}")
+
+    programadas = 0
+    for cita in citas:
+        campos = next_action_fields(cita.fecha_inicio, cita.estado_id, cita.reminders_sent_marks, now)
+        await cita.set(campos)
+        if campos["next_action_at"] is not None:
+            programadas += 1
+
+    print(f"Citas con próxima acción: {programadas}")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_next_action())
@@ -0,0 +1,104 @@
+# app/scripts/bench_citas_to_out.py
+# Cuenta las consultas que emite citas_to_out_many para lotes de distinto tamaño.
+# Uso: python -m app.scripts.bench_citas_to_out
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.db import init_db
+from app.infrastructure.repositories.cita_repo import citas_to_out_many
+from app.infrastructure.schemas.cita import Cita
+from app.infrastructure.schemas.especialidad import Especialidad
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA, EstadoCita
+from app.infrastructure.schemas.officeConfig import OfficeConfig
+from app.infrastructure.schemas.user import User
+
+SIZES = [10, 100, 1000, 10000]
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name in ('find', 'aggregate', 'getMore'):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def _seed(tenant_id: PydanticObjectId):
+    await OfficeConfig(name='office_timezone', value='America/La_Paz', tenant_id=tenant_id).insert()
+    for e in ESTADOS_CITA:
+        await EstadoCita(estado_id=e.value, nombre=e.name, descripcion=e.name, tenant_id=tenant_id).insert()
+
+    especialidades = []
+    for i in range(3):
+        especialidades.append(await Especialidad(nombre=f'bench-{i}', descripcion='bench', tenant_id=tenant_id).insert())
+
+    admin = await User(
+        name='admin', lastname='bench', ci='0', phone='0', email='admin@example.com',
+        password='x', role=PydanticObjectId(), tenant_id=tenant_id
+    ).insert()
+    return especialidades, admin
+
+
+def _build_citas(n: int, tenant_id: PydanticObjectId, especialidades, admin) -> list[Cita]:
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    citas = []
+    for i in range(n):
+        inicio = base + timedelta(minutes=45 * i)
+        estado = list(ESTADOS_CITA)[i % len(ESTADOS_CITA)]
+        citas.append(Cita(
+            id=PydanticObjectId(),
+            tenant_id=tenant_id,
+            paciente_id=PydanticObjectId(),
+            especialista_id=PydanticObjectId(),
+            especialidad_id=especialidades[i % len(especialidades)].id,
+            paciente_name=f'Paciente {i}',
+            especialista_name='Especialista',
+            fecha_inicio=inicio,
+            fecha_fin=inicio + timedelta(minutes=45),
+            duration_minutes=45,
+            estado_id=estado.value,
+            canceledBy=admin.id if estado == ESTADOS_CITA.cancelada else None,
+        ))
+    return citas
+
+
+async def main():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=[counter])
+    db_name = f'{settings.DB_NAME}_bench_citas_to_out'
+    db = client[db_name]
+    await client.drop_database(db_name)
+    await init_db(db)
+
+    tenant_id = PydanticObjectId()
+    try:
+        especialidades, admin = await _seed(tenant_id)
+
+        print(f'{"citas":>8} {"consultas":>10} {"ms":>10}')
+        for n in SIZES:
+            citas = _build_citas(n, tenant_id, especialidades, admin)
+            counter.count = 0
+            t0 = time.perf_counter()
+            out = await citas_to_out_many(citas)
+            elapsed = (time.perf_counter() - t0) * 1000
+            assert len(out) == n
+            print(f'{n:>8} {counter.count:>10} {elapsed:>10.1f}')
+    finally:
+        await client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+# app/scripts/bench_create_cita.py
+# Mide la latencia p50/p99 de create_cita contra una base desechable.
+# Correr en el commit anterior y en el actual para comparar.
+# Uso: python -m app.scripts.bench_create_cita [n]
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from beanie import PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.db import init_db
+from app.domain.entities.cita_entity import CitaCreate
+from app.infrastructure.repositories.cita_repo import create_cita
+from app.infrastructure.schemas.especialidad import Especialidad
+from app.infrastructure.schemas.especialista import Especialista
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA, EstadoCita
+from app.infrastructure.schemas.officeConfig import OfficeConfig
+from app.infrastructure.schemas.paciente import Paciente
+from app.infrastructure.schemas.user import User
+
+OFFICE_CONFIGS = {
+    'duracion_cita_minutos': '45',
+    'confirmacion_automatica': '0',
+    'correos_encendidos': '0',
+    'office_timezone': 'America/La_Paz',
+}
+
+
+async def _seed(tenant_id: PydanticObjectId):
+    for name, value in OFFICE_CONFIGS.items():
+        await OfficeConfig(name=name, value=value, tenant_id=tenant_id).insert()
+    for e in ESTADOS_CITA:
+        await EstadoCita(estado_id=e.value, nombre=e.name, descripcion=e.name, tenant_id=tenant_id).insert()
+
+    role_id = PydanticObjectId()
+    paciente_user = await User(
+        name='Paciente', lastname='Bench', ci='1', phone='1', email='paciente@example.com',
+        password='x', role=role_id, tenant_id=tenant_id
+    ).insert()
+    especialista_user = await User(
+        name='Especialista', lastname='Bench', ci='2', phone='2', email='especialista@example.com',
+        password='x', role=role_id, tenant_id=tenant_id
+    ).insert()
+
+    paciente = await Paciente(
+        user_id=paciente_user.id, fecha_nacimiento=datetime(1990, 1, 1), tipo_sangre='O+', tenant_id=tenant_id
+    ).insert()
+    especialidad = await Especialidad(nombre='bench', descripcion='bench', tenant_id=tenant_id).insert()
+    especialista = await Especialista(
+        user_id=especialista_user.id, especialidades=[especialidad.id], tenant_id=tenant_id
+    ).insert()
+    return paciente, especialista, especialidad
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def main(n: int):
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db_name = f'{settings.DB_NAME}_bench_create_cita'
+    await client.drop_database(db_name)
+    await init_db(client[db_name])
+
+    tenant_id = PydanticObjectId()
+    try:
+        paciente, especialista, especialidad = await _seed(tenant_id)
+
+        # Una cita por día para no chocar con la regla de "mismo día"
+        base = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        latencies = []
+        for i in range(n):
+            data = CitaCreate(
+                paciente_id=str(paciente.id),
+                especialista_id=str(especialista.id),
+                especialidad_id=str(especialidad.id),
+                fecha_inicio=base + timedelta(days=i),
+                motivo='bench',
+            )
+            t0 = time.perf_counter()
+            await create_cita(data, str(tenant_id))
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        print(f'n={n} p50={statistics.median(latencies):.2f}ms p99={_percentile(latencies, 99):.2f}ms max={max(latencies):.2f}ms')
+    finally:
+        await client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,71 @@
+# app/scripts/bench_mail_render.py
+# Micro-benchmark del render de correos: lectura + safe_substitute por correo (como antes)
+# contra plantilla compilada con el cuerpo del evento pre-renderizado una vez por evento.
+# Uso: python -m app.scripts.bench_mail_render [eventos]
+import os
+import sys
+import time
+from string import Template
+
+from app.shared.mail_templates import TEMPLATES_DIR, MailTemplateRenderer
+
+TEMPLATES = [
+    'reserva_mail_template.html',
+    'confirmacion_mail_template.html',
+    'cancelacion_mail_template.html',
+    'recordatorio_mail_template.html',
+]
+RECEPTORES = ['Ana Pérez', 'Luis Gómez', 'Administrador']
+VALUES = {
+    'fecha': '18/10/2026',
+    'hora': '10:30',
+    'nombre_consultorio': 'Benedetta Bellezza',
+    'nombre_especialidad': 'Dermatología',
+    'nombre_especialista': 'Luis Gómez',
+    'nombre_paciente': 'Ana Pérez',
+    'cta_url': 'http://localhost:5173',
+    'horarios_disponibles': '',
+}
+
+
+def _old_render(name: str, values: dict) -> str:
+    with open(os.path.join(TEMPLATES_DIR, name), 'r', encoding='utf-8') as file:
+        contenido = file.read()
+    return Template(contenido).safe_substitute(values)
+
+def bench_old(eventos: int) -> float:
+    start = time.perf_counter()
+    for i in range(eventos):
+        name = TEMPLATES[i % len(TEMPLATES)]
+        for receptor in RECEPTORES:
+            _old_render(name, {**VALUES, 'nombre_receptor': receptor})
+    return time.perf_counter() - start
+
+def bench_new(eventos: int, renderer: MailTemplateRenderer) -> float:
+    start = time.perf_counter()
+    for i in range(eventos):
+        plantilla = renderer.get(TEMPLATES[i % len(TEMPLATES)]).partial(VALUES)
+        for receptor in RECEPTORES:
+            plantilla.render({'nombre_receptor': receptor})
+    return time.perf_counter() - start
+
+def main():
+    eventos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    renderer = MailTemplateRenderer(TEMPLATES_DIR)
+    renderer.load_all()
+
+    # Mismo HTML en ambos caminos
+    for name in TEMPLATES:
+        esperado = _old_render(name, {**VALUES, 'nombre_receptor': 'X'})
+        assert renderer.get(name).partial(VALUES).render({'nombre_receptor': 'X'}) == esperado, name
+
+    correos = eventos * len(RECEPTORES)
+    for label, elapsed in (
+        ('archivo + safe_substitute', bench_old(eventos)),
+        ('compilada + pre-render', bench_new(eventos, renderer)),
+        ('compilada + pre-render (auto_reload)', bench_new(eventos, MailTemplateRenderer(TEMPLATES_DIR, auto_reload=True))),
+    ):
+        print(f'{label:<40} {correos / elapsed:>12,.0f} correos/s  ({elapsed * 1000:.1f} ms)')
+
+if __name__ == '__main__':
+    main()
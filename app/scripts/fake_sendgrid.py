@@ -0,0 +1,41 @@
+# app/scripts/fake_sendgrid.py
+# Servidor local que imita POST /v3/mail/send de SendGrid para pruebas del outbox.
+# Uso: python -m app.scripts.fake_sendgrid [puerto] [tasa_de_fallos]
+#      y en la app: SENDGRID_API_URL=http://127.0.0.1:8025
+# GET /messages devuelve lo recibido; DELETE /messages lo limpia.
+import random
+import sys
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+app = FastAPI(title='Fake SendGrid')
+app.state.messages = []
+app.state.fail_rate = 0.0
+
+
+@app.post('/v3/mail/send')
+async def mail_send(request: Request):
+    if random.random() < app.state.fail_rate:
+        # Fallo transitorio simulado: el outbox debe reintentar
+        return JSONResponse(status_code=503, content={"errors": [{"message": "fake outage"}]})
+
+    payload = await request.json()
+    app.state.messages.append(payload)
+    return Response(status_code=202)
+
+@app.get('/messages')
+async def listar_mensajes():
+    destinatarios = sum(len(m.get("personalizations", [])) for m in app.state.messages)
+    return {"total": len(app.state.messages), "destinatarios": destinatarios, "messages": app.state.messages}
+
+@app.delete('/messages')
+async def limpiar_mensajes():
+    app.state.messages.clear()
+    return {"total": 0}
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    app.state.fail_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    uvicorn.run(app, host='127.0.0.1', port=port)
@@ -2,6 +2,7 @@ import asyncio
 from beanie import PydanticObjectId
 
 from app.core.db import init_db
+from app.core.permission_cache import permission_cache
 from app.infrastructure.repositories.office_repo import get_benedetta_office
 from app.infrastructure.schemas.permission import Permission
 from app.infrastructure.schemas.role import Role
@@ -37,5 +38,7 @@ async def seed_admin_role():
     inserted = await admin_role.insert()
     print(f'Rol {inserted.name} creado con {len(inserted.permissions)} permisos.')
 
+    await permission_cache.invalidate(str(tenant_id))
+
 if __name__ == "__main__":
     asyncio.run(seed_admin_role())
\ No newline at end of file
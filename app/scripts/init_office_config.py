@@ -2,6 +2,7 @@ import asyncio
 from beanie import PydanticObjectId
 
 from app.core.db import init_db
+from app.infrastructure.repositories.officeConfig_repo import office_settings_cache
 from app.infrastructure.repositories.office_repo import get_benedetta_office
 from app.infrastructure.schemas.officeConfig import OfficeConfig
 
@@ -40,5 +41,7 @@ async def seed_office_config():
         inserted = await config.insert()
         print(f'Configuracion {inserted.name} creada.')
 
+    await office_settings_cache.invalidate(str(tenant_id))
+
 if __name__ == "__main__":
     asyncio.run(seed_office_config())
\ No newline at end of file
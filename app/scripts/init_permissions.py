@@ -6,6 +6,7 @@ from beanie import PydanticObjectId
 # sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from app.core.db import init_db
+from app.core.permission_cache import permission_cache
 from app.infrastructure.repositories.office_repo import get_benedetta_office
 from app.infrastructure.schemas.permission import Permission
 
@@ -75,5 +76,7 @@ async def seed_permissions():
         else:
             print(f'Ya esiste el permiso {exists.name}')
 
+    await permission_cache.invalidate(str(tenant_id))
+
 if __name__ == "__main__":
     asyncio.run(seed_permissions())
\ No newline at end of file
@@ -1,3 +1,7 @@
+# app/scripts/test_email.py
+# Prueba manual con el SDK oficial de SendGrid. La app envía por la API HTTP con httpx
+# (ver email_notifier), así que el SDK no está en requirements.txt:
+#   pip install sendgrid==6.12.4
 import os
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
@@ -0,0 +1,14 @@
+from typing import FrozenSet
+from pydantic import BaseModel, ConfigDict
+
+from app.infrastructure.schemas.user import User
+
+
+class AuthContext(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    user: User
+    tenant_id: str
+    role_id: str
+    role_name: str
+    permissions: FrozenSet[str]
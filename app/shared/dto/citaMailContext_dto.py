@@ -0,0 +1,22 @@
+from typing import Dict, Optional
+from pydantic import BaseModel, ConfigDict
+
+from app.domain.entities.officeConfig_entity import OfficeSettings
+from app.infrastructure.schemas.especialidad import Especialidad
+from app.infrastructure.schemas.especialista import Especialista
+from app.infrastructure.schemas.office import Office
+from app.infrastructure.schemas.paciente import Paciente
+from app.infrastructure.schemas.user import User
+
+
+class CitaMailContext(BaseModel):
+    """Datos compartidos por los correos de un lote de citas de un mismo tenant (indexados por id en str)."""
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    office: Office
+    office_settings: OfficeSettings
+    admin_user: Optional[User]
+    especialistas: Dict[str, Especialista]
+    pacientes: Dict[str, Paciente]
+    users: Dict[str, User]
+    especialidades: Dict[str, Especialidad]
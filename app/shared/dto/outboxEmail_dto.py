@@ -0,0 +1,15 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, EmailStr, Field
+
+
+class OutboxRecipient(BaseModel):
+    email: EmailStr
+    # Etiqueta en el html -> valor para este destinatario
+    substitutions: Dict[str, str] = Field(default_factory=dict)
+
+class OutboxEmail(BaseModel):
+    recipients: List[OutboxRecipient]
+    subject: str
+    html: str
+    dedupe_key: str
+    tenant_id: Optional[str] = None
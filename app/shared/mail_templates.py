@@ -0,0 +1,109 @@
+import os
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+from app.core.config import settings
+
+# <raíz del repo>/templates, sin depender del directorio de trabajo
+TEMPLATES_DIR = Path(__file__).resolve().parents[2] / 'templates'
+
+
+class _Slot:
+    __slots__ = ('name', 'raw')
+
+    def __init__(self, name: str, raw: str):
+        self.name = name
+        self.raw = raw
+
+
+class CompiledTemplate:
+    """
+    Plantilla string.Template ya parseada en tramos literales y placeholders. Mantiene la
+    semántica de safe_substitute: un placeholder sin valor queda tal cual en el texto.
+    """
+
+    __slots__ = ('parts',)
+
+    def __init__(self, parts: List[Union[str, _Slot]]):
+        self.parts = parts
+
+    @classmethod
+    def compile(cls, source: str) -> 'CompiledTemplate':
+        parts: List[Union[str, _Slot]] = []
+        pos = 0
+        for match in Template.pattern.finditer(source):
+            if match.start() > pos:
+                parts.append(source[pos:match.start()])
+            name = match.group('named') or match.group('braced')
+            if name is not None:
+                parts.append(_Slot(name, match.group(0)))
+            elif match.group('escaped') is not None:
+                parts.append(Template.delimiter)
+            else:
+                parts.append(match.group(0))
+            pos = match.end()
+        parts.append(source[pos:])
+        return cls(cls._merge(parts))
+
+    @staticmethod
+    def _merge(parts: List[Union[str, _Slot]]) -> List[Union[str, _Slot]]:
+        merged: List[Union[str, _Slot]] = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            elif part != '':
+                merged.append(part)
+        return merged
+
+    def partial(self, values: Mapping[str, object]) -> 'CompiledTemplate':
+        """Sustituye lo conocido y deja el resto como placeholders (p. ej. solo nombre_receptor)."""
+        return CompiledTemplate(self._merge([
+            str(values[p.name]) if isinstance(p, _Slot) and p.name in values else p
+            for p in self.parts
+        ]))
+
+    def render(self, values: Optional[Mapping[str, object]] = None) -> str:
+        values = values or {}
+        return ''.join(
+            p if isinstance(p, str) else (str(values[p.name]) if p.name in values else p.raw)
+            for p in self.parts
+        )
+
+
+class MailTemplateRenderer:
+    """
+    Cache de plantillas compiladas por nombre de archivo. Con `auto_reload` (desarrollo)
+    se revisa el mtime del archivo en cada uso y se recompila si cambió.
+    """
+
+    def __init__(self, templates_dir: Path, auto_reload: bool = False):
+        self.templates_dir = Path(templates_dir)
+        self.auto_reload = auto_reload
+        self._cache: Dict[str, Tuple[float, CompiledTemplate]] = {}
+
+    def _compile(self, name: str) -> CompiledTemplate:
+        path = self.templates_dir / name
+        mtime = os.path.getmtime(path)
+        with open(path, 'r', encoding='utf-8') as file:
+            compiled = CompiledTemplate.compile(file.read())
+        self._cache[name] = (mtime, compiled)
+        return compiled
+
+    def load_all(self) -> None:
+        for path in self.templates_dir.glob('*.html'):
+            self._compile(path.name)
+
+    def get(self, name: str) -> CompiledTemplate:
+        cached = self._cache.get(name)
+        if cached is None:
+            return self._compile(name)
+        if self.auto_reload and os.path.getmtime(self.templates_dir / name) != cached[0]:
+            return self._compile(name)
+        return cached[1]
+
+    def render(self, name: str, values: Mapping[str, object]) -> str:
+        return self.get(name).render(values)
+
+
+mail_renderer = MailTemplateRenderer(TEMPLATES_DIR, auto_reload=settings.MAIL_TEMPLATES_AUTO_RELOAD)
@@ -1,7 +1,7 @@
 import base64
 from datetime import datetime, timezone
+import json
 import os
-from string import Template
 from typing import Mapping
 import uuid
 
@@ -9,17 +9,13 @@ import uuid
 def get_utc_now():
     return datetime.now(timezone.utc)
 
-def get_mail_html(template_name: str, valores: Mapping[str, object]) -> str:
-    templates_dir = 'templates'
-    ruta_archivo = os.path.join(templates_dir, template_name)
+def encode_cursor(values: Mapping[str, object]) -> str:
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
 
-    with open(ruta_archivo, 'r', encoding='utf-8') as file:
-        contenido = file.read()
-
-    plantilla = Template(contenido)
-    resultado = plantilla.safe_substitute(valores)
-
-    return resultado
+def decode_cursor(cursor: str) -> dict:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
 
 def save_base_64_image_local(base64_image: str, dir: str= '' ) -> str: 
     folder: str = f'static/images/{dir}'
@@ -0,0 +1,24 @@
+# tests/conftest.py
+# Las pruebas cubren funciones puras: no necesitan Mongo ni credenciales reales, pero
+# app.core.config exige estas variables al importarse.
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+for _name, _value in {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DB_NAME": "tests",
+    "SECRET_KEY": "tests",
+    "SENDGRID_API_KEY": "tests",
+    "SENDGRID_FROM_EMAIL": "tests@example.com",
+    "S3_ENDPOINT": "http://localhost",
+    "S3_REGION": "us-east-1",
+    "S3_BUCKET": "tests",
+    "S3_ACCESS_KEY_ID": "tests",
+    "S3_SECRET_ACCESS_KEY": "tests",
+    "ALLOWED_ORIGIN": "http://localhost",
+    "REMINDERS_TEST_SPEEDUP": "0",
+}.items():
+    os.environ.setdefault(_name, _value)
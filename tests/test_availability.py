@@ -0,0 +1,111 @@
+# tests/test_availability.py
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.application.services.availability_service import (
+    build_occupancy_bitmap,
+    compute_free_slots,
+    first_free_starts,
+    merge_intervals,
+)
+
+UTC = ZoneInfo("UTC")
+# Lunes
+ORIGIN = datetime(2026, 10, 19, tzinfo=timezone.utc)
+DAY = 24 * 60
+
+
+def _disp(dia, desde, hasta):
+    return SimpleNamespace(dia=dia, desde=desde, hasta=hasta)
+
+def _at(minutes):
+    return ORIGIN + timedelta(minutes=minutes)
+
+
+def test_merge_intervals_fusiona_solapados_y_contiguos():
+    intervals = [(_at(60), _at(90)), (_at(0), _at(30)), (_at(30), _at(45)), (_at(80), _at(120)), (_at(200), _at(200))]
+
+    assert merge_intervals(intervals) == [(_at(0), _at(45)), (_at(60), _at(120))]
+
+def test_free_slots_alineados_al_bloque_y_sin_ocupados():
+    now = ORIGIN - timedelta(days=1)
+
+    slots = compute_free_slots(
+        [_disp(1, "09:00", "11:00")], [(_at(570), _at(600))], ORIGIN, _at(DAY), timedelta(minutes=30), UTC, now_utc=now
+    )
+
+    assert slots == [(_at(540), _at(570)), (_at(600), _at(630)), (_at(630), _at(660))]
+
+def test_free_slots_omite_los_ya_pasados():
+    slots = compute_free_slots(
+        [_disp(1, "09:00", "11:00")], [], ORIGIN, _at(DAY), timedelta(minutes=30), UTC, now_utc=_at(580)
+    )
+
+    assert slots == [(_at(600), _at(630)), (_at(630), _at(660))]
+
+def test_free_slots_usa_el_dia_local_del_consultorio():
+    tz = ZoneInfo("America/Guayaquil")
+    now = ORIGIN - timedelta(days=1)
+
+    slots = compute_free_slots([_disp(1, "08:00", "09:00")], [], ORIGIN, _at(2 * DAY), timedelta(minutes=60), tz, now_utc=now)
+
+    # 08:00 en Guayaquil (UTC-5) son las 13:00 UTC
+    assert slots == [(_at(780), _at(840))]
+
+def test_bitmap_marca_horario_y_ocupaciones():
+    libre, alineado = build_occupancy_bitmap(
+        [_disp(1, "09:00", "12:00")], [(_at(600), _at(630))], ORIGIN, DAY, 30, UTC
+    )
+
+    assert libre.shape == (DAY + 30,)
+    assert not libre[539] and libre[540] and libre[719] and not libre[720]
+    assert not libre[600:630].any()
+    assert list(np.nonzero(alineado)[0]) == [540, 570, 600, 630, 660, 690]
+
+def test_ocupacion_parcial_bloquea_el_minuto_completo():
+    libre, _ = build_occupancy_bitmap(
+        [_disp(1, "09:00", "12:00")], [(_at(600) + timedelta(seconds=30), _at(610) + timedelta(seconds=1))],
+        ORIGIN, DAY, 30, UTC
+    )
+
+    assert libre[599] and not libre[600] and not libre[610] and libre[611]
+
+def test_first_free_starts_ordena_por_minuto_entre_especialistas():
+    mañana = build_occupancy_bitmap([_disp(1, "09:00", "10:00")], [], ORIGIN, DAY, 30, UTC)
+    temprano = build_occupancy_bitmap(
+        [_disp(1, "08:00", "10:00")], [(_at(480), _at(540))], ORIGIN, DAY, 30, UTC
+    )
+    libres = np.vstack([mañana[0], temprano[0]])
+    alineados = np.vstack([mañana[1], temprano[1]])
+
+    assert first_free_starts(libres, alineados, 30, 0, 10) == [(0, 540), (1, 540), (0, 570), (1, 570)]
+    assert first_free_starts(libres, alineados, 30, 0, 3) == [(0, 540), (1, 540), (0, 570)]
+
+def test_first_free_starts_respeta_min_offset():
+    libre, alineado = build_occupancy_bitmap([_disp(1, "09:00", "11:00")], [], ORIGIN, DAY, 30, UTC)
+
+    starts = first_free_starts(libre[None, :], alineado[None, :], 30, 541, 10)
+
+    assert starts == [(0, 570), (0, 600), (0, 630)]
+
+def test_bitmap_coincide_con_el_barrido_lineal():
+    disponibilidades = [_disp(1, "09:00", "13:00"), _disp(1, "15:00", "18:00"), _disp(2, "08:30", "12:00")]
+    busy = [(_at(600), _at(645)), (_at(930), _at(1000)), (_at(DAY + 540), _at(DAY + 600))]
+    step = 45
+    now = ORIGIN - timedelta(days=1)
+
+    esperado = compute_free_slots(
+        disponibilidades, busy, ORIGIN, _at(2 * DAY), timedelta(minutes=step), UTC, now_utc=now
+    )
+    libre, alineado = build_occupancy_bitmap(disponibilidades, busy, ORIGIN, 2 * DAY, step, UTC)
+    starts = first_free_starts(libre[None, :], alineado[None, :], step, 0, 1000)
+
+    assert [(_at(m), _at(m + step)) for _, m in starts] == esperado
+
+def test_sin_disponibilidad_no_hay_slots():
+    libre, alineado = build_occupancy_bitmap([], [], ORIGIN, DAY, 30, UTC)
+
+    assert first_free_starts(libre[None, :], alineado[None, :], 30, 0, 5) == []
@@ -0,0 +1,111 @@
+# tests/test_cita_out.py
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.infrastructure.repositories import cita_repo
+
+TENANT_A = PydanticObjectId()
+TENANT_B = PydanticObjectId()
+ESPECIALIDADES = [PydanticObjectId(), PydanticObjectId()]
+ADMIN = PydanticObjectId()
+
+
+class _Doc(SimpleNamespace):
+    def model_dump(self):
+        return {k: v for k, v in vars(self).items() if k != "id"}
+
+
+def _cita(tenant_id, i, canceled_by=None):
+    return SimpleNamespace(
+        id=PydanticObjectId(),
+        tenant_id=tenant_id,
+        paciente_id=PydanticObjectId(),
+        paciente_name=f"Paciente {i}",
+        especialista_name="Especialista",
+        especialidad_id=ESPECIALIDADES[i % 2],
+        estado_id=i % 3,
+        fecha_inicio=datetime(2026, 10, 19, 13, 0),
+        fecha_fin=datetime(2026, 10, 19, 13, 30),
+        duration_minutes=30,
+        motivo=None,
+        motivo_cancelacion="Sin motivo" if canceled_by else None,
+        canceledBy=canceled_by,
+    )
+
+
+@pytest.fixture
+def llamadas(monkeypatch):
+    """Reemplaza las consultas de referencias por fakes que cuentan las llamadas por tenant."""
+    conteo = {"tz": [], "especialidades": [], "estados": [], "usuarios": []}
+
+    async def get_office_timezone(tenant_id):
+        conteo["tz"].append(tenant_id)
+        return ZoneInfo("America/Guayaquil")
+
+    async def get_especialidades_by_ids(ids, tenant_id):
+        conteo["especialidades"].append(tenant_id)
+        return [_Doc(id=PydanticObjectId(i), nombre=f"Especialidad {i[-4:]}") for i in ids]
+
+    async def get_estados_cita_by_ids(ids, tenant_id):
+        conteo["estados"].append(tenant_id)
+        return [
+            _Doc(id=PydanticObjectId(), estado_id=i, nombre=f"Estado {i}", descripcion="")
+            for i in ids
+        ]
+
+    async def get_users_by_ids(ids, tenant_id):
+        conteo["usuarios"].append(tenant_id)
+        ahora = datetime.now(timezone.utc)
+        return [
+            _Doc(
+                id=PydanticObjectId(i), name="Admin", lastname="Bench", ci="0", phone="0",
+                email="admin@example.com", role="admin", isActive=True, isVerified=True,
+                createdAt=ahora, updatedAt=ahora,
+            )
+            for i in ids
+        ]
+
+    monkeypatch.setattr(cita_repo, "get_office_timezone", get_office_timezone)
+    monkeypatch.setattr(cita_repo, "get_especialidades_by_ids", get_especialidades_by_ids)
+    monkeypatch.setattr(cita_repo, "get_estados_cita_by_ids", get_estados_cita_by_ids)
+    monkeypatch.setattr(cita_repo, "get_users_by_ids", get_users_by_ids)
+    return conteo
+
+
+def test_una_consulta_por_coleccion_sin_importar_el_numero_de_citas(llamadas):
+    citas = [_cita(TENANT_A, i, canceled_by=ADMIN if i % 5 == 0 else None) for i in range(50)]
+
+    out = asyncio.run(cita_repo.citas_to_out_many(citas))
+
+    assert len(out) == 50
+    assert {k: len(v) for k, v in llamadas.items()} == {"tz": 1, "especialidades": 1, "estados": 1, "usuarios": 1}
+
+def test_una_consulta_por_coleccion_y_tenant(llamadas):
+    citas = [_cita(TENANT_A if i % 2 else TENANT_B, i) for i in range(20)]
+
+    asyncio.run(cita_repo.citas_to_out_many(citas))
+
+    for nombre in ("tz", "especialidades", "estados"):
+        assert sorted(llamadas[nombre]) == sorted([str(TENANT_A), str(TENANT_B)])
+    # Sin citas canceladas no se consulta la colección de usuarios
+    assert llamadas["usuarios"] == []
+
+def test_conserva_el_orden_y_resuelve_referencias(llamadas):
+    citas = [_cita(TENANT_A, i, canceled_by=ADMIN if i == 2 else None) for i in range(4)]
+
+    out = asyncio.run(cita_repo.citas_to_out_many(citas))
+
+    assert [o.id for o in out] == [str(c.id) for c in citas]
+    assert [o.estado.estado_id for o in out] == [str(c.estado_id) for c in citas]
+    assert out[1].especialidad == f"Especialidad {str(ESPECIALIDADES[1])[-4:]}"
+    assert out[2].canceledBy.id == str(ADMIN) and out[0].canceledBy is None
+    assert out[0].fecha_inicio.utcoffset().total_seconds() == -5 * 3600
+
+def test_lote_vacio_no_consulta(llamadas):
+    assert asyncio.run(cita_repo.citas_to_out_many([])) == []
+    assert all(not v for v in llamadas.values())
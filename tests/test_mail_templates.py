@@ -0,0 +1,41 @@
+# tests/test_mail_templates.py
+from string import Template
+
+import pytest
+
+from app.shared.mail_templates import CompiledTemplate
+
+SOURCES = [
+    "Hola $nombre, tu cita es el ${fecha} a las $hora.",
+    "Precio: $$50 para $nombre",
+    "Sin placeholders",
+    "$nombre$hora${fecha}",
+    "Falta $desconocido y sobra $ suelto",
+    "",
+]
+VALUES = {"nombre": "Ana", "fecha": "2026-10-19", "hora": "09:00"}
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_render_equivale_a_safe_substitute(source):
+    assert CompiledTemplate.compile(source).render(VALUES) == Template(source).safe_substitute(VALUES)
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_render_sin_valores_deja_el_texto(source):
+    assert CompiledTemplate.compile(source).render() == Template(source).safe_substitute()
+
+def test_partial_deja_pendientes_los_placeholders_sin_valor():
+    plantilla = CompiledTemplate.compile("Hola ${nombre_receptor}, cita con $especialista el $fecha")
+
+    parcial = plantilla.partial({"especialista": "Dr. Pérez", "fecha": "lunes"})
+
+    assert parcial.render() == "Hola ${nombre_receptor}, cita con Dr. Pérez el lunes"
+    assert parcial.render({"nombre_receptor": "Ana"}) == "Hola Ana, cita con Dr. Pérez el lunes"
+
+def test_partial_fusiona_tramos_literales():
+    parcial = CompiledTemplate.compile("a $x b $y c").partial({"x": 1})
+
+    assert [p for p in parcial.parts if isinstance(p, str)] == ["a 1 b ", " c"]
+
+def test_valores_no_str_se_convierten():
+    assert CompiledTemplate.compile("$n citas").render({"n": 3}) == "3 citas"
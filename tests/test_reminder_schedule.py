@@ -0,0 +1,74 @@
+# tests/test_reminder_schedule.py
+from datetime import datetime, timedelta, timezone
+
+from app.application.services.reminder_schedule import (
+    ACTION_AUTO_CANCEL,
+    ACTION_RECORDATORIO,
+    AUTO_CANCEL_HOURS,
+    HOUR_SECONDS,
+    TOLERANCE_SECONDS,
+    compute_next_action,
+    latest_due_action,
+)
+from app.infrastructure.schemas.estadoCita import ESTADOS_CITA
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+PENDIENTE = ESTADOS_CITA.pendiente.value
+CONFIRMADA = ESTADOS_CITA.confirmada.value
+
+
+def _hours(h: float) -> timedelta:
+    return timedelta(seconds=HOUR_SECONDS * h)
+
+
+def test_next_action_es_la_primera_marca_futura():
+    inicio = NOW + _hours(30)
+
+    assert compute_next_action(inicio, PENDIENTE, [], NOW) == (inicio - _hours(24), ACTION_RECORDATORIO, 24)
+
+def test_next_action_salta_marcas_enviadas():
+    inicio = NOW + _hours(30)
+
+    assert compute_next_action(inicio, PENDIENTE, [24, 22], NOW) == (inicio - _hours(20), ACTION_RECORDATORIO, 20)
+
+def test_next_action_descarta_marcas_fuera_de_tolerancia():
+    inicio = NOW + _hours(9)
+
+    # La marca de 10 h fue hace 1 h: ya no entra en la ventana
+    assert compute_next_action(inicio, PENDIENTE, [], NOW) == (inicio - _hours(8), ACTION_RECORDATORIO, 8)
+
+def test_next_action_dentro_de_tolerancia_sigue_vigente():
+    inicio = NOW + _hours(10) - timedelta(seconds=TOLERANCE_SECONDS)
+
+    assert compute_next_action(inicio, PENDIENTE, [], NOW) == (inicio - _hours(10), ACTION_RECORDATORIO, 10)
+
+def test_next_action_termina_en_autocancelacion():
+    inicio = NOW + _hours(7)
+
+    assert compute_next_action(inicio, PENDIENTE, [], NOW) == (
+        inicio - _hours(AUTO_CANCEL_HOURS), ACTION_AUTO_CANCEL, AUTO_CANCEL_HOURS
+    )
+
+def test_next_action_sin_acciones():
+    assert compute_next_action(NOW + _hours(2), PENDIENTE, [], NOW) == (None, None, None)
+    assert compute_next_action(NOW + _hours(30), CONFIRMADA, [], NOW) == (None, None, None)
+
+def test_next_action_acepta_fechas_naive_como_utc():
+    inicio = NOW + _hours(30)
+
+    assert compute_next_action(inicio.replace(tzinfo=None), PENDIENTE, [], NOW)[0] == inicio - _hours(24)
+
+def test_latest_due_action_toma_solo_la_ultima_marca_vencida():
+    inicio = NOW + _hours(9)
+
+    assert latest_due_action(inicio, PENDIENTE, [], NOW) == (ACTION_RECORDATORIO, 10)
+    assert latest_due_action(inicio, PENDIENTE, [10], NOW) == (None, None)
+    # Las marcas anteriores no enviadas no se recuperan
+    assert latest_due_action(inicio, PENDIENTE, [10, 12], NOW) == (None, None)
+
+def test_latest_due_action_prefiere_autocancelar():
+    assert latest_due_action(NOW + _hours(5), PENDIENTE, [], NOW) == (ACTION_AUTO_CANCEL, AUTO_CANCEL_HOURS)
+
+def test_latest_due_action_sin_vencidas():
+    assert latest_due_action(NOW + _hours(30), PENDIENTE, [], NOW) == (None, None)
+    assert latest_due_action(NOW + _hours(5), CONFIRMADA, [], NOW) == (None, None)
@@ -0,0 +1,34 @@
+# tests/test_ws_broker.py
+import asyncio
+
+import pytest
+
+from app.application.websockets.broker import EventBroker, InMemoryBroker
+
+TENANT = "tenant:t1"
+ESP = "tenant:t1:esp:e1"
+
+
+def test_broker_incompleto_falla_al_instanciar():
+    class SinForward(EventBroker):
+        async def next_seq(self, stream: str) -> int:
+            return 1
+
+    with pytest.raises(TypeError):
+        SinForward()
+
+def test_in_memory_sella_seq_por_tenant_y_entrega_local():
+    async def escenario():
+        entregados = []
+        broker = InMemoryBroker()
+        await broker.start(lambda rooms, message: entregados.append((rooms, message)))
+        await broker.publish([TENANT], {"entity": "cita", "action": "created"})
+        await broker.publish([TENANT, ESP], {"entity": "cita", "action": "updated"})
+        await broker.publish(["tenant:t2"], {"entity": "cita", "action": "created"})
+        return entregados
+
+    entregados = asyncio.run(escenario())
+
+    seqs = [message["seq"] for _, message in entregados]
+    assert seqs[1] == seqs[0] + 1
+    assert [rooms for rooms, _ in entregados] == [[TENANT], [TENANT, ESP], ["tenant:t2"]]
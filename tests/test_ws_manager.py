@@ -0,0 +1,236 @@
+# tests/test_ws_manager.py
+import asyncio
+import json
+
+from app.application.websockets.manager import (
+    DISCONNECT,
+    IDLE_CLOSE_CODE,
+    SLOW_CONSUMER_CLOSE_CODE,
+    WSManager,
+)
+
+TENANT = "tenant:t1"
+ESP = "tenant:t1:esp:e1"
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+        self.closed_with = None
+
+    async def send_text(self, text: str) -> None:
+        self.frames.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+def _event(seq, **data):
+    return {"entity": "cita", "action": "updated", "id": "c1", "seq": seq, "data": {"id": "c1", **data}}
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_coalescencia_junta_los_eventos_en_un_batch():
+    async def escenario():
+        manager = WSManager(coalesce_ms=20)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        for seq in (1, 2, 3):
+            manager.deliver([TENANT], _event(seq, estado_id=seq))
+        await asyncio.sleep(0.06)
+        return ws.frames
+
+    frames = _run(escenario())
+
+    assert len(frames) == 1
+    assert frames[0]["entity"] == "batch" and frames[0]["seq"] == 3
+    assert [e["seq"] for e in frames[0]["events"]] == [1, 2, 3]
+
+def test_batch_envia_solo_los_campos_cambiados():
+    async def escenario():
+        manager = WSManager(coalesce_ms=20)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        manager.deliver([TENANT], {**_event(1, estado_id=2, motivo="x"), "changed": ["estado_id"]})
+        manager.deliver([TENANT], _event(2, estado_id=3))
+        await asyncio.sleep(0.06)
+        return ws.frames
+
+    (frame,) = _run(escenario())
+
+    assert frame["events"][0]["data"] == {"estado_id": 2}
+    # Sin `changed` el evento va completo
+    assert frame["events"][1]["data"] == {"id": "c1", "estado_id": 3}
+
+def test_evento_solo_en_la_ventana_sale_completo():
+    async def escenario():
+        manager = WSManager(coalesce_ms=20)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        manager.deliver([TENANT], {**_event(1, estado_id=2, motivo="x"), "changed": ["estado_id"]})
+        await asyncio.sleep(0.06)
+        return ws.frames
+
+    (frame,) = _run(escenario())
+
+    assert frame == {**_event(1, estado_id=2, motivo="x"), "changed": ["estado_id"]}
+
+def test_cada_socket_recibe_solo_los_eventos_de_sus_salas():
+    async def escenario():
+        manager = WSManager(coalesce_ms=20)
+        tenant_ws, esp_ws = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(TENANT, tenant_ws)
+        await manager.connect(ESP, esp_ws)
+        manager.deliver([TENANT], _event(1))
+        manager.deliver([TENANT, ESP], _event(2))
+        await asyncio.sleep(0.06)
+        return tenant_ws.frames, esp_ws.frames
+
+    tenant_frames, esp_frames = _run(escenario())
+
+    assert [e["seq"] for e in tenant_frames[0]["events"]] == [1, 2]
+    assert esp_frames == [_event(2)]
+
+def test_sin_coalescencia_un_frame_por_evento():
+    async def escenario():
+        manager = WSManager(coalesce_ms=0)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        manager.deliver([TENANT], _event(1))
+        manager.deliver([TENANT], _event(2))
+        await asyncio.sleep(0.01)
+        return ws.frames
+
+    assert [f["seq"] for f in _run(escenario())] == [1, 2]
+
+def test_socket_en_varias_salas_recibe_el_evento_una_vez():
+    async def escenario():
+        manager = WSManager(coalesce_ms=0)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        await manager.connect(ESP, ws)
+        manager.deliver([TENANT, ESP], _event(1))
+        await asyncio.sleep(0.01)
+        return ws.frames
+
+    frames = _run(escenario())
+
+    assert [f["seq"] for f in frames] == [1]
+
+def test_resume_reenvia_lo_perdido_y_avisa_ready():
+    async def escenario():
+        manager = WSManager(coalesce_ms=0)
+        for seq in (1, 2, 3):
+            manager.deliver([TENANT], _event(seq))
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        ok = manager.resume([TENANT], ws, 1)
+        await asyncio.sleep(0.01)
+        return ok, ws.frames
+
+    ok, frames = _run(escenario())
+
+    assert ok
+    assert [f["seq"] for f in frames[:-1]] == [2, 3]
+    assert frames[-1] == {"entity": "sync", "action": "ready", "seq": 3, "replayed": 2}
+
+def test_resume_con_coalescencia_omite_lo_que_sigue_en_ventana():
+    async def escenario():
+        manager = WSManager(coalesce_ms=20)
+        manager.deliver([TENANT], _event(1))
+        await asyncio.sleep(0.06)
+        manager.deliver([TENANT], _event(2))
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        manager.resume([TENANT], ws, 0)
+        await asyncio.sleep(0.06)
+        return ws.frames
+
+    frames = _run(escenario())
+
+    # Reenvío de lo ya publicado, ready, y luego el frame en vivo con el evento en ventana
+    assert frames[0] == _event(1)
+    assert frames[1]["action"] == "ready" and frames[1]["replayed"] == 1
+    assert frames[2] == _event(2)
+
+def test_resume_pide_resync_si_no_puede_garantizar_continuidad():
+    async def escenario():
+        manager = WSManager(replay_size=2, coalesce_ms=0)
+        for seq in (1, 2, 3, 4):
+            manager.deliver([TENANT], _event(seq))
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        ok = manager.resume([TENANT], ws, 1)
+        await asyncio.sleep(0.01)
+        return ok, ws.frames
+
+    ok, frames = _run(escenario())
+
+    assert not ok
+    assert frames == [{"entity": "sync", "action": "resync", "seq": 4}]
+
+def test_cola_llena_descarta_lo_mas_viejo():
+    async def escenario():
+        manager = WSManager(max_queue=2, coalesce_ms=0)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        # Sin ceder el loop el escritor no alcanza a vaciar la cola
+        for seq in (1, 2, 3):
+            manager.deliver([TENANT], _event(seq))
+        dropped = manager.connections[ws].dropped
+        await asyncio.sleep(0.01)
+        return ws.frames, dropped
+
+    frames, dropped = _run(escenario())
+
+    assert [f["seq"] for f in frames] == [2, 3]
+    assert dropped == 1
+
+def test_cola_llena_con_disconnect_cierra_la_conexion():
+    async def escenario():
+        manager = WSManager(max_queue=2, policy=DISCONNECT, coalesce_ms=0)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        for seq in (1, 2, 3):
+            manager.deliver([TENANT], _event(seq))
+        await asyncio.sleep(0.01)
+        return ws, manager
+
+    ws, manager = _run(escenario())
+
+    assert ws.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert ws.frames == []
+    assert ws not in manager.connections and TENANT not in manager.rooms
+
+def test_heartbeat_envia_ping_a_los_sockets_activos():
+    async def escenario():
+        manager = WSManager(idle_timeout=60, coalesce_ms=0)
+        ws = FakeWebSocket()
+        await manager.connect(TENANT, ws)
+        manager.heartbeat_once()
+        await asyncio.sleep(0.01)
+        return ws, manager
+
+    ws, manager = _run(escenario())
+
+    assert ws.frames == [{"entity": "sync", "action": "ping"}]
+    assert ws.closed_with is None and ws in manager.connections
+
+def test_heartbeat_cierra_los_sockets_inactivos():
+    async def escenario():
+        manager = WSManager(idle_timeout=60, coalesce_ms=0)
+        inactivo, activo = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(TENANT, inactivo)
+        await manager.connect(TENANT, activo)
+        manager.connections[inactivo].last_seen -= 61
+        manager.heartbeat_once()
+        await asyncio.sleep(0.01)
+        return inactivo, activo, manager
+
+    inactivo, activo, manager = _run(escenario())
+
+    assert inactivo.closed_with == IDLE_CLOSE_CODE and inactivo not in manager.connections
+    assert activo.closed_with is None and activo.frames == [{"entity": "sync", "action": "ping"}]
+    assert manager.reaped == 1
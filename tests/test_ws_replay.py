@@ -0,0 +1,62 @@
+# tests/test_ws_replay.py
+from app.application.websockets.replay import ReplayBuffer, stream_of
+
+TENANT = "tenant:t1"
+ESP = "tenant:t1:esp:e1"
+
+
+def _msg(seq):
+    return {"entity": "cita", "action": "updated", "id": f"c{seq}", "seq": seq}
+
+def _seqs(messages):
+    return [m["seq"] for m in messages]
+
+
+def test_stream_of_agrupa_las_salas_del_tenant():
+    assert stream_of(TENANT) == stream_of(ESP) == "tenant:t1"
+
+def test_replay_devuelve_lo_posterior_a_since():
+    buf = ReplayBuffer(10)
+    for seq in range(1, 6):
+        buf.record([TENANT], seq, _msg(seq))
+
+    assert _seqs(buf.replay([TENANT], 2)) == [3, 4, 5]
+    assert buf.replay([TENANT], 5) == []
+    assert buf.last_seq(ESP) == 5
+
+def test_replay_une_salas_sin_repetir_y_en_orden():
+    buf = ReplayBuffer(10)
+    buf.record([TENANT, ESP], 1, _msg(1))
+    buf.record([TENANT], 3, _msg(3))
+    buf.record([TENANT, ESP], 2, _msg(2))
+
+    assert _seqs(buf.replay([TENANT, ESP], 0)) == [1, 2, 3]
+
+def test_replay_omite_los_seq_en_skip():
+    buf = ReplayBuffer(10)
+    for seq in range(1, 4):
+        buf.record([TENANT], seq, _msg(seq))
+
+    assert _seqs(buf.replay([TENANT], 0, skip={3})) == [1, 2]
+
+def test_replay_pide_resync_si_since_es_de_otra_serie():
+    buf = ReplayBuffer(10)
+    for seq in range(100, 103):
+        buf.record([TENANT], seq, _msg(seq))
+
+    # Posterior a lo visto (otro worker o reinicio)
+    assert buf.replay([TENANT], 200) is None
+    # Anterior al primer evento que vio este worker
+    assert buf.replay([TENANT], 50) is None
+    assert _seqs(buf.replay([TENANT], 99)) == [100, 101, 102]
+
+def test_replay_pide_resync_si_la_sala_descarto_eventos():
+    buf = ReplayBuffer(3)
+    for seq in range(1, 6):
+        buf.record([TENANT], seq, _msg(seq))
+
+    assert buf.replay([TENANT], 1) is None
+    assert _seqs(buf.replay([TENANT], 2)) == [3, 4, 5]
+
+def test_replay_sin_eventos_del_tenant():
+    assert ReplayBuffer(10).replay([TENANT], 0) is None